@@ -0,0 +1,234 @@
+"""Baseline schema (tables previously created by Base.metadata.create_all)
+
+Databases that were bootstrapped by create_all already have these tables;
+existing tables are left untouched so `alembic upgrade head` can adopt them.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns, indexes=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    _create_table(
+        "drivers",
+        sa.Column("driver_id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=True),
+        sa.Column("phone_number", sa.BigInteger(), nullable=True),
+        sa.Column("email", sa.String(100), nullable=True),
+        sa.Column("kyc_verified", sa.String(20), nullable=True),
+        sa.Column("primary_location", sa.String(255), nullable=True),
+        sa.Column("photo_url", sa.String(255), nullable=True),
+        sa.Column("wallet_balance", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("licence_number", sa.String(50), nullable=True),
+        sa.Column("aadhar_number", sa.String(20), nullable=True),
+        sa.Column("licence_url", sa.String(255), nullable=True),
+        sa.Column("aadhar_url", sa.String(255), nullable=True),
+        sa.Column("licence_expiry", sa.Date(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("device_id", sa.String(255), nullable=True),
+        sa.Column("fcm_tokens", sa.String(512), nullable=True),
+        sa.Column("is_available", sa.Boolean(), nullable=True),
+        sa.Column("is_approved", sa.Boolean(), nullable=True),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("police_verification_url", sa.String(255), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_drivers_driver_id", ["driver_id"], False)],
+    )
+
+    _create_table(
+        "driver_live_location",
+        sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("latitude", sa.DECIMAL(10, 8), nullable=False),
+        sa.Column("longitude", sa.DECIMAL(11, 8), nullable=False),
+        sa.Column("last_updated", sa.DateTime(), nullable=True),
+    )
+
+    _create_table(
+        "vehicles",
+        sa.Column("vehicle_id", sa.String(36), primary_key=True),
+        sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id"), nullable=True),
+        sa.Column("vehicle_type", sa.String(50), nullable=True),
+        sa.Column("vehicle_brand", sa.String(100), nullable=True),
+        sa.Column("vehicle_model", sa.String(100), nullable=True),
+        sa.Column("rc_expiry_date", sa.Date(), nullable=True),
+        sa.Column("fc_expiry_date", sa.Date(), nullable=True),
+        sa.Column("vehicle_number", sa.String(20), nullable=True, unique=True),
+        sa.Column("vehicle_color", sa.String(50), nullable=True),
+        sa.Column("seating_capacity", sa.Integer(), nullable=True),
+        sa.Column("rc_book_url", sa.String(255), nullable=True),
+        sa.Column("fc_certificate_url", sa.String(255), nullable=True),
+        sa.Column("vehicle_front_url", sa.String(255), nullable=True),
+        sa.Column("vehicle_back_url", sa.String(255), nullable=True),
+        sa.Column("vehicle_left_url", sa.String(255), nullable=True),
+        sa.Column("vehicle_right_url", sa.String(255), nullable=True),
+        sa.Column("vehicle_inside_url", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("vehicle_approved", sa.Boolean(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_vehicles_vehicle_id", ["vehicle_id"], False)],
+    )
+
+    _create_table(
+        "trips",
+        sa.Column("trip_id", sa.String(36), primary_key=True),
+        sa.Column("customer_name", sa.String(100), nullable=True),
+        sa.Column("customer_phone", sa.String(15), nullable=True),
+        sa.Column("pickup_address", sa.Text(), nullable=True),
+        sa.Column("drop_address", sa.Text(), nullable=True),
+        sa.Column("trip_type", sa.String(50), nullable=True),
+        sa.Column("vehicle_type", sa.String(50), nullable=True),
+        sa.Column("assigned_driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id"), nullable=True),
+        sa.Column("trip_status", sa.String(50), nullable=True),
+        sa.Column("distance_km", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("odo_start", sa.Integer(), nullable=True),
+        sa.Column("odo_end", sa.Integer(), nullable=True),
+        sa.Column("fare", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("ended_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("planned_start_at", sa.DateTime(), nullable=True),
+        sa.Column("planned_end_at", sa.DateTime(), nullable=True),
+        sa.Column("is_manual_assignment", sa.Boolean(), nullable=True),
+        sa.Column("passenger_count", sa.Integer(), nullable=True),
+        sa.Column("pet_count", sa.Integer(), nullable=True),
+        sa.Column("luggage_count", sa.Integer(), nullable=True),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("waiting_charges", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("inter_state_permit_charges", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("driver_allowance", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("luggage_cost", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("pet_cost", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("toll_charges", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("night_allowance", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("total_amount", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("odo_start_url", sa.String(255), nullable=True),
+        sa.Column("odo_end_url", sa.String(255), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_trips_trip_id", ["trip_id"], False)],
+    )
+
+    _create_table(
+        "trip_driver_requests",
+        sa.Column("request_id", sa.String(36), primary_key=True),
+        sa.Column("trip_id", sa.String(36), sa.ForeignKey("trips.trip_id"), nullable=True),
+        sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id"), nullable=True),
+        sa.Column("status", sa.String(50), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_trip_driver_requests_request_id", ["request_id"], False)],
+    )
+
+    _create_table(
+        "payment_transactions",
+        sa.Column("payment_id", sa.String(36), primary_key=True),
+        sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id"), nullable=True),
+        sa.Column("trip_id", sa.String(36), sa.ForeignKey("trips.trip_id"), nullable=True),
+        sa.Column("amount", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("transaction_id", sa.String(100), nullable=True),
+        sa.Column("transaction_type", sa.String(50), nullable=True),
+        sa.Column("status", sa.String(50), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("razorpay_payment_id", sa.String(100), nullable=True),
+        sa.Column("razorpay_order_id", sa.String(100), nullable=True),
+        sa.Column("razorpay_signature", sa.String(255), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_payment_transactions_payment_id", ["payment_id"], False)],
+    )
+
+    _create_table(
+        "wallet_transactions",
+        sa.Column("wallet_id", sa.String(36), primary_key=True),
+        sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id"), nullable=True),
+        sa.Column("trip_id", sa.String(36), sa.ForeignKey("trips.trip_id"), nullable=True),
+        sa.Column("payment_id", sa.String(36), sa.ForeignKey("payment_transactions.payment_id"), nullable=True),
+        sa.Column("amount", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("transaction_type", sa.String(50), nullable=True),
+        sa.Column("reason", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_wallet_transactions_wallet_id", ["wallet_id"], False)],
+    )
+
+    _create_table(
+        "vehicle_tariff_config",
+        sa.Column("tariff_id", sa.String(36), primary_key=True),
+        sa.Column("vehicle_type", sa.String(50), nullable=True),
+        sa.Column("one_way_per_km", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("round_trip_per_km", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("driver_allowance", sa.DECIMAL(10, 2), nullable=True),
+        sa.Column("one_way_min_km", sa.Integer(), nullable=True),
+        sa.Column("round_trip_min_km", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("driver_commission", sa.DECIMAL(5, 2), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_vehicle_tariff_config_tariff_id", ["tariff_id"], False)],
+    )
+
+    _create_table(
+        "error_handling",
+        sa.Column("error_id", sa.String(36), primary_key=True),
+        sa.Column("error_type", sa.String(50), nullable=True),
+        sa.Column("error_code", sa.Integer(), nullable=False, unique=True),
+        sa.Column("error_description", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_error_handling_error_id", ["error_id"], False)],
+    )
+
+    _create_table(
+        "admins",
+        sa.Column("admin_id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=True),
+        sa.Column("phone_number", sa.BigInteger(), nullable=False, unique=True),
+        sa.Column("role", sa.String(20), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("last_login_at", sa.DateTime(), nullable=True),
+        sa.Column("created_by", sa.String(36), sa.ForeignKey("admins.admin_id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        indexes=[("ix_admins_admin_id", ["admin_id"], False)],
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        "admins", "error_handling", "vehicle_tariff_config", "wallet_transactions",
+        "payment_transactions", "trip_driver_requests", "trips", "vehicles",
+        "driver_live_location", "drivers",
+    ):
+        op.drop_table(name)
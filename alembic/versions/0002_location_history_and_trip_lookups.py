@@ -0,0 +1,64 @@
+"""Driver location history, active trip lookup and trip GPS distance tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table("driver_location_history"):
+        op.create_table(
+            "driver_location_history",
+            sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True, autoincrement=True),
+            sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id", ondelete="CASCADE"), nullable=False),
+            sa.Column("window_start", sa.DateTime(), nullable=False),
+            sa.Column("first_point_at", sa.DateTime(), nullable=True),
+            sa.Column("last_point_at", sa.DateTime(), nullable=True),
+            sa.Column("point_count", sa.Integer(), nullable=False),
+            sa.Column("data", sa.LargeBinary().with_variant(mysql.MEDIUMBLOB(), "mysql"), nullable=False),
+            sa.UniqueConstraint("driver_id", "window_start", name="uq_driver_location_history_window"),
+        )
+
+    if not _has_table("driver_active_trips"):
+        op.create_table(
+            "driver_active_trips",
+            sa.Column("trip_id", sa.String(36), sa.ForeignKey("trips.trip_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("driver_id", sa.String(36), sa.ForeignKey("drivers.driver_id", ondelete="CASCADE"), nullable=False),
+            sa.Column("trip_status", sa.String(50), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_driver_active_trips_driver_id", "driver_active_trips", ["driver_id"])
+
+    if not _has_table("trip_gps_distance"):
+        op.create_table(
+            "trip_gps_distance",
+            sa.Column("trip_id", sa.String(36), sa.ForeignKey("trips.trip_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("gps_distance_km", sa.DECIMAL(10, 2), nullable=True),
+            sa.Column("odometer_distance_km", sa.DECIMAL(10, 2), nullable=True),
+            sa.Column("mismatch_percent", sa.DECIMAL(7, 2), nullable=True),
+            sa.Column("is_flagged", sa.Boolean(), nullable=True),
+            sa.Column("point_count", sa.Integer(), nullable=True),
+            sa.Column("rejected_points", sa.Integer(), nullable=True),
+            sa.Column("computed_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_trip_gps_distance_is_flagged", "trip_gps_distance", ["is_flagged"])
+
+
+def downgrade() -> None:
+    op.drop_table("trip_gps_distance")
+    op.drop_table("driver_active_trips")
+    op.drop_table("driver_location_history")
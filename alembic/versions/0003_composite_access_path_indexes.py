@@ -0,0 +1,61 @@
+"""Composite indexes for the hot CRUD access paths
+
+Almost every listing filters `is_deleted = 0` plus one of trip_status,
+assigned_driver_id / driver_id or a created_at/updated_at range and orders
+by that timestamp. Each index leads with the equality columns and ends with
+the sort column, so the query is served in index order without a filesort.
+`scripts/check_query_plans.py` guards that the planner keeps using them.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("drivers", "ix_drivers_deleted_created", ["is_deleted", "created_at"]),
+    ("drivers", "ix_drivers_deleted_available", ["is_deleted", "is_available", "is_approved"]),
+    ("drivers", "ix_drivers_phone_number", ["phone_number"]),
+    ("vehicles", "ix_vehicles_driver_deleted", ["driver_id", "is_deleted"]),
+    ("trips", "ix_trips_deleted_status_updated", ["is_deleted", "trip_status", "updated_at"]),
+    ("trips", "ix_trips_deleted_updated", ["is_deleted", "updated_at"]),
+    ("trips", "ix_trips_deleted_created", ["is_deleted", "created_at"]),
+    ("trips", "ix_trips_driver_deleted_created", ["assigned_driver_id", "is_deleted", "created_at"]),
+    ("trips", "ix_trips_status_ended", ["trip_status", "ended_at"]),
+    ("trip_driver_requests", "ix_trip_requests_trip_deleted", ["trip_id", "is_deleted"]),
+    ("trip_driver_requests", "ix_trip_requests_driver_deleted_created", ["driver_id", "is_deleted", "created_at"]),
+    ("trip_driver_requests", "ix_trip_requests_deleted_created", ["is_deleted", "created_at"]),
+    ("payment_transactions", "ix_payments_driver_deleted_created", ["driver_id", "is_deleted", "created_at"]),
+    ("payment_transactions", "ix_payments_trip_deleted", ["trip_id", "is_deleted"]),
+    ("payment_transactions", "ix_payments_deleted_created", ["is_deleted", "created_at"]),
+    ("wallet_transactions", "ix_wallet_driver_deleted_created", ["driver_id", "is_deleted", "created_at"]),
+    ("wallet_transactions", "ix_wallet_deleted_created", ["is_deleted", "created_at"]),
+    ("vehicle_tariff_config", "ix_tariff_vehicle_type_active", ["vehicle_type", "is_active", "is_deleted"]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in INDEXES:
+        if name not in {ix["name"] for ix in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, name, columns in reversed(INDEXES):
+        # InnoDB drops its implicit foreign key index once a composite index
+        # leading with the same column exists; put a plain one back first
+        foreign_keys = {fk["constrained_columns"][0] for fk in inspector.get_foreign_keys(table)}
+        if bind.dialect.name == "mysql" and columns[0] in foreign_keys:
+            op.create_index(f"ix_{table}_{columns[0]}", table, [columns[0]])
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,60 @@
+"""Daily revenue rollup for analytics, backfilled from completed trips
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+EXTRA_COLUMNS = (
+    "waiting_charges", "inter_state_permit_charges", "driver_allowance",
+    "luggage_cost", "pet_cost", "toll_charges", "night_allowance",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_revenue_rollup",
+        sa.Column("revenue_date", sa.Date(), primary_key=True),
+        sa.Column("vehicle_type", sa.String(50), primary_key=True),
+        sa.Column("trip_type", sa.String(50), primary_key=True),
+        sa.Column("trip_count", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("fare", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("commission", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("extras", sa.DECIMAL(14, 2), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    # Backfill in SQL, frozen here (app.crud.crud_revenue.rebuild may change with the app);
+    # commission at the active tariff's rate for the vehicle type, 10% without one
+    extras = " + ".join(f"COALESCE({column}, 0)" for column in EXTRA_COLUMNS)
+    op.execute(sa.text(f"""
+        INSERT INTO daily_revenue_rollup
+            (revenue_date, vehicle_type, trip_type, trip_count, revenue, fare, commission, extras, updated_at)
+        SELECT
+            DATE(created_at), COALESCE(vehicle_type, ''), COALESCE(trip_type, ''), COUNT(trip_id),
+            COALESCE(SUM(total_amount), 0), COALESCE(SUM(fare), 0),
+            COALESCE(SUM(ROUND(COALESCE(fare, 0) * COALESCE((
+                SELECT t.driver_commission FROM vehicle_tariff_config t
+                WHERE LOWER(TRIM(t.vehicle_type)) = LOWER(TRIM(trips.vehicle_type))
+                  AND t.is_active = 1 AND t.is_deleted = 0
+                ORDER BY t.updated_at DESC, t.tariff_id
+                LIMIT 1
+            ), 10.00) / 100, 2)), 0),
+            COALESCE(SUM({extras}), 0), CURRENT_TIMESTAMP
+        FROM trips
+        WHERE trip_status = 'COMPLETED' AND is_deleted = 0 AND created_at IS NOT NULL
+        GROUP BY DATE(created_at), COALESCE(vehicle_type, ''), COALESCE(trip_type, '')
+    """))
+
+
+def downgrade() -> None:
+    op.drop_table("daily_revenue_rollup")
@@ -0,0 +1,28 @@
+"""Version stamps for per-worker caches (tariff cache invalidation)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.bulk_insert(table, [{"name": "tariffs", "version": 1}])
+
+
+def downgrade() -> None:
+    op.drop_table("cache_versions")
@@ -0,0 +1,33 @@
+"""Content-hash index of stored uploads (upload deduplication)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "uploaded_files",
+        sa.Column("url", sa.String(500), primary_key=True),
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column("storage_path", sa.String(500), nullable=True),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("stored_hash", sa.String(64), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_uploaded_files_content_hash", "uploaded_files", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_uploaded_files_content_hash", table_name="uploaded_files")
+    op.drop_table("uploaded_files")
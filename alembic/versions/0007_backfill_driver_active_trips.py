@@ -0,0 +1,34 @@
+"""Backfill driver_active_trips from trips
+
+Workers used to reconcile the table at every startup; it is filled once
+here instead (scripts/rebuild_active_trips.py repairs drift).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Frozen here (app.crud.crud_trip.rebuild_active_trips may change with the app)
+    op.execute(sa.text("DELETE FROM driver_active_trips"))
+    op.execute(sa.text("""
+        INSERT INTO driver_active_trips (trip_id, driver_id, trip_status, updated_at)
+        SELECT trip_id, assigned_driver_id, trip_status, CURRENT_TIMESTAMP
+        FROM trips
+        WHERE assigned_driver_id IS NOT NULL
+          AND trip_status IN ('ASSIGNED', 'STARTED')
+          AND is_deleted = 0
+    """))
+
+
+def downgrade() -> None:
+    pass
@@ -27,6 +27,16 @@ class Settings(BaseSettings):
     DB_USER: str = Field(..., env="DB_USER")
     DB_PASSWORD: str = Field(..., env="DB_PASSWORD")
     DB_NAME: str = Field(..., env="DB_NAME")
+
+    # Connection pools (per worker process; the sync and async engines each get one).
+    # Keep workers * (pool + overflow of both engines) below MySQL max_connections (151 by default)
+    DB_POOL_SIZE: int = Field(default=5, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=10.0, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(default=300, env="DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_ASYNC_POOL_SIZE: int = Field(default=5, env="DB_ASYNC_POOL_SIZE")
+    DB_ASYNC_MAX_OVERFLOW: int = Field(default=5, env="DB_ASYNC_MAX_OVERFLOW")
     
     # File Storage
     UPLOAD_DIR: str = Field(default="/root/chola_cabs_backend_dev/uploads", env="UPLOAD_DIR")
@@ -53,6 +63,51 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = Field(default=100, env="DEFAULT_PAGE_SIZE")
     MAX_PAGE_SIZE: int = Field(default=1000, env="MAX_PAGE_SIZE")
     
+    # Driver Location Index (in-memory nearest-driver lookups)
+    LOCATION_INDEX_CELL_DEG: float = Field(default=0.05, env="LOCATION_INDEX_CELL_DEG")
+    LOCATION_INDEX_REFRESH_SECONDS: int = Field(default=15, env="LOCATION_INDEX_REFRESH_SECONDS")
+    LOCATION_STALE_SECONDS: int = Field(default=600, env="LOCATION_STALE_SECONDS")
+    NEARBY_MAX_RADIUS_KM: float = Field(default=50.0, env="NEARBY_MAX_RADIUS_KM")
+
+    # Driver Status Stream (admin map push channel)
+    DRIVER_STREAM_TICK_SECONDS: float = Field(default=1.0, env="DRIVER_STREAM_TICK_SECONDS")
+    DRIVER_STREAM_HEARTBEAT_SECONDS: float = Field(default=15.0, env="DRIVER_STREAM_HEARTBEAT_SECONDS")
+
+    # Driver Location Write-Behind Buffer
+    LOCATION_FLUSH_INTERVAL_SECONDS: float = Field(default=2.0, env="LOCATION_FLUSH_INTERVAL_SECONDS")
+    LOCATION_BUFFER_MAX_PENDING: int = Field(default=50000, env="LOCATION_BUFFER_MAX_PENDING")
+    LOCATION_FLUSH_BATCH_SIZE: int = Field(default=500, env="LOCATION_FLUSH_BATCH_SIZE")
+
+    # Driver Location History (compact GPS trail per driver)
+    LOCATION_HISTORY_WINDOW_SECONDS: int = Field(default=1800, env="LOCATION_HISTORY_WINDOW_SECONDS")
+    LOCATION_HISTORY_FLUSH_SECONDS: float = Field(default=10.0, env="LOCATION_HISTORY_FLUSH_SECONDS")
+    LOCATION_HISTORY_MAX_PENDING_POINTS: int = Field(default=500000, env="LOCATION_HISTORY_MAX_PENDING_POINTS")
+
+    # GPS Distance Verification (cross-check of odometer distance at trip completion)
+    GPS_MAX_SPEED_KMH: float = Field(default=200.0, env="GPS_MAX_SPEED_KMH")
+    GPS_DISTANCE_MISMATCH_PERCENT: float = Field(default=15.0, env="GPS_DISTANCE_MISMATCH_PERCENT")
+    GPS_DISTANCE_MISMATCH_MIN_KM: float = Field(default=3.0, env="GPS_DISTANCE_MISMATCH_MIN_KM")
+
+    # Dashboard statistics (shared by /analytics/dashboard, /trips/statistics/dashboard and /api/v1/stats)
+    DASHBOARD_STATS_TTL_SECONDS: float = Field(default=10.0, env="DASHBOARD_STATS_TTL_SECONDS")
+
+    # Image pipeline (per app worker: processes that compress uploaded photos)
+    IMAGE_WORKERS: int = Field(default=2, env="IMAGE_WORKERS")
+    IMAGE_MAX_PENDING: int = Field(default=16, env="IMAGE_MAX_PENDING")
+    IMAGE_JOB_TIMEOUT_SECONDS: float = Field(default=30.0, env="IMAGE_JOB_TIMEOUT_SECONDS")
+    UPLOAD_MAX_BYTES: int = Field(default=20 * 1024 * 1024, env="UPLOAD_MAX_BYTES")  # per uploaded file
+
+    # Tariff cache (per worker; reloaded when the cache_versions stamp moves)
+    TARIFF_CACHE_CHECK_SECONDS: float = Field(default=5.0, env="TARIFF_CACHE_CHECK_SECONDS")
+
+    # SQL budget / N+1 detector (development and CI only - see app.core.query_budget)
+    QUERY_BUDGET_ENABLED: bool = Field(default=False, env="QUERY_BUDGET_ENABLED")
+    QUERY_BUDGET_MODE: str = Field(default="log", env="QUERY_BUDGET_MODE")  # "log" or "raise"
+    QUERY_BUDGET_DEFAULT: int = Field(default=20, env="QUERY_BUDGET_DEFAULT")
+    QUERY_BUDGET_REPEAT_THRESHOLD: int = Field(default=5, env="QUERY_BUDGET_REPEAT_THRESHOLD")
+    QUERY_BUDGET_ROUTES: dict = Field(default={}, env="QUERY_BUDGET_ROUTES")  # JSON: {"/api/v1/trips/": 3}
+    QUERY_BUDGET_REPORT_PATH: Optional[str] = Field(default=None, env="QUERY_BUDGET_REPORT_PATH")
+
     # FCM (Firebase Cloud Messaging)
     FCM_SERVER_KEY: Optional[str] = Field(default=None, env="FCM_SERVER_KEY")
     MAX_FCM_TOKENS_PER_DRIVER: int = Field(default=5, env="MAX_FCM_TOKENS_PER_DRIVER")
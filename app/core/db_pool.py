@@ -0,0 +1,133 @@
+"""
+Connection pool instrumentation
+Queue pools that time every checkout; gauges and wait histograms are exported at /metrics
+"""
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Checkout wait buckets in seconds; an idle pool hands out connections in microseconds
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Checkout counters of one pool class (survive engine.dispose(), which recreates the pool)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * len(WAIT_BUCKETS)
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.max_wait_seconds:
+                self.max_wait_seconds = seconds
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+
+class _TimedCheckoutMixin:
+    """Times Pool._do_get: the wait for an idle connection, an overflow connect, or a timeout"""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.observe_wait(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool of the sync (PyMySQL) engine"""
+    stats = PoolStats("sync")
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool of the async (aiomysql) engine"""
+    stats = PoolStats("async")
+
+
+def pool_status(pool: Pool) -> dict:
+    """Point-in-time gauges of a pool (zeros for pools without a queue, e.g. SQLite in tests)"""
+    if not isinstance(pool, QueuePool):
+        return {"size": 0, "checked_out": 0, "idle": 0, "overflow": 0}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def pool_summary(pool: Pool) -> dict:
+    """Gauges plus checkout counters, for /health"""
+    summary = pool_status(pool)
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        summary.update(
+            checkouts=stats.checkouts,
+            timeouts=stats.timeouts,
+            avg_wait_ms=round(stats.wait_seconds_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+            max_wait_ms=round(stats.max_wait_seconds * 1000, 3),
+        )
+    return summary
+
+
+def _metric(lines: List[str], name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{{{labels}}} {value}")
+
+
+def render_pool_metrics(pools: Dict[str, Pool]) -> str:
+    """Prometheus text exposition of the given pools, keyed by pool label"""
+    lines: List[str] = []
+    status = {name: pool_status(pool) for name, pool in pools.items()}
+    for key, kind, help_text in (
+        ("size", "gauge", "Configured number of persistent connections"),
+        ("checked_out", "gauge", "Connections currently in use"),
+        ("idle", "gauge", "Idle connections in the pool"),
+        ("overflow", "gauge", "Connections open beyond pool_size"),
+    ):
+        _metric(lines, f"db_pool_{key}", kind, help_text, [(f'pool="{name}"', s[key]) for name, s in status.items()])
+
+    timed = {name: pool.stats for name, pool in pools.items() if getattr(pool, "stats", None) is not None}
+    _metric(lines, "db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up after pool_timeout",
+            [(f'pool="{name}"', stats.timeouts) for name, stats in timed.items()])
+
+    name = "db_pool_checkout_wait_seconds"
+    lines.append(f"# HELP {name} Time spent waiting for a pooled connection")
+    lines.append(f"# TYPE {name} histogram")
+    for pool_name, stats in timed.items():
+        with stats._lock:
+            counts = list(stats.bucket_counts)
+            total, count = stats.wait_seconds_total, stats.checkouts
+        cumulative = 0
+        for bound, bucket in zip(WAIT_BUCKETS, counts):
+            cumulative += bucket
+            lines.append(f'{name}_bucket{{pool="{pool_name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{pool="{pool_name}",le="+Inf"}} {count}')
+        lines.append(f'{name}_sum{{pool="{pool_name}"}} {total}')
+        lines.append(f'{name}_count{{pool="{pool_name}"}} {count}')
+    return "\n".join(lines) + "\n"
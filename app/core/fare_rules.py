@@ -0,0 +1,111 @@
+"""
+Fare rules engine
+CRUDTrip.calculate_fare's minimum-KM rules vectorized over many trips, in
+integer paise so the results match the Decimal calculation exactly
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.constants import DEFAULT_DRIVER_COMMISSION_PERCENT
+
+DAY_US = 86_400_000_000
+ROUND_TRIP_TYPES = ("roundtrip", "roundtripway")
+_CENT = Decimal("0.01")
+
+
+def normalize_trip_type(trip_type: Optional[str]) -> str:
+    """"One Way", "one_way", "oneWay" -> "oneway" (likewise for round trips)"""
+    return (trip_type or "").strip().lower().replace("_", "").replace(" ", "")
+
+
+def is_round_trip(trip_type: Optional[str]) -> bool:
+    """Round trips use the per-day minimum; everything else uses the one-way rules"""
+    return normalize_trip_type(trip_type) in ROUND_TRIP_TYPES
+
+
+def to_paise(value) -> int:
+    """DECIMAL(10, 2) amount -> integer paise (None -> 0)"""
+    return int((Decimal(str(value)) * 100).to_integral_value()) if value is not None else 0
+
+
+def from_paise(paise) -> Decimal:
+    """Integer paise -> Decimal with two places, e.g. 360000 -> Decimal("3600.00")"""
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def commission_for(fare: Decimal, percent: float = DEFAULT_DRIVER_COMMISSION_PERCENT) -> Decimal:
+    """Platform commission on a fare, rounded half-up to the paisa like trip completion"""
+    return (fare * Decimal(str(percent)) / Decimal("100")).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def _datetimes(values: Sequence[Optional[datetime]]) -> np.ndarray:
+    return np.array(values, dtype="datetime64[us]")  # None -> NaT
+
+
+def trip_days_array(
+    started_at: Sequence[Optional[datetime]],
+    ended_at: Sequence[Optional[datetime]],
+    planned_start_at: Sequence[Optional[datetime]],
+    planned_end_at: Sequence[Optional[datetime]]
+) -> np.ndarray:
+    """
+    Billable days per trip: ceil(hours / 24), at least 1
+
+    The actual start/end is used when both are set, else the planned ones,
+    else the trip counts as one day.
+    """
+    start, end = _datetimes(started_at), _datetimes(ended_at)
+    planned_start, planned_end = _datetimes(planned_start_at), _datetimes(planned_end_at)
+    actual = ~np.isnat(start) & ~np.isnat(end)
+    planned = ~np.isnat(planned_start) & ~np.isnat(planned_end)
+    zero = np.timedelta64(0, "us")
+    span = np.where(actual, end - start, np.where(planned, planned_end - planned_start, zero))
+    span_us = np.where(actual | planned, span, zero).astype(np.int64)
+    return np.maximum(1, -(-span_us // DAY_US))
+
+
+@dataclass
+class FareArrays:
+    """Per-trip results of compute_fares, aligned with the input rows"""
+    fare_paise: np.ndarray
+    chargeable_km: np.ndarray
+    driver_allowance_paise: np.ndarray
+    trip_days: np.ndarray
+
+
+def compute_fares(
+    odo_start: np.ndarray,
+    odo_end: np.ndarray,
+    round_trip: np.ndarray,
+    trip_days: np.ndarray,
+    one_way_per_km_paise: np.ndarray,
+    round_trip_per_km_paise: np.ndarray,
+    one_way_min_km: np.ndarray,
+    round_trip_min_km: np.ndarray,
+    driver_allowance_paise: np.ndarray
+) -> FareArrays:
+    """
+    Fare and chargeable distance for many trips at once
+
+    Same rules as CRUDTrip.calculate_fare, with each trip's tariff columns
+    passed as aligned arrays:
+
+    - one way: chargeable = max(distance, one_way_min_km) at one_way_per_km
+    - round trip: chargeable = max(distance, round_trip_min_km * days) at round_trip_per_km
+    - driver allowance = tariff allowance * days
+    """
+    distance = np.asarray(odo_end, dtype=np.int64) - np.asarray(odo_start, dtype=np.int64)
+    round_trip = np.asarray(round_trip, dtype=bool)
+    min_km = np.where(round_trip, round_trip_min_km * trip_days, one_way_min_km)
+    chargeable = np.maximum(distance, min_km)
+    rate = np.where(round_trip, round_trip_per_km_paise, one_way_per_km_paise)
+    return FareArrays(
+        fare_paise=chargeable * rate,
+        chargeable_km=chargeable,
+        driver_allowance_paise=driver_allowance_paise * trip_days,
+        trip_days=trip_days,
+    )
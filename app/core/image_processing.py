@@ -1,7 +1,9 @@
 from PIL import Image
 from pillow_heif import register_heif_opener
 import io
+import math
 import os
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from fastapi import UploadFile
 import logging
 
@@ -10,55 +12,225 @@ register_heif_opener()
 
 logger = logging.getLogger(__name__)
 
-def compress_image(file: UploadFile, max_size_kb: int = 500, quality: int = 80, max_dimension: int = 1200) -> io.BytesIO:
+# Renditions stored beside each compressed upload as <name>_<rendition>.jpg: longest side in px
+RENDITIONS = {"small": 160, "medium": 480}
+RENDITION_QUALITY = 75
+
+# Predicting the JPEG quality that meets a size limit:
+# size(q) ~ size(q0) * (scale(q0) / scale(q)) ** k, with k fitted to the encodes so far
+JPEG_SIZE_EXPONENT = 0.55
+MAX_QUALITY_PROBES = 4
+
+
+def _jpeg_quant_scale(quality: int) -> float:
+    """libjpeg's quality -> quantization table scale (percent)"""
+    quality = min(max(quality, 1), 100)
+    return 5000.0 / quality if quality < 50 else 200.0 - 2 * quality
+
+
+def _predict_quality(
+    too_big: Tuple[int, int], fits: Optional[Tuple[int, int]], target: int, low: int, high: int
+) -> int:
+    """
+    Highest quality in [low, high] whose predicted size fits the target
+
+    `too_big` and `fits` are the (quality, size) encodes bracketing the
+    target so far; with both known the exponent is interpolated between them.
     """
-    Compresses an image to a target size in KB while maintaining aspect ratio.
+    q0, size0 = too_big
+    scale0 = _jpeg_quant_scale(q0)
+    exponent = JPEG_SIZE_EXPONENT
+    if fits is not None and fits[1] > 0:
+        ratio = _jpeg_quant_scale(fits[0]) / scale0
+        if ratio > 1.0 and fits[1] < size0:
+            exponent = math.log(size0 / fits[1]) / math.log(ratio)
+    for q in range(high, low - 1, -1):
+        if size0 * (scale0 / _jpeg_quant_scale(q)) ** exponent <= target:
+            return q
+    return low
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", optimize=True, quality=quality)
+    return buffer.getvalue()
+
+
+def _encode_to_size(img: Image.Image, target_bytes: int, quality: int, min_quality: int) -> Tuple[bytes, int]:
+    """
+    JPEG of `img` at the highest quality <= `quality` that fits `target_bytes`
+
+    One encode at `quality` covers most photos. Otherwise the quality is
+    predicted from the sizes measured so far and the bracket [min_quality,
+    quality) narrowed with at most MAX_QUALITY_PROBES more encodes. If nothing
+    fits, the min_quality encode is returned (like the old quality loop).
+    """
+    data = _encode_jpeg(img, quality)
+    if len(data) <= target_bytes or quality <= min_quality:
+        return data, quality
+
+    too_big, fits, best = (quality, len(data)), None, None
+    low, high = min_quality, quality - 1
+    for _ in range(MAX_QUALITY_PROBES):
+        probe = _predict_quality(too_big, fits, target_bytes, low, high)
+        data = _encode_jpeg(img, probe)
+        if len(data) <= target_bytes:
+            fits, best, low = (probe, len(data)), data, probe + 1
+        else:
+            too_big, high = (probe, len(data)), probe - 1
+        if low > high:
+            break
+
+    if best is None:
+        return (data if probe == min_quality else _encode_jpeg(img, min_quality)), min_quality
+    return best, fits[0]
+
+
+def _fit_size(width: int, height: int, max_dimension: int) -> Optional[Tuple[int, int]]:
+    """Size with the longest side at max_dimension, or None if the image already fits"""
+    if width <= max_dimension and height <= max_dimension:
+        return None
+    if width > height:
+        return max_dimension, max(1, int(height * (max_dimension / width)))
+    return max(1, int(width * (max_dimension / height))), max_dimension
+
+
+def _downscaled(img: Image.Image, max_dimension: int) -> Image.Image:
+    """`img` (not yet loaded) as RGB/L/CMYK with its longest side at most max_dimension"""
+    new_size = _fit_size(*img.size, max_dimension)
+    if new_size:
+        # Decode-time downscaling: 1/2, 1/4 or 1/8 scale, never below the target size (JPEG only)
+        img.draft("RGB", new_size)
+    
+    # Convert PNG/RGBA to RGB (JPEG doesn't support transparency; palette images resize badly)
+    if img.mode not in ("RGB", "L", "CMYK"):
+        img = img.convert("RGB")
+    
+    if new_size:
+        img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return img
+
+
+def compress_image_source(
+    source: Union[str, BinaryIO],
+    max_size_kb: int = 500,
+    quality: int = 80,
+    max_dimension: int = 1200,
+    min_quality: int = 30
+) -> bytes:
+    """
+    Compresses an image to a JPEG under a target size in KB while maintaining aspect ratio.
+    
+    The source is a path or a seekable file object; Pillow decodes from it directly, so the
+    encoded upload is never read into memory as a whole (except HEIC, which libheif needs in one piece).
+    JPEG sources are decoded at a reduced DCT scale (Image.draft) when they are at least twice
+    the target size, then LANCZOS-resized to the exact size; the quality is searched with
+    _encode_to_size instead of re-encoding in steps of 10.
     
     Args:
-        file: The uploaded file from FastAPI
+        source: The uploaded image (JPEG, PNG, HEIC, WebP) as a path or file object
         max_size_kb: Target maximum size in KB
-        quality: Initial JPEG quality
+        quality: Initial (highest) JPEG quality
         max_dimension: Maximum width or height of the image
+        min_quality: Lowest JPEG quality to go down to
         
     Returns:
-        io.BytesIO: Buffer containing the compressed image data
+        bytes: The compressed JPEG
     """
-    # Read image data
-    image_data = file.file.read()
-    img = Image.open(io.BytesIO(image_data))
-    
-    # Reset file pointer for potential future reads (standard practice)
-    file.file.seek(0)
-    
-    # Convert PNG/RGBA to RGB (JPEG doesn't support transparency)
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
+    img = Image.open(source)
     
     # 1. Resize if image is too large
     width, height = img.size
-    if width > max_dimension or height > max_dimension:
-        if width > height:
-            new_width = max_dimension
-            new_height = int(height * (max_dimension / width))
-        else:
-            new_height = max_dimension
-            new_width = int(width * (max_dimension / height))
-        
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        logger.info(f"Resized image from {width}x{height} to {new_width}x{new_height}")
+    img = _downscaled(img, max_dimension)
+    if img.size != (width, height):
+        logger.info(f"Resized image from {width}x{height} to {img.size[0]}x{img.size[1]}")
+
+    # 2. Encode at the highest quality that fits the size limit
+    data, final_quality = _encode_to_size(img, max_size_kb * 1024, quality, min_quality)
+    if final_quality != quality:
+        logger.info(f"Reduced quality to {final_quality} to meet size limit of {max_size_kb}KB")
+    return data
+
+
+def compress_image_bytes(image_data: bytes, max_size_kb: int = 500, quality: int = 80, max_dimension: int = 1200) -> bytes:
+    """Compresses encoded image bytes (see compress_image_source)"""
+    return compress_image_source(io.BytesIO(image_data), max_size_kb=max_size_kb, quality=quality, max_dimension=max_dimension)
+
+
+def compress_image_file(src_path: str, dest_path: str, max_size_kb: int = 500, quality: int = 80, max_dimension: int = 1200) -> int:
+    """
+    Compresses the image at `src_path` into a JPEG at `dest_path`; returns the bytes written.
+    
+    Only paths go in and a size comes out, so a worker process (see app.services.image_pipeline)
+    neither receives the upload nor sends the JPEG back through a pipe.
+    """
+    data = compress_image_source(src_path, max_size_kb=max_size_kb, quality=quality, max_dimension=max_dimension)
+    with open(dest_path, "wb") as output:
+        output.write(data)
+    return len(data)
+
+
+def rendition_path(path: str, rendition: str) -> str:
+    """Path or URL of a rendition stored beside an image: .../driver_1_photo.jpg -> .../driver_1_photo_small.jpg"""
+    return f"{os.path.splitext(path)[0]}_{rendition}.jpg"
+
+
+def rendition_urls(url: str) -> Dict[str, str]:
+    """URLs of the renditions of a stored image ({} for PDFs)"""
+    if not url or not url.lower().endswith(".jpg"):
+        return {}
+    return {rendition: rendition_path(url, rendition) for rendition in RENDITIONS}
+
 
-    # 2. Compress and optimize
-    output_buffer = io.BytesIO()
+def make_renditions_bytes(source: Union[str, BinaryIO]) -> Dict[str, bytes]:
+    """
+    JPEG renditions (see RENDITIONS) of a stored image, largest first.
+    
+    The source is decoded once at the scale of the largest rendition; each smaller
+    rendition is resized from the previous one.
+    """
+    img = Image.open(source)
+    renditions = {}
+    for rendition, max_dimension in sorted(RENDITIONS.items(), key=lambda item: -item[1]):
+        img = _downscaled(img, max_dimension)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", optimize=True, quality=RENDITION_QUALITY)
+        renditions[rendition] = buffer.getvalue()
+    return renditions
+
+
+def make_renditions_file(src_path: str) -> List[str]:
+    """
+    Writes the renditions of the image at `src_path` beside it; returns their paths.
+    
+    Each one is written to a hidden temp file and renamed into place, so a rendition URL
+    never serves a partial file.
+    """
+    folder = os.path.dirname(src_path)
+    paths = []
+    for rendition, data in make_renditions_bytes(src_path).items():
+        path = rendition_path(src_path, rendition)
+        tmp_path = os.path.join(folder, f".{os.path.basename(path)}.part")
+        with open(tmp_path, "wb") as output:
+            output.write(data)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def compress_image(file: UploadFile, max_size_kb: int = 500, quality: int = 80, max_dimension: int = 1200) -> io.BytesIO:
+    """
+    Compresses an uploaded image in the calling thread (see compress_image_bytes).
     
-    # Save with initial quality
-    img.save(output_buffer, format="JPEG", optimize=True, quality=quality)
+    Returns:
+        io.BytesIO: Buffer containing the compressed image data
+    """
+    # Decode straight from the spooled upload instead of reading it into memory
+    file.file.seek(0)
+    try:
+        data = compress_image_source(file.file, max_size_kb=max_size_kb, quality=quality, max_dimension=max_dimension)
+    finally:
+        # Reset file pointer for potential future reads (standard practice)
+        file.file.seek(0)
     
-    # 3. If still too large, reduce quality incrementally (up to a limit)
-    while output_buffer.tell() > max_size_kb * 1024 and quality > 30:
-        quality -= 10
-        output_buffer = io.BytesIO()
-        img.save(output_buffer, format="JPEG", optimize=True, quality=quality)
-        logger.info(f"Reducing quality to {quality} to meet size limit of {max_size_kb}KB")
-
-    output_buffer.seek(0)
-    return output_buffer
+    return io.BytesIO(data)
@@ -0,0 +1,208 @@
+"""
+Request metrics
+Per-route request counts, latency/size histograms and DB usage, exported at /metrics
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Bucket upper bounds; p50/p95/p99 come from histogram_quantile() on the Prometheus side
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# [query count, seconds] of the current request; set by the middleware, filled by engine events
+_db_usage: ContextVar[Optional[list]] = ContextVar("db_usage", default=None)
+
+
+class _Histogram:
+    """Fixed-bucket histogram; counts are per bucket and made cumulative when rendered"""
+
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+
+class _RouteStats:
+    __slots__ = ("statuses", "errors", "latency", "size", "db_queries", "db_time")
+
+    def __init__(self):
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.size = _Histogram(SIZE_BUCKETS)
+        self.db_queries = _Histogram(DB_QUERY_BUCKETS)
+        self.db_time = _Histogram(DB_TIME_BUCKETS)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """
+    In-process registry of per-route request metrics
+
+    Keyed by (method, route template) - `/api/v1/trips/{trip_id}` rather than
+    the raw path - so label cardinality stays bounded. Requests are recorded
+    on the event loop thread only, so no locking is needed on the hot path.
+    Metrics are per worker process; Prometheus sums them across workers.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+        self._engines: List[Engine] = []
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        response_bytes: int,
+        db_queries: int = 0,
+        db_seconds: float = 0.0
+    ) -> None:
+        """Record one finished request"""
+        stats = self._routes.get((method, route))
+        if stats is None:
+            stats = self._routes[(method, route)] = _RouteStats()
+        status_class = f"{status_code // 100}xx"
+        stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+        if status_code >= 500:
+            stats.errors += 1
+        stats.latency.observe(seconds)
+        stats.size.observe(response_bytes)
+        stats.db_queries.observe(db_queries)
+        stats.db_time.observe(db_seconds)
+
+    def instrument_engine(self, engine: Engine) -> None:
+        """Count queries and DB time of `engine` towards the request that runs them"""
+        if engine in self._engines:
+            return
+        self._engines.append(engine)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if _db_usage.get() is not None:
+                conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            usage = _db_usage.get()
+            starts = conn.info.get("metrics_query_start")
+            if usage is not None and starts:
+                usage[0] += 1
+                usage[1] += time.perf_counter() - starts.pop()
+
+        @event.listens_for(engine, "handle_error")
+        def _error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("metrics_query_start"):
+                connection.info["metrics_query_start"].pop()
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition of all routes"""
+        lines: List[str] = []
+        routes = sorted(self._routes.items())
+
+        lines.append("# HELP http_requests_total Requests by route template and status class")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route), stats in routes:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for status_class, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status_class}"}} {count}')
+
+        lines.append("# HELP http_request_errors_total Requests answered with a 5xx status")
+        lines.append("# TYPE http_request_errors_total counter")
+        for (method, route), stats in routes:
+            lines.append(f'http_request_errors_total{{method="{method}",route="{_escape(route)}"}} {stats.errors}')
+
+        for name, attr, help_text in (
+            ("http_request_duration_seconds", "latency", "Request latency"),
+            ("http_response_size_bytes", "size", "Response body size"),
+            ("http_request_db_queries", "db_queries", "SQL statements executed per request"),
+            ("http_request_db_seconds", "db_time", "Time spent in SQL statements per request"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                histogram: _Histogram = getattr(stats, attr)
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += histogram.counts[-1]
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+                lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding RequestMetrics
+
+    Avoids BaseHTTPMiddleware (which re-wraps every response body) and does
+    no work per request beyond two clock reads, a ContextVar set/reset and a
+    few dict and bisect updates - a few microseconds on CPython.
+    """
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        response = [500, 0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _db_usage.reset(token)
+            # Routing stores the matched APIRoute in the (shared) scope
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                response[0],
+                time.perf_counter() - start,
+                response[1],
+                usage[0],
+                usage[1]
+            )
+
+
+# Singleton instance
+request_metrics = RequestMetrics()
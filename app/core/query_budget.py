@@ -0,0 +1,237 @@
+"""
+Per-request SQL budget and N+1 detector (opt-in, for development and CI)
+Counts and fingerprints every statement of a request via engine events
+"""
+import json
+import re
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(\(\?\+?\))(?:\s*,\s*\(\?\+?\))+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so repeats of the same query share one key
+
+    Literals and bound parameters become `?`, expanded IN lists become
+    `(?+)` and whitespace is collapsed, so `crud_driver.get` for 50
+    different ids is one fingerprint executed 50 times.
+    """
+    text = _WHITESPACE.sub(" ", statement.strip())
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(?+)", text)
+    text = _VALUES_LIST.sub(r"\1", text)
+    return text
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised (in "raise" mode) by the statement that breaks a request's budget"""
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Override the default budget of one endpoint
+
+        @router.get("/")
+        @query_budget(3)
+        def list_things(...): ...
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+class _RequestQueries:
+    """Statements of one request"""
+
+    __slots__ = ("scope", "count", "fingerprints", "samples", "violations")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.count = 0
+        self.fingerprints: Counter = Counter()
+        self.samples: Dict[str, str] = {}
+        self.violations: List[str] = []
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class QueryBudget:
+    """
+    Opt-in SQL budget per request
+
+    Every request gets a statement budget (the default, a route override
+    from settings, or `@query_budget(n)` on the endpoint). A request is in
+    violation when it runs more statements than its budget or repeats one
+    fingerprint `repeat_threshold` times or more - the N+1 signature. In
+    "log" mode violations are logged when the request ends; in "raise" mode
+    the offending statement raises QueryBudgetExceeded, so tests fail.
+
+    `report()` aggregates all requests per route for a summary that CI can
+    print or store (see scripts/check_query_budget.py).
+    """
+
+    def __init__(
+        self,
+        default_budget: int = 20,
+        repeat_threshold: int = 5,
+        mode: str = "log",
+        route_budgets: Optional[Dict[str, int]] = None
+    ):
+        if mode not in ("log", "raise"):
+            raise ValueError("mode must be 'log' or 'raise'")
+        self.default_budget = default_budget
+        self.repeat_threshold = repeat_threshold
+        self.mode = mode
+        self.route_budgets = dict(route_budgets or {})
+        self._current: ContextVar[Optional[_RequestQueries]] = ContextVar("query_budget_request", default=None)
+        self._routes: Dict[str, dict] = {}
+        self._engines: List[Engine] = []
+
+    def budget_for(self, scope: dict) -> int:
+        endpoint = scope.get("endpoint")
+        if endpoint is not None and hasattr(endpoint, "__query_budget__"):
+            return endpoint.__query_budget__
+        route = getattr(scope.get("route"), "path", None)
+        return self.route_budgets.get(route, self.default_budget)
+
+    def instrument_engine(self, engine: Engine) -> None:
+        """Attach the statement counter to `engine`"""
+        if engine in self._engines:
+            return
+        self._engines.append(engine)
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        tracker = self._current.get()
+        if tracker is None:
+            return
+        key = fingerprint(statement)
+        tracker.count += 1
+        tracker.fingerprints[key] += 1
+        tracker.samples.setdefault(key, statement)
+        if self.mode == "raise":
+            budget = self.budget_for(tracker.scope)
+            if tracker.count > budget:
+                raise QueryBudgetExceeded(f"{tracker.route}: statement {tracker.count} exceeds the budget of {budget}")
+            if tracker.fingerprints[key] >= self.repeat_threshold:
+                raise QueryBudgetExceeded(
+                    f"{tracker.route}: same statement run {tracker.fingerprints[key]} times (N+1?): {key[:200]}"
+                )
+
+    def start(self, scope: dict):
+        """Begin tracking a request; returns a token for finish()"""
+        return self._current.set(_RequestQueries(scope))
+
+    def finish(self, token, method: str) -> None:
+        """Evaluate the request, log violations and fold it into the report"""
+        tracker = self._current.get()
+        self._current.reset(token)
+        if tracker is None:
+            return
+
+        budget = self.budget_for(tracker.scope)
+        repeated = {key: n for key, n in tracker.fingerprints.items() if n >= self.repeat_threshold}
+        if tracker.count > budget:
+            tracker.violations.append(f"{tracker.count} statements (budget {budget})")
+        for key, n in repeated.items():
+            tracker.violations.append(f"{n}x {key[:200]}")
+
+        name = f"{method} {tracker.route}"
+        entry = self._routes.setdefault(name, {
+            "requests": 0, "statements": 0, "max_statements": 0,
+            "budget": budget, "violations": 0, "repeated": {},
+        })
+        entry["requests"] += 1
+        entry["statements"] += tracker.count
+        entry["max_statements"] = max(entry["max_statements"], tracker.count)
+        entry["budget"] = budget
+        for key, n in repeated.items():
+            item = entry["repeated"].setdefault(key, {"max_per_request": 0, "sample": tracker.samples[key]})
+            item["max_per_request"] = max(item["max_per_request"], n)
+        if tracker.violations:
+            entry["violations"] += 1
+            logger.warning(f"Query budget exceeded on {name}: " + "; ".join(tracker.violations))
+
+    def report(self) -> dict:
+        """Per-route summary: requests, statements, worst request and repeated fingerprints"""
+        return {
+            "default_budget": self.default_budget,
+            "repeat_threshold": self.repeat_threshold,
+            "routes": {name: dict(entry) for name, entry in sorted(self._routes.items())},
+            "violating_routes": sorted(name for name, entry in self._routes.items() if entry["violations"]),
+        }
+
+    def format_report(self) -> str:
+        """Human readable report, worst routes first"""
+        report = self.report()
+        lines = [f"{'route':60} {'reqs':>5} {'avg':>6} {'max':>5} {'budget':>6}  violations"]
+        rows = sorted(report["routes"].items(), key=lambda item: -item[1]["max_statements"])
+        for name, entry in rows:
+            avg = entry["statements"] / entry["requests"] if entry["requests"] else 0.0
+            lines.append(
+                f"{name[:60]:60} {entry['requests']:>5} {avg:>6.1f} {entry['max_statements']:>5} "
+                f"{entry['budget']:>6}  {entry['violations']}"
+            )
+            for key, item in entry["repeated"].items():
+                lines.append(f"    {item['max_per_request']}x per request: {key[:150]}")
+        return "\n".join(lines)
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware that opens and closes the per-request tracker"""
+
+    def __init__(self, app, budget: Optional[QueryBudget] = None):
+        self.app = app
+        self.budget = budget or query_budget_tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = self.budget.start(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.budget.finish(token, scope["method"])
+
+
+# Singleton instance (only wired into the app when QUERY_BUDGET_ENABLED is set)
+query_budget_tracker = QueryBudget(
+    default_budget=settings.QUERY_BUDGET_DEFAULT,
+    repeat_threshold=settings.QUERY_BUDGET_REPEAT_THRESHOLD,
+    mode=settings.QUERY_BUDGET_MODE,
+    route_budgets=settings.QUERY_BUDGET_ROUTES
+)
@@ -0,0 +1,188 @@
+"""
+Response serializers
+Precompiled encoders that turn ORM objects and projection rows into
+orjson-ready values for the hot response shapes
+"""
+from dataclasses import field, make_dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Type, Union
+
+from app.models import Driver, PaymentTransaction, Trip, Vehicle, WalletTransaction
+
+FieldSpec = Union[str, Tuple[str, Callable[[Any], Any]]]
+
+
+def float_or_none(value: Any) -> Optional[float]:
+    """DECIMAL column -> float, None (and 0) -> None"""
+    return float(value) if value else None
+
+
+def float_or_zero(value: Any) -> float:
+    """DECIMAL column -> float, None -> 0.0"""
+    return float(value) if value else 0.0
+
+
+def decimal_str(value: Any) -> Optional[str]:
+    """DECIMAL column -> "100.00", the way Pydantic response models render Decimal"""
+    return None if value is None else str(value)
+
+
+class RecordEncoder:
+    """
+    One response shape, compiled once at import time
+
+    Fields are attribute names, or `(name, converter)` for values orjson
+    cannot or should not emit as-is (DECIMAL, BigInteger phone numbers).
+    Datetimes and dates are left to orjson, which writes the same ISO 8601
+    text as `.isoformat()`. `computed` names are extra fields the caller
+    fills in (default None).
+
+    - `encode(obj)` / `encode_many(objs)`: ORM object -> dict, via a
+      generated function with one dict literal - no per-field loop,
+      getattr or isoformat calls
+    - `records(rows)`: projection rows (see CRUDBase.get_multi_projected)
+      -> `__slots__` dataclass records, which orjson serializes natively
+
+    Return either through `ORJSONResponse(...)` so FastAPI skips
+    jsonable_encoder and response_model validation; keep `response_model`
+    on the route for the OpenAPI schema.
+    """
+
+    def __init__(self, model: Type[Any], fields: Sequence[FieldSpec], computed: Sequence[str] = ()):
+        self.model = model
+        names = []
+        converters = {}
+        for spec in fields:
+            name, converter = spec if isinstance(spec, tuple) else (spec, None)
+            if not name.isidentifier() or not hasattr(model, name):
+                raise ValueError(f"{model.__name__} has no column {name}")
+            names.append(name)
+            if converter is not None:
+                converters[name] = converter
+        self.fields = tuple(names)
+        self.names = self.fields + tuple(computed)
+        self.columns = [getattr(model, name) for name in names]
+        self.record = make_dataclass(
+            f"{model.__name__}Record",
+            names + [(name, Any, field(default=None)) for name in computed],
+            slots=True
+        )
+
+        namespace = {"_record": self.record}
+        obj_values, row_values = [], []
+        for index, name in enumerate(names):
+            if name in converters:
+                namespace[f"_c_{name}"] = converters[name]
+                obj_values.append(f"{name!r}: _c_{name}(obj.{name})")
+                row_values.append(f"_c_{name}(row[{index}])")
+            else:
+                obj_values.append(f"{name!r}: obj.{name}")
+                row_values.append(f"row[{index}]")
+        source = (
+            "def encode(obj):\n"
+            f"    return {{{', '.join(obj_values)}}}\n"
+            "def from_row(row):\n"
+            f"    return _record({', '.join(row_values)})\n"
+        )
+        exec(compile(source, f"<{model.__name__}Record encoder>", "exec"), namespace)
+        self.encode: Callable[[Any], dict] = namespace["encode"]
+        self._from_row = namespace["from_row"]
+
+    def encode_many(self, objs: Sequence[Any]) -> List[dict]:
+        encode = self.encode
+        return [encode(obj) for obj in objs]
+
+    def records(self, rows: Sequence[Any]) -> List[Any]:
+        """Build records from rows whose leading columns are self.columns"""
+        from_row = self._from_row
+        return [from_row(row) for row in rows]
+
+
+_TRIP_AMOUNTS = [
+    ("waiting_charges", float_or_zero),
+    ("inter_state_permit_charges", float_or_zero),
+    ("driver_allowance", float_or_zero),
+    ("luggage_cost", float_or_zero),
+    ("pet_cost", float_or_zero),
+    ("toll_charges", float_or_zero),
+    ("night_allowance", float_or_zero),
+    ("total_amount", float_or_zero),
+]
+_TRIP_TAIL = [
+    "odo_start", "odo_end", "odo_start_url", "odo_end_url",
+    "started_at", "ended_at", "planned_start_at", "planned_end_at",
+    "is_manual_assignment", "passenger_count", "errors", "created_at", "updated_at",
+]
+_TRIP_HEAD = [
+    "trip_id", "customer_name", "customer_phone", "pickup_address", "drop_address",
+    "trip_type", "vehicle_type", "trip_status", "assigned_driver_id",
+]
+
+# GET /trips/ and /trips/{trip_id} (amounts as floats)
+TRIP_ENCODER = RecordEncoder(
+    Trip,
+    _TRIP_HEAD + [("distance_km", float_or_none), ("fare", float_or_none)] + _TRIP_AMOUNTS + _TRIP_TAIL
+)
+
+# GET /trips/driver/{driver_id}
+TRIP_SUMMARY_ENCODER = RecordEncoder(Trip, [
+    "trip_id", "customer_name", "pickup_address", "drop_address", "trip_status",
+    ("fare", float_or_none), "created_at",
+])
+
+# GET /trips/available (TripResponse: amounts as decimal strings)
+TRIP_RESPONSE_ENCODER = RecordEncoder(Trip, [
+    "customer_name", "customer_phone", "pickup_address", "drop_address", "trip_type", "vehicle_type",
+    "passenger_count", "planned_start_at", "planned_end_at",
+    "trip_id", "assigned_driver_id", "trip_status", ("distance_km", decimal_str),
+    "odo_start", "odo_end", "odo_start_url", "odo_end_url", ("fare", decimal_str),
+    "started_at", "ended_at", "is_manual_assignment",
+    ("waiting_charges", decimal_str),
+    ("inter_state_permit_charges", decimal_str),
+    ("driver_allowance", decimal_str),
+    ("luggage_cost", decimal_str),
+    ("pet_cost", decimal_str),
+    ("toll_charges", decimal_str),
+    ("night_allowance", decimal_str),
+    ("total_amount", decimal_str),
+    "errors", "created_at", "updated_at",
+])
+
+# Upload URL fields whose images have small/medium renditions (app.routers.uploads.image_renditions)
+DRIVER_IMAGE_FIELDS = ("photo_url", "aadhar_url", "licence_url", "police_verification_url")
+VEHICLE_IMAGE_FIELDS = (
+    "rc_book_url", "fc_certificate_url", "vehicle_front_url", "vehicle_back_url",
+    "vehicle_left_url", "vehicle_right_url", "vehicle_inside_url",
+)
+
+# GET /drivers/ and /drivers/{driver_id}; current_status comes from driver_active_trips,
+# renditions from the upload folder
+DRIVER_ENCODER = RecordEncoder(Driver, [
+    "driver_id", "name",
+    ("phone_number", str),
+    "email", "kyc_verified", "primary_location", "photo_url", "aadhar_url", "licence_url",
+    "licence_number", "aadhar_number", "licence_expiry",
+    ("wallet_balance", float_or_zero),
+    "device_id", "fcm_tokens", "is_available", "is_approved", "errors",
+    "created_at", "updated_at", "police_verification_url",
+], computed=["current_status", "renditions"])
+
+# VehicleResponse (the routes add "renditions")
+VEHICLE_ENCODER = RecordEncoder(Vehicle, [
+    "vehicle_id", "driver_id", "vehicle_type", "vehicle_brand", "vehicle_model", "vehicle_number",
+    "vehicle_color", "seating_capacity", "rc_expiry_date", "fc_expiry_date",
+    "rc_book_url", "fc_certificate_url", "vehicle_front_url", "vehicle_back_url",
+    "vehicle_left_url", "vehicle_right_url", "vehicle_inside_url",
+    "vehicle_approved", "errors", "created_at", "updated_at",
+])
+
+# PaymentTransactionResponse
+PAYMENT_ENCODER = RecordEncoder(PaymentTransaction, [
+    "payment_id", "driver_id", ("amount", decimal_str), "transaction_type", "status", "transaction_id",
+    "razorpay_payment_id", "razorpay_order_id", "razorpay_signature", "errors", "created_at",
+])
+
+# WalletTransactionResponse
+WALLET_TRANSACTION_ENCODER = RecordEncoder(WalletTransaction, [
+    "wallet_id", "driver_id", "transaction_type", ("amount", decimal_str), "reason",
+    "trip_id", "payment_id", "created_at",
+])
@@ -0,0 +1,80 @@
+"""
+Request size limit for multipart uploads
+Rejects oversized uploads from Content-Length up front, or as soon as the
+streamed body passes the limit, instead of spooling them to disk first
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+# Room for the multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def upload_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(413, f"File too large (max {max_bytes // (1024 * 1024)} MB)")
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI middleware capping multipart/form-data request bodies
+
+    - A Content-Length above the limit is answered with 413 before any of
+      the body is read.
+    - Chunked bodies are counted as they stream in; the chunk that crosses
+      the limit raises a 413 HTTPException from `receive`, which FastAPI's
+      form parsing re-raises, so Starlette never spools the rest.
+
+    The limit is `max_bytes` plus MULTIPART_OVERHEAD_BYTES; the exact size of
+    each file is checked again where it is saved (app.routers.uploads).
+    """
+
+    def __init__(self, app, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+        self.max_body = self.max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > self.max_body:
+            error = upload_too_large(self.max_bytes)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    raise upload_too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+    @staticmethod
+    def _is_multipart(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                return value.lower().startswith(b"multipart/form-data")
+        return False
+
+    @staticmethod
+    def _content_length(scope) -> Optional[int]:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
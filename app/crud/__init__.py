@@ -3,16 +3,21 @@ CRUD operations for all models
 Centralized database access layer with optimizations
 """
 from app.crud.base import CRUDBase
-from app.crud.crud_driver import crud_driver
-from app.crud.crud_vehicle import crud_vehicle
-from app.crud.crud_trip import crud_trip
+from app.crud.async_base import AsyncCRUDBase
+from app.crud.crud_driver import crud_driver, async_crud_driver
+from app.crud.crud_vehicle import crud_vehicle, async_crud_vehicle
+from app.crud.crud_trip import crud_trip, async_crud_trip
 from app.crud.crud_payment import crud_payment
 from app.crud.crud_wallet import crud_wallet
 from app.crud.crud_admin import crud_admin
 from app.crud.crud_tariff import crud_tariff
+from app.crud.crud_location import crud_driver_location, crud_driver_location_history, async_crud_driver_location
+from app.crud.crud_revenue import crud_revenue_rollup
+from app.crud.crud_upload import crud_uploaded_file, async_crud_uploaded_file
 
 __all__ = [
     "CRUDBase",
+    "AsyncCRUDBase",
     "crud_driver",
     "crud_vehicle",
     "crud_trip",
@@ -20,4 +25,13 @@ __all__ = [
     "crud_wallet",
     "crud_admin",
     "crud_tariff",
+    "crud_driver_location",
+    "crud_driver_location_history",
+    "crud_revenue_rollup",
+    "crud_uploaded_file",
+    "async_crud_driver",
+    "async_crud_vehicle",
+    "async_crud_trip",
+    "async_crud_driver_location",
+    "async_crud_uploaded_file",
 ]
@@ -0,0 +1,286 @@
+"""
+Async CRUD class with generic database operations
+AsyncSession counterpart of CRUDBase for `async def` endpoints (aiomysql)
+"""
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Tuple, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import Select
+
+from app.core.serializers import RecordEncoder
+from app.crud.base import CRUDBase, CreateSchemaType, ModelType, UpdateSchemaType
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Async CRUD operations built on the sync CRUD object of the same model
+
+    Features:
+    - Same method names and arguments as CRUDBase, awaited
+    - Reuses the sync object's soft-delete filter, keyset pagination and
+      `_before_commit` hook, so both layers return the same rows
+    - Anything not ported yet runs on the same connection with
+      `await db.run_sync(crud_x.method, ...)`
+
+    Objects are returned with relationships unloaded unless eager loaded;
+    lazy loading is not available on an AsyncSession.
+    """
+
+    def __init__(self, crud: CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]):
+        """
+        Initialize async CRUD object from its sync counterpart
+
+        Args:
+            crud: Sync CRUD object of the model
+        """
+        self.crud = crud
+        self.model = crud.model
+
+    @property
+    def _pk_column(self):
+        return inspect(self.model).primary_key[0]
+
+    def _select(self, eager_load: Optional[List[str]] = None) -> Select:
+        stmt = self.crud._apply_soft_delete_filter(select(self.model))
+        for relationship in eager_load or ():
+            if hasattr(self.model, relationship):
+                stmt = stmt.options(joinedload(getattr(self.model, relationship)))
+        return stmt
+
+    def _apply_filters(self, stmt: Select, filters: Optional[Dict[str, Any]]) -> Select:
+        for column, value in (filters or {}).items():
+            if hasattr(self.model, column):
+                stmt = stmt.filter(getattr(self.model, column) == value)
+        return stmt
+
+    async def _all(self, db: AsyncSession, stmt: Select) -> List[Any]:
+        result = await db.execute(stmt)
+        return list(result.unique().scalars().all())
+
+    async def get(
+        self,
+        db: AsyncSession,
+        id: Any,
+        eager_load: Optional[List[str]] = None
+    ) -> Optional[ModelType]:
+        """
+        Get a single record by ID with optional eager loading
+
+        Args:
+            db: Async database session
+            id: Primary key value
+            eager_load: List of relationship names to eager load
+
+        Returns:
+            Model instance or None
+        """
+        rows = await self._all(db, self._select(eager_load).filter(self._pk_column == id).limit(1))
+        return rows[0] if rows else None
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        eager_load: Optional[List[str]] = None,
+        order_by: Optional[str] = None
+    ) -> List[ModelType]:
+        """
+        Get multiple records with pagination, filtering, and eager loading
+
+        Args:
+            db: Async database session
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            filters: Dictionary of column:value filters
+            eager_load: List of relationship names to eager load
+            order_by: Column name to order by (prefix with - for descending)
+
+        Returns:
+            List of model instances
+        """
+        stmt = self._apply_filters(self._select(eager_load), filters)
+        if order_by and hasattr(self.model, order_by.lstrip('-')):
+            column, descending = self.crud._resolve_order(order_by)
+            stmt = stmt.order_by(column.desc() if descending else column)
+        return await self._all(db, stmt.offset(skip).limit(limit))
+
+    async def paginate(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "-created_at"
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Keyset (cursor) pagination of a select() - see CRUDBase.paginate
+
+        Raises:
+            ValueError: If the cursor is invalid for this ordering
+        """
+        stmt = self.crud._keyset_query(stmt, cursor=cursor, limit=limit, order_by=order_by)
+        rows = await self._all(db, stmt)
+        return self.crud._keyset_result(rows, limit=limit, order_by=order_by)
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: str = "-created_at"
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Cursor-paginated counterpart of get_multi
+
+        Returns:
+            Tuple of (records, next_cursor)
+        """
+        stmt = self._apply_filters(self._select(), filters)
+        return await self.paginate(db, stmt, cursor=cursor, limit=limit, order_by=order_by)
+
+    async def get_multi_projected(
+        self,
+        db: AsyncSession,
+        encoder: RecordEncoder,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None
+    ) -> List[Any]:
+        """
+        get_multi reading only the encoder's columns - see CRUDBase.get_multi_projected
+
+        Returns:
+            List of records
+        """
+        stmt = self.crud._projection_select(encoder, filters)
+        if order_by:
+            column, descending = self.crud._resolve_order(order_by)
+            stmt = stmt.order_by(column.desc() if descending else column)
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return encoder.records(result.all())
+
+    async def get_page_projected(
+        self,
+        db: AsyncSession,
+        encoder: RecordEncoder,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: str = "-created_at"
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        get_page reading only the encoder's columns, returned as its records
+
+        Returns:
+            Tuple of (records, next_cursor)
+        """
+        stmt = self.crud._projection_select(encoder, filters, order_by)
+        result = await db.execute(self.crud._keyset_query(stmt, cursor=cursor, limit=limit, order_by=order_by))
+        rows, next_cursor = self.crud._keyset_result(result.all(), limit=limit, order_by=order_by)
+        return encoder.records(rows), next_cursor
+
+    async def get_count(
+        self,
+        db: AsyncSession,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Get count of records with optional filtering
+
+        Returns:
+            Count of records
+        """
+        stmt = self.crud._apply_soft_delete_filter(select(func.count()).select_from(self.model))
+        return (await db.execute(self._apply_filters(stmt, filters))).scalar_one()
+
+    async def exists(self, db: AsyncSession, id: Any) -> bool:
+        """
+        Check if a record exists by ID
+
+        Returns:
+            True if exists, False otherwise
+        """
+        stmt = self.crud._apply_soft_delete_filter(select(self._pk_column)).filter(self._pk_column == id)
+        return (await db.execute(stmt.limit(1))).first() is not None
+
+    async def _commit(self, db: AsyncSession, db_obj: ModelType) -> None:
+        # _before_commit hooks use the sync Session API
+        await db.run_sync(self.crud._before_commit, db_obj)
+        await db.commit()
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """
+        Create a new record
+
+        Returns:
+            Created model instance
+        """
+        db_obj = self.model(**jsonable_encoder(obj_in))
+        db.add(db_obj)
+        await self._commit(db, db_obj)
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        Update an existing record
+
+        Args:
+            db: Async database session
+            db_obj: Existing model instance
+            obj_in: Pydantic schema or dict with update data
+
+        Returns:
+            Updated model instance
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        columns = {attr.key for attr in inspect(self.model).column_attrs}
+        for field, value in update_data.items():
+            if field in columns:
+                setattr(db_obj, field, value)
+
+        db.add(db_obj)
+        await self._commit(db, db_obj)
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
+        """
+        Delete a record by ID (soft delete when the model supports it)
+
+        Returns:
+            Deleted model instance or None
+        """
+        obj = await self.get(db, id=id)
+        if obj:
+            if hasattr(obj, "is_deleted"):
+                obj.is_deleted = True
+                if hasattr(obj, "deleted_at"):
+                    obj.deleted_at = datetime.utcnow()
+                db.add(obj)
+            else:
+                await db.delete(obj)
+            await self._commit(db, obj)
+        return obj
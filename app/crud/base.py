@@ -2,13 +2,18 @@
 Base CRUD class with generic database operations
 Optimized for production use with eager loading and selective column loading
 """
-from datetime import datetime
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session, Query
-from sqlalchemy import inspect
+from sqlalchemy import and_, inspect, or_, select
+from sqlalchemy.sql import Select
 
+from app.core.serializers import RecordEncoder
 from app.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -16,6 +21,43 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def encode_cursor(order_by: str, sort_value: Any, pk_value: Any) -> str:
+    """
+    Build an opaque keyset cursor from the last row of a page
+
+    The cursor is url-safe base64 of `[order_by, sort_value, pk_value]`;
+    clients must treat it as an opaque token.
+    """
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    elif isinstance(sort_value, Decimal):
+        sort_value = str(sort_value)
+    elif hasattr(sort_value, "value"):
+        sort_value = sort_value.value
+    raw = json.dumps([order_by, sort_value, pk_value], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str) -> Tuple[Any, Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        Tuple of (raw sort value, primary key value)
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another ordering
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, sort_value, pk_value = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if key != order_by:
+        raise ValueError("Cursor does not match the requested ordering")
+    return sort_value, pk_value
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Base CRUD class with generic database operations
@@ -37,6 +79,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    def _before_commit(self, db: Session, db_obj: ModelType) -> None:
+        """Hook for subclasses to keep derived tables in the same transaction (create, update, delete)"""
+
     def _apply_soft_delete_filter(self, query: Query) -> Query:
         """Helper to apply is_deleted filter if the model supports it"""
         if hasattr(self.model, "is_deleted"):
@@ -127,6 +172,218 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         
         return query.offset(skip).limit(limit).all()
     
+    def _resolve_order(self, order_by: str):
+        """Return (column, descending) for an order_by string like '-created_at'"""
+        descending = order_by.startswith('-')
+        column_name = order_by.lstrip('-')
+        if not hasattr(self.model, column_name):
+            raise ValueError(f"Cannot order {self.model.__name__} by {column_name}")
+        return getattr(self.model, column_name), descending
+
+    def _keyset_query(self, query, *, cursor: Optional[str], limit: int, order_by: str):
+        """
+        Apply the keyset predicate, ordering and limit + 1 to a query
+        
+        Works on both a legacy Query and a 2.0 select(), so the sync and
+        async CRUD classes share one implementation.
+        """
+        sort_column, descending = self._resolve_order(order_by)
+        pk_column = inspect(self.model).primary_key[0]
+
+        if cursor:
+            raw_value, pk_value = decode_cursor(cursor, order_by)
+            sort_value = raw_value
+            if raw_value is not None:
+                python_type = sort_column.type.python_type
+                try:
+                    if python_type is datetime:
+                        sort_value = datetime.fromisoformat(raw_value)
+                    elif python_type is date:
+                        sort_value = date.fromisoformat(raw_value)
+                    elif python_type is Decimal:
+                        sort_value = Decimal(raw_value)
+                except (TypeError, ValueError):
+                    raise ValueError("Invalid cursor")
+
+            if descending:
+                pk_after = pk_column < pk_value
+                if sort_value is None:
+                    query = query.filter(and_(sort_column.is_(None), pk_after))
+                else:
+                    query = query.filter(or_(
+                        sort_column < sort_value,
+                        and_(sort_column == sort_value, pk_after),
+                        sort_column.is_(None)
+                    ))
+            else:
+                pk_after = pk_column > pk_value
+                if sort_value is None:
+                    query = query.filter(or_(
+                        sort_column.isnot(None),
+                        and_(sort_column.is_(None), pk_after)
+                    ))
+                else:
+                    query = query.filter(or_(
+                        sort_column > sort_value,
+                        and_(sort_column == sort_value, pk_after)
+                    ))
+
+        if descending:
+            query = query.order_by(sort_column.desc(), pk_column.desc())
+        else:
+            query = query.order_by(sort_column.asc(), pk_column.asc())
+
+        return query.limit(limit + 1)
+
+    def _keyset_result(self, rows: List[Any], *, limit: int, order_by: str) -> Tuple[List[Any], Optional[str]]:
+        """Trim the extra row fetched by _keyset_query and build the next cursor"""
+        sort_column, _ = self._resolve_order(order_by)
+        pk_column = inspect(self.model).primary_key[0]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                order_by,
+                getattr(last, sort_column.key),
+                getattr(last, pk_column.key)
+            )
+        return rows, next_cursor
+
+    def paginate(
+        self,
+        query: Query,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "-created_at"
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Keyset (cursor) pagination of a query
+        
+        Rows are ordered by `(order_by, primary key)` and a page continues
+        strictly after the `(sort value, primary key)` of the previous page's
+        last row, so deep pages cost the same as the first one and rows do not
+        shift between pages while other rows are inserted or updated. NULL sort
+        values come first in ascending and last in descending order, matching
+        MySQL.
+        
+        Args:
+            query: Filtered query over this model (without ordering or limits)
+            cursor: Cursor from a previous page, or None for the first page
+            limit: Maximum number of records to return
+            order_by: Column name to order by (prefix with - for descending)
+        
+        Returns:
+            Tuple of (records, next_cursor); next_cursor is None on the last page
+        
+        Raises:
+            ValueError: If the cursor is invalid for this ordering
+        """
+        rows = self._keyset_query(query, cursor=cursor, limit=limit, order_by=order_by).all()
+        return self._keyset_result(rows, limit=limit, order_by=order_by)
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: str = "-created_at"
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Cursor-paginated counterpart of get_multi
+        
+        Args:
+            db: Database session
+            cursor: Cursor from a previous page, or None for the first page
+            limit: Maximum number of records to return
+            filters: Dictionary of column:value filters
+            order_by: Column name to order by (prefix with - for descending)
+        
+        Returns:
+            Tuple of (records, next_cursor)
+        """
+        query = self._apply_soft_delete_filter(db.query(self.model))
+        if filters:
+            for column, value in filters.items():
+                if hasattr(self.model, column):
+                    query = query.filter(getattr(self.model, column) == value)
+        return self.paginate(query, cursor=cursor, limit=limit, order_by=order_by)
+
+    def _projection_select(
+        self,
+        encoder: RecordEncoder,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None
+    ) -> Select:
+        """select() of the encoder's columns, plus the primary key and sort column keyset pagination needs"""
+        columns = list(encoder.columns)
+        keys = {column.key for column in columns}
+        extra = [inspect(self.model).primary_key[0]]
+        if order_by:
+            extra.append(self._resolve_order(order_by)[0])
+        for column in extra:
+            if column.key not in keys:
+                columns.append(column)
+                keys.add(column.key)
+        stmt = self._apply_soft_delete_filter(select(*columns))
+        for column, value in (filters or {}).items():
+            if hasattr(self.model, column):
+                stmt = stmt.filter(getattr(self.model, column) == value)
+        return stmt
+
+    def get_multi_projected(
+        self,
+        db: Session,
+        encoder: RecordEncoder,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None
+    ) -> List[Any]:
+        """
+        get_multi reading only the encoder's columns, returned as its records
+        
+        Args:
+            db: Database session
+            encoder: Response shape to read (app.core.serializers)
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            filters: Dictionary of column:value filters
+            order_by: Column name to order by (prefix with - for descending)
+        
+        Returns:
+            List of records (serialized natively by orjson)
+        """
+        stmt = self._projection_select(encoder, filters)
+        if order_by:
+            column, descending = self._resolve_order(order_by)
+            stmt = stmt.order_by(column.desc() if descending else column)
+        return encoder.records(db.execute(stmt.offset(skip).limit(limit)).all())
+
+    def get_page_projected(
+        self,
+        db: Session,
+        encoder: RecordEncoder,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: str = "-created_at"
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        get_page reading only the encoder's columns, returned as its records
+        
+        Returns:
+            Tuple of (records, next_cursor)
+        """
+        stmt = self._keyset_query(self._projection_select(encoder, filters, order_by), cursor=cursor, limit=limit, order_by=order_by)
+        rows, next_cursor = self._keyset_result(db.execute(stmt).all(), limit=limit, order_by=order_by)
+        return encoder.records(rows), next_cursor
+
     def get_count(
         self,
         db: Session,
@@ -166,6 +423,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
+        self._before_commit(db, db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -200,6 +458,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
         
         db.add(db_obj)
+        self._before_commit(db, db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -224,6 +483,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 db.add(obj)
             else:
                 db.delete(obj)
+            self._before_commit(db, obj)
             db.commit()
         return obj
     
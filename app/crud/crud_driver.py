@@ -6,6 +6,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
 
+from app.crud.async_base import AsyncCRUDBase
 from app.crud.base import CRUDBase
 from app.models import Driver
 from app.schemas import DriverCreate, DriverUpdate
@@ -233,3 +234,4 @@ class CRUDDriver(CRUDBase[Driver, DriverCreate, DriverUpdate]):
 
 # Singleton instance
 crud_driver = CRUDDriver(Driver)
+async_crud_driver = AsyncCRUDBase(crud_driver)
@@ -0,0 +1,203 @@
+"""
+CRUD operations for DriverLiveLocation and DriverLocationHistory models
+Bulk upserts used by the write-behind location buffers
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.crud.async_base import AsyncCRUDBase
+from app.crud.base import CRUDBase
+from app.core.location_codec import decode_blob, decode_blob_arrays, window_start_for
+from app.models import Driver, DriverLiveLocation, DriverLocationHistory
+
+
+class CRUDDriverLocation(CRUDBase[DriverLiveLocation, None, None]):
+    """CRUD operations for DriverLiveLocation model"""
+
+    def get_by_driver(self, db: Session, driver_id: str) -> Optional[DriverLiveLocation]:
+        """Get the stored live location of a driver"""
+        return db.query(DriverLiveLocation).filter(DriverLiveLocation.driver_id == driver_id).first()
+
+    def get_existing_driver_ids(self, db: Session, driver_ids: Sequence[str]) -> set:
+        """Return the subset of driver_ids that belong to non-deleted drivers"""
+        if not driver_ids:
+            return set()
+        rows = self._apply_soft_delete_filter(db.query(Driver.driver_id)).filter(
+            Driver.driver_id.in_(list(driver_ids))
+        ).all()
+        return {r.driver_id for r in rows}
+
+    def upsert_many(
+        self,
+        db: Session,
+        rows: List[Dict],
+        batch_size: int = 500,
+        verify_drivers: bool = True
+    ) -> int:
+        """
+        Upsert the latest position of many drivers
+
+        Each chunk is written with a single
+        `INSERT ... ON DUPLICATE KEY UPDATE` statement. A row only replaces the
+        stored position if its `last_updated` is not older, so flushes from
+        different workers can land in any order.
+
+        Args:
+            db: Database session
+            rows: Dicts with driver_id, latitude, longitude, last_updated
+            batch_size: Maximum rows per statement
+            verify_drivers: Drop rows of unknown/deleted drivers first. Pass
+                False when the caller already checked the ids, so a batch that
+                fits in one chunk is written in a single round trip.
+
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+
+        if verify_drivers:
+            known = self.get_existing_driver_ids(db, [r["driver_id"] for r in rows])
+            rows = [r for r in rows if r["driver_id"] in known]
+            if not rows:
+                return 0
+
+        table = DriverLiveLocation.__table__
+        for start in range(0, len(rows), batch_size):
+            stmt = mysql_insert(table).values(rows[start:start + batch_size])
+            is_newer = or_(
+                table.c.last_updated.is_(None),
+                stmt.inserted.last_updated >= table.c.last_updated
+            )
+            # Order matters: MySQL evaluates assignments left to right, so
+            # last_updated must be replaced after the coordinates.
+            stmt = stmt.on_duplicate_key_update([
+                ("latitude", case((is_newer, stmt.inserted.latitude), else_=table.c.latitude)),
+                ("longitude", case((is_newer, stmt.inserted.longitude), else_=table.c.longitude)),
+                ("last_updated", case((is_newer, stmt.inserted.last_updated), else_=table.c.last_updated)),
+            ])
+            db.execute(stmt)
+
+        db.commit()
+        return len(rows)
+
+
+class CRUDDriverLocationHistory(CRUDBase[DriverLocationHistory, None, None]):
+    """CRUD operations for DriverLocationHistory model"""
+
+    def append_chunks(self, db: Session, rows: List[Dict], batch_size: int = 500) -> int:
+        """
+        Append encoded chunks to the history windows of many drivers
+
+        A window row is created on first use and extended with
+        `data = CONCAT(data, new_chunk)` afterwards, so appending never reads
+        the stored blob back.
+
+        Args:
+            db: Database session
+            rows: Dicts with driver_id, window_start, first_point_at,
+                last_point_at, point_count and data (see encode_chunk)
+            batch_size: Maximum rows per statement
+
+        Returns:
+            Number of window rows written
+        """
+        if not rows:
+            return 0
+
+        known = crud_driver_location.get_existing_driver_ids(db, {r["driver_id"] for r in rows})
+        rows = [r for r in rows if r["driver_id"] in known]
+
+        table = DriverLocationHistory.__table__
+        for start in range(0, len(rows), batch_size):
+            stmt = mysql_insert(table).values(rows[start:start + batch_size])
+            stmt = stmt.on_duplicate_key_update(
+                data=func.concat(table.c.data, stmt.inserted.data),
+                point_count=table.c.point_count + stmt.inserted.point_count,
+                first_point_at=func.least(table.c.first_point_at, stmt.inserted.first_point_at),
+                last_point_at=func.greatest(table.c.last_point_at, stmt.inserted.last_point_at),
+            )
+            db.execute(stmt)
+
+        db.commit()
+        return len(rows)
+
+    def get_points(
+        self,
+        db: Session,
+        driver_id: str,
+        start: datetime,
+        end: datetime,
+        window_seconds: int
+    ) -> List[tuple]:
+        """
+        Get the recorded (timestamp, lat, lng) points of a driver between start and end
+
+        Args:
+            db: Database session
+            driver_id: Driver ID
+            start: Inclusive lower bound
+            end: Inclusive upper bound
+            window_seconds: History window size the rows were written with
+
+        Returns:
+            Points sorted by timestamp
+        """
+        windows = db.query(
+            DriverLocationHistory.window_start, DriverLocationHistory.data
+        ).filter(
+            DriverLocationHistory.driver_id == driver_id,
+            DriverLocationHistory.window_start >= window_start_for(start, window_seconds),
+            DriverLocationHistory.window_start <= end
+        ).order_by(DriverLocationHistory.window_start).all()
+
+        points = []
+        for window_start, data in windows:
+            points.extend(p for p in decode_blob(window_start, data) if start <= p[0] <= end)
+        return points
+
+    def get_point_arrays(
+        self,
+        db: Session,
+        driver_id: str,
+        start: datetime,
+        end: datetime,
+        window_seconds: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Same as get_points but returned as NumPy columns for the distance engine
+
+        Returns:
+            (seconds since start, latitudes, longitudes), unsorted
+        """
+        windows = db.query(
+            DriverLocationHistory.window_start, DriverLocationHistory.data
+        ).filter(
+            DriverLocationHistory.driver_id == driver_id,
+            DriverLocationHistory.window_start >= window_start_for(start, window_seconds),
+            DriverLocationHistory.window_start <= end
+        ).all()
+
+        limit = (end - start).total_seconds()
+        columns = ([], [], [])
+        for window_start, data in windows:
+            ms, lats, lngs = decode_blob_arrays(data)
+            seconds = ms / 1000.0 + (window_start - start).total_seconds()
+            inside = (seconds >= 0) & (seconds <= limit)
+            for column, values in zip(columns, (seconds, lats, lngs)):
+                column.append(values[inside])
+
+        if not windows:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty, empty
+        return tuple(np.concatenate(column) for column in columns)
+
+
+crud_driver_location = CRUDDriverLocation(DriverLiveLocation)
+crud_driver_location_history = CRUDDriverLocationHistory(DriverLocationHistory)
+async_crud_driver_location = AsyncCRUDBase(crud_driver_location)
@@ -57,6 +57,10 @@ class CRUDAdmin(CRUDBase[Admin, AdminCreate, AdminUpdate]):
 # Tariff CRUD
 class CRUDTariff(CRUDBase[VehicleTariffConfig, VehicleTariffConfigCreate, VehicleTariffConfigUpdate]):
     """CRUD operations for Tariff model"""
+
+    def _before_commit(self, db: Session, db_obj: VehicleTariffConfig) -> None:
+        from app.services.tariff_cache import tariff_cache
+        tariff_cache.mark_changed(db)
     
     def get_by_vehicle_type(self, db: Session, vehicle_type: str) -> Optional[VehicleTariffConfig]:
         """Get active tariff for vehicle type"""
@@ -0,0 +1,244 @@
+"""
+CRUD operations for the daily revenue rollup
+Analytics read pre-aggregated days instead of scanning trips
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, extract, func, inspect, literal, select
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models import DailyRevenueRollup, Trip, VehicleTariffConfig
+from app.core.constants import DEFAULT_DRIVER_COMMISSION_PERCENT, TripStatus
+from app.core.fare_rules import commission_for
+
+EXTRA_COLUMNS = (
+    "waiting_charges", "inter_state_permit_charges", "driver_allowance",
+    "luggage_cost", "pet_cost", "toll_charges", "night_allowance",
+)
+TRACKED_COLUMNS = ("trip_status", "is_deleted", "created_at", "vehicle_type", "trip_type", "total_amount", "fare") + EXTRA_COLUMNS
+AMOUNT_FIELDS = ("trip_count", "revenue", "fare", "commission", "extras")
+
+RollupKey = Tuple[date, str, str]
+
+
+def _decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def trip_contribution(values, commission_percent: Decimal) -> Optional[Tuple[RollupKey, Dict[str, Decimal]]]:
+    """
+    What one trip adds to the rollup, or None if it does not count
+
+    Args:
+        values: Trip instance or row exposing the TRACKED_COLUMNS attributes
+        commission_percent: Commission rate of the trip's vehicle type (tariff_cache.commission_percent)
+    """
+    if values.trip_status != TripStatus.COMPLETED.value or values.is_deleted or values.created_at is None:
+        return None
+    fare = _decimal(values.fare)
+    key = (values.created_at.date(), values.vehicle_type or "", values.trip_type or "")
+    return key, {
+        "trip_count": 1,
+        "revenue": _decimal(values.total_amount),
+        "fare": fare,
+        "commission": commission_for(fare, commission_percent),
+        "extras": sum((_decimal(getattr(values, c)) for c in EXTRA_COLUMNS), Decimal("0")),
+    }
+
+
+class CRUDRevenueRollup(CRUDBase[DailyRevenueRollup, None, None]):
+    """Read and maintain daily_revenue_rollup"""
+
+    def apply_deltas(self, db: Session, deltas: Dict[RollupKey, Dict[str, Decimal]]) -> None:
+        """Add per-key deltas to the rollup with one upsert per key (atomic across workers)"""
+        table = DailyRevenueRollup.__table__
+        dialect = db.get_bind().dialect.name
+        for (revenue_date, vehicle_type, trip_type), amounts in deltas.items():
+            if not any(amounts.values()):
+                continue
+            row = {"revenue_date": revenue_date, "vehicle_type": vehicle_type, "trip_type": trip_type,
+                   "updated_at": datetime.utcnow(), **amounts}
+            if dialect == "mysql":
+                from sqlalchemy.dialects.mysql import insert
+                stmt = insert(table).values(row)
+                stmt = stmt.on_duplicate_key_update(
+                    updated_at=stmt.inserted.updated_at,
+                    **{f: table.c[f] + stmt.inserted[f] for f in AMOUNT_FIELDS}
+                )
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+                stmt = insert(table).values(row)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["revenue_date", "vehicle_type", "trip_type"],
+                    set_={"updated_at": stmt.excluded.updated_at,
+                          **{f: table.c[f] + stmt.excluded[f] for f in AMOUNT_FIELDS}}
+                )
+            db.execute(stmt)
+
+    def rebuild(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        commit: bool = True
+    ) -> int:
+        """
+        Recompute the rollup from trips (all days, or start_date..end_date inclusive)
+
+        Commission is taken at the current rate of each trip's active tariff,
+        like the incremental deltas; run this after changing a tariff's
+        driver_commission to re-price past days.
+
+        Returns:
+            Number of rollup rows written
+        """
+        day = func.date(Trip.created_at)
+        extras = sum(func.coalesce(getattr(Trip, c), 0) for c in EXTRA_COLUMNS)
+        # The tariff tariff_cache would pick: active, most recently updated, vehicle type case-insensitive
+        tariff_percent = select(VehicleTariffConfig.driver_commission).where(
+            func.lower(func.trim(VehicleTariffConfig.vehicle_type)) == func.lower(func.trim(Trip.vehicle_type)),
+            VehicleTariffConfig.is_active == True,
+            VehicleTariffConfig.is_deleted == False
+        ).order_by(VehicleTariffConfig.updated_at.desc(), VehicleTariffConfig.tariff_id).limit(1).scalar_subquery()
+        percent = func.coalesce(tariff_percent, literal(Decimal(str(DEFAULT_DRIVER_COMMISSION_PERCENT))))
+        commission = func.round(func.coalesce(Trip.fare, 0) * percent / 100, 2)
+
+        trip_filter = [Trip.trip_status == TripStatus.COMPLETED.value, Trip.is_deleted == False, Trip.created_at.isnot(None)]
+        rollup_filter = []
+        if start_date:
+            trip_filter.append(Trip.created_at >= datetime.combine(start_date, datetime.min.time()))
+            rollup_filter.append(DailyRevenueRollup.revenue_date >= start_date)
+        if end_date:
+            trip_filter.append(Trip.created_at < datetime.combine(end_date, datetime.min.time()) + timedelta(days=1))
+            rollup_filter.append(DailyRevenueRollup.revenue_date <= end_date)
+
+        source = select(
+            day,
+            func.coalesce(Trip.vehicle_type, ""),
+            func.coalesce(Trip.trip_type, ""),
+            func.count(Trip.trip_id),
+            func.coalesce(func.sum(Trip.total_amount), 0),
+            func.coalesce(func.sum(Trip.fare), 0),
+            func.coalesce(func.sum(commission), 0),
+            func.coalesce(func.sum(extras), 0),
+            func.now(),
+        ).where(and_(*trip_filter)).group_by(day, func.coalesce(Trip.vehicle_type, ""), func.coalesce(Trip.trip_type, ""))
+
+        db.execute(delete(DailyRevenueRollup).where(and_(*rollup_filter)))
+        result = db.execute(DailyRevenueRollup.__table__.insert().from_select(
+            ["revenue_date", "vehicle_type", "trip_type", "trip_count", "revenue", "fare", "commission", "extras", "updated_at"],
+            source
+        ))
+        if commit:
+            db.commit()
+        return result.rowcount
+
+    def _query(self, db: Session, *columns, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        query = db.query(
+            *columns,
+            func.coalesce(func.sum(DailyRevenueRollup.revenue), 0).label("revenue"),
+            func.coalesce(func.sum(DailyRevenueRollup.trip_count), 0).label("trips")
+        )
+        if start_date:
+            query = query.filter(DailyRevenueRollup.revenue_date >= start_date)
+        if end_date:
+            query = query.filter(DailyRevenueRollup.revenue_date <= end_date)
+        return query
+
+    @staticmethod
+    def _has_trips():
+        # Keys whose trips were all cancelled or deleted stay behind with zero counts
+        return func.sum(DailyRevenueRollup.trip_count) > 0
+
+    def get_totals(self, db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """Row with revenue and trips over a date range"""
+        return self._query(db, start_date=start_date, end_date=end_date).one()
+
+    def get_daily(self, db: Session, start_date: date, end_date: date) -> List:
+        """Rows (date, revenue, trips) for days with completed trips"""
+        return self._query(
+            db, DailyRevenueRollup.revenue_date.label("date"), start_date=start_date, end_date=end_date
+        ).group_by(DailyRevenueRollup.revenue_date).having(self._has_trips()).order_by(DailyRevenueRollup.revenue_date).all()
+
+    def get_monthly(self, db: Session, start_date: date, end_date: date) -> List:
+        """Rows (year, month, revenue, trips) between two dates"""
+        year = extract("year", DailyRevenueRollup.revenue_date)
+        month = extract("month", DailyRevenueRollup.revenue_date)
+        return self._query(
+            db, year.label("year"), month.label("month"), start_date=start_date, end_date=end_date
+        ).group_by(year, month).having(self._has_trips()).order_by(year, month).all()
+
+    def get_by_vehicle_type(self, db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List:
+        """Rows (vehicle_type, revenue, trips)"""
+        return self._query(
+            db, DailyRevenueRollup.vehicle_type, start_date=start_date, end_date=end_date
+        ).group_by(DailyRevenueRollup.vehicle_type).having(self._has_trips()).all()
+
+
+# Singleton instance
+crud_revenue_rollup = CRUDRevenueRollup(DailyRevenueRollup)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_trip_revenue(session: Session, flush_context, instances) -> None:
+    """
+    Keep daily_revenue_rollup in the flush's transaction
+
+    For every trip whose revenue-relevant columns change, the previous
+    contribution is read back from the database (still pre-flush, with the
+    trip rows locked so concurrent updates of a trip apply their deltas one
+    after the other) and the difference to the new one is applied as an
+    additive upsert. This covers completion, fare recalculation, edits of
+    extras, status changes and soft or hard deletes on every code path that
+    goes through the ORM. Both sides price commission at the current tariff
+    rate (the rate trip completion debits).
+    """
+    changed = []
+    for obj in session.new:
+        if isinstance(obj, Trip):
+            if obj.created_at is None and obj.trip_status == TripStatus.COMPLETED.value and not obj.is_deleted:
+                # Inserted already completed: pin the day the column default would pick,
+                # so the rollup and rebuild() count the trip on the same day
+                obj.created_at = datetime.utcnow()
+            changed.append((obj, None))
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Trip):
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or any(state.attrs[c].history.has_changes() for c in TRACKED_COLUMNS):
+            changed.append((obj, obj.trip_id))
+    if not changed:
+        return
+
+    previous = {}
+    ids = [trip_id for _, trip_id in changed if trip_id]
+    if ids:
+        rows = session.execute(
+            select(Trip.trip_id, *(getattr(Trip, c) for c in TRACKED_COLUMNS))
+            .where(Trip.trip_id.in_(ids))
+            .order_by(Trip.trip_id)
+            .with_for_update()
+        ).all()
+        previous = {row.trip_id: row for row in rows}
+
+    from app.services.tariff_cache import tariff_cache
+
+    def percent(values) -> Decimal:
+        return tariff_cache.commission_percent(session, values.vehicle_type)
+
+    deltas: Dict[RollupKey, Dict[str, Decimal]] = defaultdict(lambda: dict.fromkeys(AMOUNT_FIELDS, 0))
+    for trip, trip_id in changed:
+        old = trip_contribution(previous[trip_id], percent(previous[trip_id])) if trip_id in previous else None
+        new = None if trip in session.deleted else trip_contribution(trip, percent(trip))
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution is not None:
+                key, amounts = contribution
+                for field, value in amounts.items():
+                    deltas[key][field] += sign * value
+    if deltas:
+        crud_revenue_rollup.apply_deltas(session, deltas)
+
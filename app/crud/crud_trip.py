@@ -2,26 +2,154 @@
 CRUD operations for Trip model
 Optimized for production with complex queries and eager loading
 """
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, Query, joinedload
+from sqlalchemy import and_, or_, func, select, event
+from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
 
+from app.crud.async_base import AsyncCRUDBase
 from app.crud.base import CRUDBase
-from app.models import Trip, Driver, VehicleTariffConfig
+from app.models import Trip, Driver, DriverActiveTrip
 from app.schemas import TripCreate, TripUpdate
 from app.core.constants import TripStatus, MIN_ONE_WAY_KM, MIN_ROUND_TRIP_KM
+from app.core.fare_rules import normalize_trip_type
+
+
+ACTIVE_TRIP_STATUSES = (TripStatus.ASSIGNED.value, TripStatus.STARTED.value)
+
+# Session.info key of the location index updates waiting for the commit
+PENDING_INDEX_UPDATES = "active_trip_index_updates"
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_index_updates(session: Session) -> None:
+    """Publish the active trip changes of a committed transaction to the location index"""
+    if session.in_nested_transaction():
+        # A released savepoint; the changes are not committed yet
+        return
+    updates = session.info.pop(PENDING_INDEX_UPDATES, None)
+    if not updates:
+        return
+    from app.services.location_index import location_index
+
+    for driver_id, trip_status in updates:
+        location_index.update_attributes(driver_id, active_trip_status=trip_status)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_index_updates(session: Session, transaction) -> None:
+    """Whatever the outermost transaction did not commit never reaches the index"""
+    if transaction.parent is None:
+        session.info.pop(PENDING_INDEX_UPDATES, None)
 
 
 class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
     """
     CRUD operations for Trip model with production optimizations
     """
-    
+
+    def _before_commit(self, db: Session, db_obj: Trip) -> None:
+        self.sync_active_trip(db, db_obj)
+
+    def sync_active_trip(self, db: Session, trip: Trip) -> None:
+        """
+        Mirror a trip into driver_active_trips (call before committing)
+
+        The trip has a row while it is ASSIGNED/STARTED to a driver and not
+        deleted; otherwise its row is removed. The in-memory location index
+        picks the change up when the session commits (and never, if it rolls
+        back), so dispatch and the admin map see it without waiting for a
+        refresh.
+
+        Args:
+            db: Database session
+            trip: Trip whose status, driver or deletion flag may have changed
+        """
+        trip_status = getattr(trip.trip_status, "value", trip.trip_status)
+        is_active = bool(trip.assigned_driver_id) and trip_status in ACTIVE_TRIP_STATUSES and not trip.is_deleted
+        row = db.get(DriverActiveTrip, trip.trip_id)
+        previous_driver_id = row.driver_id if row is not None else None
+
+        if is_active:
+            if row is None:
+                db.add(DriverActiveTrip(trip_id=trip.trip_id, driver_id=trip.assigned_driver_id, trip_status=trip_status))
+            else:
+                row.driver_id = trip.assigned_driver_id
+                row.trip_status = trip_status
+        elif row is not None:
+            db.delete(row)
+
+        updates = db.info.setdefault(PENDING_INDEX_UPDATES, [])
+        if previous_driver_id and (previous_driver_id != trip.assigned_driver_id or not is_active):
+            updates.append((previous_driver_id, None))
+        if is_active:
+            updates.append((trip.assigned_driver_id, trip_status))
+
+    def get_active_trip_statuses(self, db: Session, driver_ids: List[str]) -> dict:
+        """
+        Active trip status per driver from driver_active_trips
+
+        Args:
+            db: Database session
+            driver_ids: Drivers to look up
+
+        Returns:
+            {driver_id: "STARTED" | "ASSIGNED"} for drivers with an active trip
+        """
+        if not driver_ids:
+            return {}
+        statuses = {}
+        rows = db.query(DriverActiveTrip.driver_id, DriverActiveTrip.trip_status).filter(
+            DriverActiveTrip.driver_id.in_(driver_ids)
+        ).all()
+        for driver_id, trip_status in rows:
+            # A STARTED trip wins over an ASSIGNED one
+            if statuses.get(driver_id) != TripStatus.STARTED.value:
+                statuses[driver_id] = trip_status
+        return statuses
+
+    def rebuild_active_trips(self, db: Session) -> int:
+        """
+        Reconcile driver_active_trips with the trips table (idempotent)
+
+        A repair for drift after bulk SQL edits that bypass the ORM
+        (scripts/rebuild_active_trips.py); the table itself is backfilled by
+        migration 0007. Safe to run while traffic is flowing.
+
+        Returns:
+            Number of active trips
+        """
+        active = self._apply_soft_delete_filter(
+            db.query(Trip.trip_id, Trip.assigned_driver_id, Trip.trip_status)
+        ).filter(
+            Trip.assigned_driver_id.isnot(None),
+            Trip.trip_status.in_(ACTIVE_TRIP_STATUSES)
+        )
+
+        # Rows of trips that are no longer active, or whose driver/status moved on
+        current = active.filter(
+            Trip.trip_id == DriverActiveTrip.trip_id,
+            Trip.assigned_driver_id == DriverActiveTrip.driver_id,
+            Trip.trip_status == DriverActiveTrip.trip_status
+        ).with_entities(Trip.trip_id).exists()
+        db.query(DriverActiveTrip).filter(~current).delete(synchronize_session=False)
+
+        missing = active.filter(
+            ~select(DriverActiveTrip.trip_id).where(DriverActiveTrip.trip_id == Trip.trip_id).exists()
+        )
+        db.execute(
+            DriverActiveTrip.__table__.insert().from_select(
+                ["trip_id", "driver_id", "trip_status"], missing.subquery().select()
+            )
+        )
+        db.commit()
+        return db.query(func.count(DriverActiveTrip.trip_id)).scalar()
+
     def get_with_driver(self, db: Session, trip_id: str) -> Optional[Trip]:
         """
-        Get trip with driver details (eager loaded)
+        Get trip with driver details and GPS distance check (eager loaded)
         
         Args:
             db: Database session
@@ -31,9 +159,34 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
             Trip with driver or None
         """
         return self._apply_soft_delete_filter(db.query(Trip)).options(
-            joinedload(Trip.assigned_driver)
+            joinedload(Trip.assigned_driver),
+            joinedload(Trip.gps_distance)
         ).filter(Trip.trip_id == trip_id).first()
     
+    # Filters take a Query or a select() so AsyncCRUDTrip builds the same statements
+    def _filter_available(self, query):
+        return self._apply_soft_delete_filter(query).filter(
+            and_(
+                Trip.trip_status == TripStatus.OPEN,
+                Trip.assigned_driver_id == None
+            )
+        )
+
+    def _filter_by_status(self, query, status: str):
+        return self._apply_soft_delete_filter(query).filter(Trip.trip_status == status)
+
+    def _filter_by_driver(self, query, driver_id: str):
+        return self._apply_soft_delete_filter(query).filter(Trip.assigned_driver_id == driver_id)
+
+    def _query_available(self, db: Session) -> Query:
+        return self._filter_available(db.query(Trip))
+
+    def _query_by_status(self, db: Session, status: str) -> Query:
+        return self._filter_by_status(db.query(Trip), status)
+
+    def _query_by_driver(self, db: Session, driver_id: str) -> Query:
+        return self._filter_by_driver(db.query(Trip), driver_id)
+
     def get_available_trips(
         self,
         db: Session,
@@ -51,12 +204,18 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         Returns:
             List of available trips
         """
-        return self._apply_soft_delete_filter(db.query(Trip)).filter(
-            and_(
-                Trip.trip_status == TripStatus.OPEN,
-                Trip.assigned_driver_id == None
-            )
-        ).order_by(Trip.updated_at.desc()).offset(skip).limit(limit).all()
+        return self._query_available(db).order_by(
+            Trip.updated_at.desc()
+        ).offset(skip).limit(limit).all()
+
+    def get_available_trips_page(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """Cursor-paginated get_available_trips (newest updated first)"""
+        return self.paginate(self._query_available(db), cursor=cursor, limit=limit, order_by="-updated_at")
     
     def get_by_status(
         self,
@@ -77,9 +236,19 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         Returns:
             List of trips with specified status
         """
-        return self._apply_soft_delete_filter(db.query(Trip)).filter(
-            Trip.trip_status == status
-        ).order_by(Trip.updated_at.desc()).offset(skip).limit(limit).all()
+        return self._query_by_status(db, status).order_by(
+            Trip.updated_at.desc()
+        ).offset(skip).limit(limit).all()
+
+    def get_by_status_page(
+        self,
+        db: Session,
+        status: str,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """Cursor-paginated get_by_status (newest updated first)"""
+        return self.paginate(self._query_by_status(db, status), cursor=cursor, limit=limit, order_by="-updated_at")
     
     def get_by_driver(
         self,
@@ -100,9 +269,19 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         Returns:
             List of driver's trips
         """
-        return self._apply_soft_delete_filter(db.query(Trip)).filter(
-            Trip.assigned_driver_id == driver_id
-        ).order_by(Trip.created_at.desc()).offset(skip).limit(limit).all()
+        return self._query_by_driver(db, driver_id).order_by(
+            Trip.created_at.desc()
+        ).offset(skip).limit(limit).all()
+
+    def get_by_driver_page(
+        self,
+        db: Session,
+        driver_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """Cursor-paginated get_by_driver (newest created first)"""
+        return self.paginate(self._query_by_driver(db, driver_id), cursor=cursor, limit=limit, order_by="-created_at")
     
     def get_active_trips(
         self,
@@ -186,13 +365,10 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         if trip.odo_start is None or trip.odo_end is None:
             return {"fare": Decimal("0"), "chargeable_distance": Decimal("0")}
         
-        from app.models import VehicleTariffConfig
+        from app.services.tariff_cache import tariff_cache
         
-        # Get tariff config
-        tariff = self._apply_soft_delete_filter(db.query(VehicleTariffConfig)).filter(
-            VehicleTariffConfig.vehicle_type == trip.vehicle_type,
-            VehicleTariffConfig.is_active == True
-        ).first()
+        # ✅ OPTIMIZED: Tariff from the per-worker cache (no query per fare)
+        tariff = tariff_cache.get(db, trip.vehicle_type)
         
         if not tariff:
             return {"fare": Decimal("0"), "chargeable_distance": Decimal("0")}
@@ -202,7 +378,7 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         
         # Normalize trip type for robust comparison
         # Handles "One Way", "one_way", "oneWay", "round_trip", etc.
-        trip_type_norm = (trip.trip_type or "").strip().lower().replace("_", "").replace(" ", "")
+        trip_type_norm = normalize_trip_type(trip.trip_type)
         
         # Calculate actual days
         import math
@@ -270,7 +446,6 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         Update trip status with commission-only wallet deduction
         """
         from app.models import Driver, WalletTransaction
-        from app.core.constants import DEFAULT_DRIVER_COMMISSION_PERCENT
         from decimal import Decimal, ROUND_HALF_UP
         import uuid
         
@@ -297,15 +472,10 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
                 
                 # ✅ ONLY DEBIT commission from wallet (Customer pays driver directly)
                 if trip.fare and trip.assigned_driver_id:
-                    # Get tariff for this vehicle type to use its specific commission rate
-                    tariff = self._apply_soft_delete_filter(db.query(VehicleTariffConfig)).filter(
-                        VehicleTariffConfig.vehicle_type == trip.vehicle_type,
-                        VehicleTariffConfig.is_active == True
-                    ).first()
-                    
-                    commission_rate = Decimal(str(tariff.driver_commission)) if tariff and tariff.driver_commission is not None else Decimal(str(DEFAULT_DRIVER_COMMISSION_PERCENT))
-                    comm_pct = commission_rate / Decimal("100")
-                    commission_amount = (trip.fare * comm_pct).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+                    # Commission at this vehicle type's tariff rate
+                    from app.core.fare_rules import commission_for
+                    from app.services.tariff_cache import tariff_cache
+                    commission_amount = commission_for(trip.fare, tariff_cache.commission_percent(db, trip.vehicle_type))
                     
                     # Get driver
                     driver = self._apply_soft_delete_filter(db.query(Driver)).filter(Driver.driver_id == trip.assigned_driver_id).first()
@@ -324,6 +494,7 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
                         # Update driver wallet balance (Minus commission only)
                         driver.wallet_balance = (driver.wallet_balance or Decimal(0)) - commission_amount
             
+            self.sync_active_trip(db, trip)
             db.commit()
             db.refresh(trip)
         
@@ -350,6 +521,7 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         if trip:
             trip.assigned_driver_id = driver_id
             trip.trip_status = TripStatus.ASSIGNED
+            self.sync_active_trip(db, trip)
             db.commit()
             db.refresh(trip)
         
@@ -367,6 +539,7 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         if trip:
             trip.assigned_driver_id = None
             trip.trip_status = TripStatus.OPEN
+            self.sync_active_trip(db, trip)
             db.commit()
             db.refresh(trip)
         
@@ -376,33 +549,96 @@ class CRUDTrip(CRUDBase[Trip, TripCreate, TripUpdate]):
         """
         Get trip statistics for dashboard
         
+        Served from the shared, briefly cached dashboard aggregation.
+        
         Args:
             db: Database session
         
         Returns:
             Dictionary with trip statistics
         """
-        total = self._apply_soft_delete_filter(db.query(Trip)).count()
-        open_trips = self._apply_soft_delete_filter(db.query(Trip)).filter(Trip.trip_status == TripStatus.OPEN).count()
-        assigned = self._apply_soft_delete_filter(db.query(Trip)).filter(Trip.trip_status == TripStatus.ASSIGNED).count()
-        started = self._apply_soft_delete_filter(db.query(Trip)).filter(Trip.trip_status == TripStatus.STARTED).count()
-        completed = self._apply_soft_delete_filter(db.query(Trip)).filter(Trip.trip_status == TripStatus.COMPLETED).count()
-        cancelled = self._apply_soft_delete_filter(db.query(Trip)).filter(Trip.trip_status == TripStatus.CANCELLED).count()
-        
-        total_revenue = self._apply_soft_delete_filter(db.query(func.sum(Trip.fare))).filter(
-            Trip.trip_status == TripStatus.COMPLETED
-        ).scalar() or 0
-        
+        from app.services.dashboard_stats import dashboard_stats
+
+        return self._statistics_dict(dashboard_stats.get(db))
+
+    @staticmethod
+    def _statistics_dict(stats) -> dict:
         return {
-            "total": total,
-            "open": open_trips,
-            "assigned": assigned,
-            "started": started,
-            "completed": completed,
-            "cancelled": cancelled,
-            "total_revenue": float(total_revenue)
+            "total": stats.total_trips,
+            "open": stats.open_trips,
+            "assigned": stats.assigned_trips,
+            "started": stats.started_trips,
+            "completed": stats.completed_trips,
+            "cancelled": stats.cancelled_trips,
+            "total_revenue": float(stats.total_fare)
         }
 
 
 # Singleton instance
 crud_trip = CRUDTrip(Trip)
+
+
+class AsyncCRUDTrip(AsyncCRUDBase[Trip, TripCreate, TripUpdate]):
+    """Async read paths of CRUDTrip for the hot trip endpoints"""
+
+    crud: CRUDTrip
+
+    async def get_with_driver(self, db: AsyncSession, trip_id: str) -> Optional[Trip]:
+        """Get trip with driver details and GPS distance check (eager loaded)"""
+        return await self.get(db, trip_id, eager_load=["assigned_driver", "gps_distance"])
+
+    async def get_available_trips(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Trip]:
+        """Get all available trips (OPEN status, no driver assigned)"""
+        stmt = self.crud._filter_available(select(Trip)).order_by(Trip.updated_at.desc())
+        return await self._all(db, stmt.offset(skip).limit(limit))
+
+    async def get_available_trips_page(
+        self,
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """Cursor-paginated get_available_trips (newest updated first)"""
+        stmt = self.crud._filter_available(select(Trip))
+        return await self.paginate(db, stmt, cursor=cursor, limit=limit, order_by="-updated_at")
+
+    async def get_by_status(self, db: AsyncSession, status: str, skip: int = 0, limit: int = 100) -> List[Trip]:
+        """Get trips by status"""
+        stmt = self.crud._filter_by_status(select(Trip), status).order_by(Trip.updated_at.desc())
+        return await self._all(db, stmt.offset(skip).limit(limit))
+
+    async def get_by_status_page(
+        self,
+        db: AsyncSession,
+        status: str,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """Cursor-paginated get_by_status (newest updated first)"""
+        stmt = self.crud._filter_by_status(select(Trip), status)
+        return await self.paginate(db, stmt, cursor=cursor, limit=limit, order_by="-updated_at")
+
+    async def get_by_driver(self, db: AsyncSession, driver_id: str, skip: int = 0, limit: int = 100) -> List[Trip]:
+        """Get all trips for a specific driver"""
+        stmt = self.crud._filter_by_driver(select(Trip), driver_id).order_by(Trip.created_at.desc())
+        return await self._all(db, stmt.offset(skip).limit(limit))
+
+    async def get_by_driver_page(
+        self,
+        db: AsyncSession,
+        driver_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """Cursor-paginated get_by_driver (newest created first)"""
+        stmt = self.crud._filter_by_driver(select(Trip), driver_id)
+        return await self.paginate(db, stmt, cursor=cursor, limit=limit, order_by="-created_at")
+
+    async def get_statistics(self, db: AsyncSession) -> dict:
+        """Get trip statistics for dashboard (shared cached aggregation)"""
+        from app.services.dashboard_stats import dashboard_stats
+
+        return self.crud._statistics_dict(await dashboard_stats.get_async(db))
+
+
+async_crud_trip = AsyncCRUDTrip(crud_trip)
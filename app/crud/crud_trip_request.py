@@ -1,10 +1,16 @@
 """
 CRUD operations for TripDriverRequest model
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, Query, joinedload
 from app.crud.base import CRUDBase
-from app.models import TripDriverRequest
+from app.models import Driver, Trip, TripDriverRequest
+
+# Columns the request listings show from the related rows (is_deleted hides soft-deleted ones)
+LISTING_DRIVER_COLUMNS = (Driver.driver_id, Driver.name, Driver.phone_number, Driver.is_deleted)
+LISTING_TRIP_COLUMNS = (Trip.trip_id, Trip.customer_name, Trip.pickup_address, Trip.drop_address, Trip.is_deleted)
+
 
 class CRUDTripRequest(CRUDBase[TripDriverRequest, None, None]):
     """CRUD operations for TripDriverRequest model"""
@@ -21,4 +27,101 @@ class CRUDTripRequest(CRUDBase[TripDriverRequest, None, None]):
             TripDriverRequest.driver_id == driver_id
         ).all()
 
+    # ✅ OPTIMIZED: listings join the driver/trip columns they show instead of
+    # one crud_driver.get + crud_trip.get per request row
+    def _query_listing(
+        self,
+        db: Session,
+        *,
+        trip_id: Optional[str] = None,
+        driver_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        with_driver: bool = True,
+        with_trip: bool = True
+    ) -> Query:
+        query = self._apply_soft_delete_filter(db.query(TripDriverRequest))
+        if trip_id is not None:
+            query = query.filter(TripDriverRequest.trip_id == trip_id)
+        if driver_id is not None:
+            query = query.filter(TripDriverRequest.driver_id == driver_id)
+        if status:
+            query = query.filter(TripDriverRequest.status == status)
+        if start_date:
+            query = query.filter(TripDriverRequest.created_at >= datetime.combine(start_date, time.min))
+        if end_date:
+            # end_date is inclusive
+            query = query.filter(TripDriverRequest.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        if with_driver:
+            query = query.options(joinedload(TripDriverRequest.driver).load_only(*LISTING_DRIVER_COLUMNS))
+        if with_trip:
+            query = query.options(joinedload(TripDriverRequest.trip).load_only(*LISTING_TRIP_COLUMNS))
+        return query
+
+    def get_listing(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+        trip_id: Optional[str] = None,
+        driver_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        with_driver: bool = True,
+        with_trip: bool = True
+    ) -> List[TripDriverRequest]:
+        """
+        Requests (newest first) with their driver and trip loaded in the same query
+
+        Args:
+            db: Database session
+            skip: Number of records to skip
+            limit: Maximum number of records to return (None for all)
+            trip_id / driver_id: Restrict to one trip or driver
+            status: Request status (PENDING, ACCEPTED, ...)
+            start_date / end_date: Inclusive range on created_at
+            with_driver / with_trip: Which relation to load (`req.driver`, `req.trip`)
+
+        Returns:
+            List of requests
+        """
+        query = self._query_listing(
+            db, trip_id=trip_id, driver_id=driver_id, status=status,
+            start_date=start_date, end_date=end_date, with_driver=with_driver, with_trip=with_trip
+        ).order_by(TripDriverRequest.created_at.desc(), TripDriverRequest.request_id.desc())
+        if skip:
+            query = query.offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_listing_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        trip_id: Optional[str] = None,
+        driver_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        with_driver: bool = True,
+        with_trip: bool = True
+    ) -> Tuple[List[TripDriverRequest], Optional[str]]:
+        """Cursor-paginated get_listing (newest created first)"""
+        query = self._query_listing(
+            db, trip_id=trip_id, driver_id=driver_id, status=status,
+            start_date=start_date, end_date=end_date, with_driver=with_driver, with_trip=with_trip
+        )
+        return self.paginate(query, cursor=cursor, limit=limit, order_by="-created_at")
+
+    def get_with_related(self, db: Session, request_id: str) -> Optional[TripDriverRequest]:
+        """Get one request with its driver and trip listing columns (single query)"""
+        return self._query_listing(db).filter(TripDriverRequest.request_id == request_id).first()
+
+
 crud_trip_request = CRUDTripRequest(TripDriverRequest)
@@ -0,0 +1,93 @@
+"""
+CRUD operations for the uploaded_files content-hash index
+Lets repeated uploads reuse what is already stored instead of compressing and writing it again
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert, Select
+
+from app.crud.async_base import AsyncCRUDBase
+from app.crud.base import CRUDBase
+from app.models import UploadedFile
+
+
+def _upsert(
+    dialect: str,
+    url: str,
+    content_hash: str,
+    size_bytes: int,
+    storage_path: Optional[str],
+    stored_hash: Optional[str]
+) -> Insert:
+    """
+    INSERT of a stored file's row that overwrites the row already there
+
+    One statement, so two first uploads of the same entity file (a client
+    retrying) cannot both INSERT and fail the later commit on the primary key.
+    """
+    now = datetime.utcnow()
+    row = {"url": url, "content_hash": content_hash, "size_bytes": size_bytes, "storage_path": storage_path,
+           "stored_hash": stored_hash, "created_at": now, "updated_at": now}
+    changed = ("content_hash", "size_bytes", "storage_path", "stored_hash", "updated_at")
+    table = UploadedFile.__table__
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(row)
+        return stmt.on_duplicate_key_update(**{c: stmt.inserted[c] for c in changed})
+    from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table).values(row)
+    return stmt.on_conflict_do_update(index_elements=["url"], set_={c: stmt.excluded[c] for c in changed})
+
+
+class CRUDUploadedFile(CRUDBase[UploadedFile, None, None]):
+    """CRUD operations for UploadedFile model"""
+
+    def _by_hash(self, content_hash: str) -> Select:
+        return select(UploadedFile).filter(UploadedFile.content_hash == content_hash).order_by(UploadedFile.created_at)
+
+    def get_by_hash(self, db: Session, content_hash: str) -> List[UploadedFile]:
+        """Stored files with this content (oldest first)"""
+        return list(db.execute(self._by_hash(content_hash)).scalars().all())
+
+    def record(
+        self,
+        db: Session,
+        url: str,
+        content_hash: str,
+        size_bytes: int,
+        storage_path: Optional[str] = None,
+        stored_hash: Optional[str] = None
+    ) -> None:
+        """Insert or update the row of a stored file (upsert); commits with the caller's transaction"""
+        db.execute(_upsert(db.get_bind().dialect.name, url, content_hash, size_bytes, storage_path, stored_hash))
+
+
+class AsyncCRUDUploadedFile(AsyncCRUDBase[UploadedFile, None, None]):
+    """Async paths of CRUDUploadedFile for the upload endpoints"""
+
+    crud: CRUDUploadedFile
+
+    async def get_by_hash(self, db: AsyncSession, content_hash: str) -> List[UploadedFile]:
+        """Stored files with this content (oldest first)"""
+        result = await db.execute(self.crud._by_hash(content_hash))
+        return list(result.scalars().all())
+
+    async def record(
+        self,
+        db: AsyncSession,
+        url: str,
+        content_hash: str,
+        size_bytes: int,
+        storage_path: Optional[str] = None,
+        stored_hash: Optional[str] = None
+    ) -> None:
+        """Insert or update the row of a stored file (upsert); commits with the caller's transaction"""
+        await db.execute(_upsert(db.get_bind().dialect.name, url, content_hash, size_bytes, storage_path, stored_hash))
+
+
+crud_uploaded_file = CRUDUploadedFile(UploadedFile)
+async_crud_uploaded_file = AsyncCRUDUploadedFile(crud_uploaded_file)
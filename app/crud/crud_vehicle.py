@@ -5,6 +5,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 
+from app.crud.async_base import AsyncCRUDBase
 from app.crud.base import CRUDBase
 from app.models import Vehicle
 from app.schemas import VehicleCreate, VehicleUpdate
@@ -35,3 +36,4 @@ class CRUDVehicle(CRUDBase[Vehicle, VehicleCreate, VehicleUpdate]):
 
 
 crud_vehicle = CRUDVehicle(Vehicle)
+async_crud_vehicle = AsyncCRUDBase(crud_vehicle)
@@ -2,11 +2,17 @@
 Database configuration and connection management
 """
 import os
+from contextlib import contextmanager
+from typing import AsyncGenerator, Generator, Iterator
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
 # Load environment variables
 load_dotenv()
 
@@ -21,25 +27,86 @@ DB_NAME = os.getenv("DB_NAME")
 from urllib.parse import quote_plus
 password = quote_plus(DB_PASSWORD) if DB_PASSWORD else ""
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Create SQLAlchemy engine
+# Create SQLAlchemy engine (pool sized from Settings, checkouts timed for /metrics)
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    echo=os.getenv("DEBUG", "False").lower() == "true"
+)
+
+# Async engine for `async def` endpoints (aiomysql driver, separate pool)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
     echo=os.getenv("DEBUG", "False").lower() == "true"
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions keep loaded attributes after commit; lazy loads are not possible there
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class
 Base = declarative_base()
 
-# Dependency to get database session
-def get_db():
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    The one way to open a sync session
+
+    Used by the get_db dependency and by code outside a request (health
+    check, background flushers, startup jobs), so every session returns its
+    connection to the pool and rolls back on errors.
+    """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_db() -> Generator[Session, None, None]:
+    """
+    Database session dependency
+
+    Yields:
+        Database session
+    """
+    with session_scope() as db:
+        yield db
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency (aiomysql)
+
+    Use from `async def` endpoints so the event loop is never blocked on
+    MySQL. Sync CRUD code can still run on it via `await db.run_sync(...)`.
+
+    Yields:
+        Async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,16 +2,78 @@
 Main FastAPI application for Cab Booking System
 """
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
-from app.database import engine, Base
 from app.routers import drivers, vehicles, trips, payments, wallet_transactions, tariff_config, raw_data, uploads, error_handling, trip_requests, admins, analytics, notifications
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import MetricsMiddleware, request_metrics
+from app.core.query_budget import QueryBudgetMiddleware, query_budget_tracker
+from app.core.upload_limit import UploadLimitMiddleware
+from app.services.location_index import refresh_location_index
+from app.services.location_buffer import location_buffer
+from app.services.location_history import location_history
+from app.services.image_pipeline import image_pipeline
+from app.services.tariff_cache import tariff_cache
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
+
+async def _location_index_refresh_loop():
+    """Warm the driver location index and keep it in sync with other workers"""
+    from starlette.concurrency import run_in_threadpool
+
+    while True:
+        try:
+            loaded = await run_in_threadpool(refresh_location_index)
+            logger.debug(f"Driver location index refreshed: {loaded} drivers")
+        except Exception as e:
+            logger.warning(f"Driver location index refresh failed: {e}")
+        await asyncio.sleep(settings.LOCATION_INDEX_REFRESH_SECONDS)
+
+
+def _warm_tariff_cache() -> None:
+    """Load the active tariffs before the first fare is calculated"""
+    from app.database import session_scope
+
+    try:
+        with session_scope() as db:
+            loaded = tariff_cache.load(db)
+        logger.info(f"Tariff cache loaded: {loaded} vehicle types")
+    except Exception as e:
+        logger.warning(f"Tariff cache warm-up failed (loads on first use): {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services"""
+    from starlette.concurrency import run_in_threadpool
+
+    await run_in_threadpool(_warm_tariff_cache)
+    tariff_cache.start()
+    location_buffer.start()
+    location_history.start()
+    refresh_task = asyncio.create_task(_location_index_refresh_loop())
+    yield
+    refresh_task.cancel()
+    tariff_cache.stop()
+    image_pipeline.shutdown()
+    # Flush buffered GPS pings before the worker exits
+    location_buffer.stop()
+    location_history.stop()
+    if settings.QUERY_BUDGET_ENABLED:
+        logger.info("Query budget report:\n" + query_budget_tracker.format_report())
+        if settings.QUERY_BUDGET_REPORT_PATH:
+            query_budget_tracker.write_report(settings.QUERY_BUDGET_REPORT_PATH)
+
+
 # Create FastAPI app
 from fastapi.responses import ORJSONResponse
 
@@ -22,7 +84,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     default_response_class=ORJSONResponse,
-    redirect_slashes=True
+    redirect_slashes=True,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -34,12 +97,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    print("[OK] Database tables created successfully")
-except Exception as e:
-    print(f"[ERROR] Error creating database tables: {e}")
+# Cap multipart upload bodies at UPLOAD_MAX_BYTES while they stream in
+app.add_middleware(UploadLimitMiddleware)
+
+# Per-route request metrics (outermost, so CORS and error responses are counted too)
+app.add_middleware(MetricsMiddleware)
+
+from app.database import engine, async_engine
+request_metrics.instrument_engine(engine)
+request_metrics.instrument_engine(async_engine.sync_engine)
+
+# Opt-in N+1 detector / SQL budget per request (development and CI)
+if settings.QUERY_BUDGET_ENABLED:
+    app.add_middleware(QueryBudgetMiddleware)
+    query_budget_tracker.instrument_engine(engine)
+    query_budget_tracker.instrument_engine(async_engine.sync_engine)
+
+# Schema is managed by Alembic migrations (`alembic upgrade head`), not at import time
 
 # Mount static files for uploads
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
@@ -90,13 +164,14 @@ def read_root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
+    from app.database import session_scope
+    from app.core.db_pool import pool_summary
+    from sqlalchemy import text
+
     try:
         # Test database connection
-        from app.database import SessionLocal
-        from sqlalchemy import text
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        with session_scope() as db:
+            db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -104,44 +179,47 @@ def health_check():
     return {
         "status": "healthy",
         "database": db_status,
+        "pools": {"sync": pool_summary(engine.pool), "async": pool_summary(async_engine.sync_engine.pool)},
+        "image_pipeline": image_pipeline.stats(),
         "version": os.getenv("APP_VERSION", "1.0.0")
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: per-route requests, latency, size and DB usage, plus connection pools"""
+    from fastapi.responses import PlainTextResponse
+    from app.core.db_pool import render_pool_metrics
+
+    # async: rendered on the event loop thread, which is the only writer of request metrics
+    body = request_metrics.render() + render_pool_metrics({"sync": engine.pool, "async": async_engine.sync_engine.pool})
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 @app.get("/api/v1/stats")
 def get_api_stats():
-    """Get basic API statistics"""
+    """Get basic API statistics (shared dashboard aggregation, briefly cached)"""
     try:
-        from app.database import SessionLocal
-        from app.models import Driver, Vehicle, Trip
-        
-        db = SessionLocal()
-        
-        # Get counts
-        total_drivers = db.query(Driver).count()
-        active_drivers = db.query(Driver).filter(Driver.is_available == True).count()
-        total_vehicles = db.query(Vehicle).count()
-        approved_vehicles = db.query(Vehicle).filter(Vehicle.vehicle_approved == True).count()
-        total_trips = db.query(Trip).count()
-        pending_trips = db.query(Trip).filter(Trip.trip_status == "OPEN").count()
-        completed_trips = db.query(Trip).filter(Trip.trip_status == "COMPLETED").count()
+        from app.database import session_scope
+        from app.services.dashboard_stats import dashboard_stats
         
-        db.close()
+        with session_scope() as db:
+            stats = dashboard_stats.get(db)
         
         return {
             "drivers": {
-                "total": total_drivers,
-                "active": active_drivers,
-                "inactive": total_drivers - active_drivers
+                "total": stats.total_drivers,
+                "active": stats.available_drivers,
+                "inactive": stats.total_drivers - stats.available_drivers
             },
             "vehicles": {
-                "total": total_vehicles,
-                "approved": approved_vehicles,
-                "pending_approval": total_vehicles - approved_vehicles
+                "total": stats.total_vehicles,
+                "approved": stats.approved_vehicles,
+                "pending_approval": stats.total_vehicles - stats.approved_vehicles
             },
             "trips": {
-                "total": total_trips,
-                "pending": pending_trips,
-                "completed": completed_trips
+                "total": stats.total_trips,
+                "pending": stats.open_trips,
+                "completed": stats.completed_trips
             }
         }
     except Exception as e:
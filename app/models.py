@@ -2,7 +2,10 @@
 SQLAlchemy models for Cab Booking System
 Fully synced with MySQL database schema
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Date, ForeignKey, DECIMAL, BigInteger, JSON
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Date, ForeignKey, DECIMAL, BigInteger, JSON, LargeBinary, UniqueConstraint, Index
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,6 +13,11 @@ from app.database import Base
 
 class Driver(Base):
     __tablename__ = "drivers"
+    __table_args__ = (
+        Index("ix_drivers_deleted_created", "is_deleted", "created_at"),
+        Index("ix_drivers_deleted_available", "is_deleted", "is_available", "is_approved"),
+        Index("ix_drivers_phone_number", "phone_number"),
+    )
 
     driver_id = Column(String(36), primary_key=True, index=True)
     name = Column(String(100), nullable=True)
@@ -52,14 +60,35 @@ class DriverLiveLocation(Base):
     driver_id = Column(String(36), ForeignKey("drivers.driver_id", ondelete="CASCADE"), primary_key=True)
     latitude = Column(DECIMAL(10, 8), nullable=False)
     longitude = Column(DECIMAL(11, 8), nullable=False)
-    last_updated = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Naive UTC from the app clock, like the pings written by the location buffer
+    # (the location index compares the two; NOW() is in the MySQL session's time zone)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     driver = relationship("Driver", back_populates="live_location")
 
 
+class DriverLocationHistory(Base):
+    """Append-only GPS trail, one row per driver per time window (see app.core.location_codec)"""
+    __tablename__ = "driver_location_history"
+    __table_args__ = (
+        UniqueConstraint("driver_id", "window_start", name="uq_driver_location_history_window"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    driver_id = Column(String(36), ForeignKey("drivers.driver_id", ondelete="CASCADE"), nullable=False)
+    window_start = Column(DateTime, nullable=False)
+    first_point_at = Column(DateTime, nullable=True)
+    last_point_at = Column(DateTime, nullable=True)
+    point_count = Column(Integer, default=0, nullable=False)
+    data = Column(LargeBinary().with_variant(MEDIUMBLOB(), "mysql"), nullable=False)
+
+
 class Vehicle(Base):
     __tablename__ = "vehicles"
+    __table_args__ = (
+        Index("ix_vehicles_driver_deleted", "driver_id", "is_deleted"),
+    )
 
     vehicle_id = Column(String(36), primary_key=True, index=True)
     driver_id = Column(String(36), ForeignKey("drivers.driver_id"), nullable=True)
@@ -91,6 +120,13 @@ class Vehicle(Base):
 
 class Trip(Base):
     __tablename__ = "trips"
+    __table_args__ = (
+        Index("ix_trips_deleted_status_updated", "is_deleted", "trip_status", "updated_at"),
+        Index("ix_trips_deleted_updated", "is_deleted", "updated_at"),
+        Index("ix_trips_deleted_created", "is_deleted", "created_at"),
+        Index("ix_trips_driver_deleted_created", "assigned_driver_id", "is_deleted", "created_at"),
+        Index("ix_trips_status_ended", "trip_status", "ended_at"),
+    )
 
     trip_id = Column(String(36), primary_key=True, index=True)
     customer_name = Column(String(100), nullable=True)
@@ -133,10 +169,71 @@ class Trip(Base):
     assigned_driver = relationship("Driver", back_populates="trips")
     trip_requests = relationship("TripDriverRequest", back_populates="trip")
     wallet_transactions = relationship("WalletTransaction", back_populates="trip")
+    gps_distance = relationship("TripGpsDistance", uselist=False, back_populates="trip")
+
+
+class DriverActiveTrip(Base):
+    """
+    Materialized lookup of ASSIGNED/STARTED trips per driver
+
+    Maintained by CRUDTrip.sync_active_trip whenever a trip's status,
+    driver or deletion flag changes, so driver listings can derive
+    current_status without scanning trip history.
+    """
+    __tablename__ = "driver_active_trips"
+
+    trip_id = Column(String(36), ForeignKey("trips.trip_id", ondelete="CASCADE"), primary_key=True)
+    driver_id = Column(String(36), ForeignKey("drivers.driver_id", ondelete="CASCADE"), nullable=False, index=True)
+    trip_status = Column(String(50), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class TripGpsDistance(Base):
+    """GPS-derived distance of a completed trip, kept next to the odometer distance_km"""
+    __tablename__ = "trip_gps_distance"
+
+    trip_id = Column(String(36), ForeignKey("trips.trip_id", ondelete="CASCADE"), primary_key=True)
+    gps_distance_km = Column(DECIMAL(10, 2), nullable=True)
+    odometer_distance_km = Column(DECIMAL(10, 2), nullable=True)
+    mismatch_percent = Column(DECIMAL(7, 2), nullable=True)
+    is_flagged = Column(Boolean, default=False, index=True)
+    point_count = Column(Integer, default=0)
+    rejected_points = Column(Integer, default=0)
+    computed_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Relationships
+    trip = relationship("Trip", back_populates="gps_distance")
+
+
+class DailyRevenueRollup(Base):
+    """
+    Completed-trip revenue per day (trip created_at date), vehicle type and trip type
+
+    Kept up to date incrementally by app.crud.crud_revenue whenever a trip
+    flush changes its completed revenue; rebuild with
+    `python -m scripts.rebuild_revenue_rollup`. NULL vehicle/trip types are
+    stored as "".
+    """
+    __tablename__ = "daily_revenue_rollup"
+
+    revenue_date = Column(Date, primary_key=True)
+    vehicle_type = Column(String(50), primary_key=True, default="")
+    trip_type = Column(String(50), primary_key=True, default="")
+    trip_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(14, 2), nullable=False, default=0)       # sum of total_amount
+    fare = Column(DECIMAL(14, 2), nullable=False, default=0)
+    commission = Column(DECIMAL(14, 2), nullable=False, default=0)    # platform commission on fare, at the tariff rate
+    extras = Column(DECIMAL(14, 2), nullable=False, default=0)        # waiting, toll, allowances, permits, luggage, pet
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
 
 class TripDriverRequest(Base):
     __tablename__ = "trip_driver_requests"
+    __table_args__ = (
+        Index("ix_trip_requests_trip_deleted", "trip_id", "is_deleted"),
+        Index("ix_trip_requests_driver_deleted_created", "driver_id", "is_deleted", "created_at"),
+        Index("ix_trip_requests_deleted_created", "is_deleted", "created_at"),
+    )
 
     request_id = Column(String(36), primary_key=True, index=True)
     trip_id = Column(String(36), ForeignKey("trips.trip_id"), nullable=True)
@@ -154,6 +251,11 @@ class TripDriverRequest(Base):
 
 class PaymentTransaction(Base):
     __tablename__ = "payment_transactions"
+    __table_args__ = (
+        Index("ix_payments_driver_deleted_created", "driver_id", "is_deleted", "created_at"),
+        Index("ix_payments_trip_deleted", "trip_id", "is_deleted"),
+        Index("ix_payments_deleted_created", "is_deleted", "created_at"),
+    )
 
     payment_id = Column(String(36), primary_key=True, index=True)
     driver_id = Column(String(36), ForeignKey("drivers.driver_id"), nullable=True)
@@ -177,6 +279,10 @@ class PaymentTransaction(Base):
 
 class WalletTransaction(Base):
     __tablename__ = "wallet_transactions"
+    __table_args__ = (
+        Index("ix_wallet_driver_deleted_created", "driver_id", "is_deleted", "created_at"),
+        Index("ix_wallet_deleted_created", "is_deleted", "created_at"),
+    )
 
     wallet_id = Column(String(36), primary_key=True, index=True)
     driver_id = Column(String(36), ForeignKey("drivers.driver_id"), nullable=True)
@@ -197,6 +303,9 @@ class WalletTransaction(Base):
 
 class VehicleTariffConfig(Base):
     __tablename__ = "vehicle_tariff_config"
+    __table_args__ = (
+        Index("ix_tariff_vehicle_type_active", "vehicle_type", "is_active", "is_deleted"),
+    )
 
     tariff_id = Column(String(36), primary_key=True, index=True)
     vehicle_type = Column(String(50), nullable=True)
@@ -213,6 +322,43 @@ class VehicleTariffConfig(Base):
     deleted_at = Column(DateTime, nullable=True)
 
 
+class CacheVersion(Base):
+    """
+    Version stamp per in-process cache
+
+    Writers bump `version` in the same transaction as the data they change;
+    every worker polls the stamp and reloads its copy when it moved (see
+    app.services.tariff_cache).
+    """
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class UploadedFile(Base):
+    """
+    Content-hash index of stored uploads (hash -> URL)
+
+    One row per stored file, keyed by its public URL. `content_hash` is the
+    SHA-256 of the bytes as uploaded (before compression), so a repeated upload
+    is recognised before any work is done (see app.crud.crud_upload). Files
+    (app.routers.uploads names them after the entity and overwrites them on
+    re-upload) are only reused by linking, after `stored_hash` (SHA-256 of
+    the file as stored) confirmed the file is still the one indexed.
+    """
+    __tablename__ = "uploaded_files"
+
+    url = Column(String(500), primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    storage_path = Column(String(500), nullable=True)  # local file
+    size_bytes = Column(BigInteger, nullable=False, default=0)  # as stored
+    stored_hash = Column(String(64), nullable=True)  # SHA-256 of the local file as stored
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
 class ErrorHandling(Base):
     __tablename__ = "error_handling"
 
@@ -3,10 +3,9 @@ Analytics API endpoints for admin dashboard
 """
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from app.database import get_db
-from app.models import Trip, Driver
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_async_db
+from app.crud.crud_revenue import crud_revenue_rollup
 from app.schemas import (
     DashboardSummaryResponse, MonthlyRevenueResponse, MonthlyRevenueItem,
     VehicleTypeRevenueResponse, VehicleTypeRevenueItem
@@ -14,85 +13,29 @@ from app.schemas import (
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
+from app.services.dashboard_stats import dashboard_stats
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/dashboard", response_model=DashboardSummaryResponse)
-def get_dashboard_summary(db: Session = Depends(get_db)):
+async def get_dashboard_summary(db: AsyncSession = Depends(get_async_db)):
     """Get dashboard summary statistics"""
     try:
-        # Total revenue from completed trips
-        total_revenue = db.query(func.sum(Trip.total_amount)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED"
-        ).scalar() or Decimal('0')
-        
-        # Today's revenue
-        today = date.today()
-        today_revenue = db.query(func.sum(Trip.total_amount)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED",
-            func.date(Trip.created_at) == today
-        ).scalar() or Decimal('0')
-        
-        # Total trips
-        total_trips = db.query(func.count(Trip.trip_id)).filter(Trip.is_deleted == False).scalar() or 0
-        
-        # Today's trips
-        today_trips = db.query(func.count(Trip.trip_id)).filter(
-            Trip.is_deleted == False,
-            func.date(Trip.created_at) == today
-        ).scalar() or 0
-        
-        # Driver statistics
-        total_drivers = db.query(func.count(Driver.driver_id)).filter(Driver.is_deleted == False).scalar() or 0
-        active_drivers = db.query(func.count(Driver.driver_id)).filter(
-            Driver.is_deleted == False,
-            Driver.is_available == True,
-            Driver.is_approved == True
-        ).scalar() or 0
-        
-        # Trip status counts
-        completed_trips = db.query(func.count(Trip.trip_id)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED"
-        ).scalar() or 0
-        
-        cancelled_trips = db.query(func.count(Trip.trip_id)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "CANCELLED"
-        ).scalar() or 0
-        
-        # Assigned trips (ASSIGNED or STARTED status)
-        assigned_trips = db.query(func.count(Trip.trip_id)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status.in_(["ASSIGNED", "STARTED"])
-        ).scalar() or 0
-        
-        # Pending trips (OPEN status)
-        pending_trips = db.query(func.count(Trip.trip_id)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "OPEN"
-        ).scalar() or 0
-        
-        # In progress trips (STARTED status)
-        in_progress_trips = db.query(func.count(Trip.trip_id)).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "STARTED"
-        ).scalar() or 0
+        # ✅ OPTIMIZED: One conditional-aggregation pass per table, cached for a few seconds
+        stats = await dashboard_stats.get_async(db)
         
         return DashboardSummaryResponse(
-            total_revenue=total_revenue,
-            today_revenue=today_revenue,
-            total_trips=total_trips,
-            today_trips=today_trips,
-            active_drivers=active_drivers,
-            total_drivers=total_drivers,
-            completed_trips=completed_trips,
-            cancelled_trips=cancelled_trips,
-            assigned_trips=assigned_trips,
-            pending_trips=pending_trips,
-            in_progress_trips=in_progress_trips
+            total_revenue=stats.total_revenue,
+            today_revenue=stats.today_revenue,
+            total_trips=stats.total_trips,
+            today_trips=stats.today_trips,
+            active_drivers=stats.active_drivers,
+            total_drivers=stats.total_drivers,
+            completed_trips=stats.completed_trips,
+            cancelled_trips=stats.cancelled_trips,
+            assigned_trips=stats.assigned_trips + stats.started_trips,
+            pending_trips=stats.open_trips,
+            in_progress_trips=stats.started_trips
         )
     except Exception as e:
         raise HTTPException(
@@ -101,24 +44,14 @@ def get_dashboard_summary(db: Session = Depends(get_db)):
         )
 
 @router.get("/revenue/monthly", response_model=MonthlyRevenueResponse)
-def get_monthly_revenue(
+async def get_monthly_revenue(
     year: int = Query(..., description="Year for monthly revenue breakdown"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get monthly revenue breakdown for a specific year"""
     try:
-        # Query monthly revenue data
-        monthly_data = db.query(
-            extract('month', Trip.created_at).label('month'),
-            func.sum(Trip.total_amount).label('revenue'),
-            func.count(Trip.trip_id).label('trips')
-        ).filter(
-            Trip.is_deleted == False,
-            extract('year', Trip.created_at) == year,
-            Trip.trip_status == "COMPLETED"
-        ).group_by(
-            extract('month', Trip.created_at)
-        ).all()
+        # ✅ OPTIMIZED: Pre-aggregated days from daily_revenue_rollup
+        monthly_data = await db.run_sync(crud_revenue_rollup.get_monthly, date(year, 1, 1), date(year, 12, 31))
         
         # Month names mapping
         month_names = {
@@ -169,28 +102,17 @@ def get_monthly_revenue(
         )
 
 @router.get("/revenue/vehicle-type", response_model=VehicleTypeRevenueResponse)
-def get_revenue_by_vehicle_type(
+async def get_revenue_by_vehicle_type(
     year: Optional[int] = Query(None, description="Year filter (optional)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get revenue breakdown by vehicle type"""
     try:
-        # Base query
-        query = db.query(
-            Trip.vehicle_type,
-            func.sum(Trip.total_amount).label('revenue'),
-            func.count(Trip.trip_id).label('trips')
-        ).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED"
-        )
-        
-        # Add year filter if provided
+        # ✅ OPTIMIZED: Grouped from daily_revenue_rollup (year filter is a date range)
         if year:
-            query = query.filter(extract('year', Trip.created_at) == year)
-        
-        # Group by vehicle type
-        vehicle_data = query.group_by(Trip.vehicle_type).all()
+            vehicle_data = await db.run_sync(crud_revenue_rollup.get_by_vehicle_type, date(year, 1, 1), date(year, 12, 31))
+        else:
+            vehicle_data = await db.run_sync(crud_revenue_rollup.get_by_vehicle_type)
         
         # Calculate total revenue for percentage calculation
         total_revenue = sum(data.revenue or Decimal('0') for data in vehicle_data)
@@ -223,30 +145,15 @@ def get_revenue_by_vehicle_type(
         )
 
 @router.get("/revenue/12-months")
-def get_12_months_revenue(db: Session = Depends(get_db)):
+async def get_12_months_revenue(db: AsyncSession = Depends(get_async_db)):
     """Get revenue for the last 12 months from current date"""
     try:
         current_date = date.today()
         start_date = current_date - relativedelta(months=11)
         start_date = start_date.replace(day=1)  # Start from first day of month
         
-        # Query monthly revenue for last 12 months
-        monthly_data = db.query(
-            extract('year', Trip.created_at).label('year'),
-            extract('month', Trip.created_at).label('month'),
-            func.sum(Trip.total_amount).label('revenue'),
-            func.count(Trip.trip_id).label('trips')
-        ).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED",
-            func.date(Trip.created_at) >= start_date
-        ).group_by(
-            extract('year', Trip.created_at),
-            extract('month', Trip.created_at)
-        ).order_by(
-            extract('year', Trip.created_at),
-            extract('month', Trip.created_at)
-        ).all()
+        # ✅ OPTIMIZED: Monthly totals from daily_revenue_rollup
+        monthly_data = await db.run_sync(crud_revenue_rollup.get_monthly, start_date, current_date)
         
         # Month names mapping
         month_names = {
@@ -303,10 +210,10 @@ def get_12_months_revenue(db: Session = Depends(get_db)):
 
 @router.get("/revenue-history/")
 @router.get("/revenue/range", include_in_schema=False)
-def get_revenue_by_date_range(
+async def get_revenue_by_date_range(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get revenue for a specific date range"""
     try:
@@ -316,36 +223,15 @@ def get_revenue_by_date_range(
                 detail="Start date must be before end date"
             )
         
-        # Query revenue in date range
-        revenue_data = db.query(
-            func.sum(Trip.total_amount).label('total_revenue'),
-            func.count(Trip.trip_id).label('total_trips')
-        ).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED",
-            func.date(Trip.created_at) >= start_date,
-            func.date(Trip.created_at) <= end_date
-        ).first()
-        
-        # Daily breakdown
-        daily_data = db.query(
-            func.date(Trip.created_at).label('date'),
-            func.sum(Trip.total_amount).label('revenue'),
-            func.count(Trip.trip_id).label('trips')
-        ).filter(
-            Trip.is_deleted == False,
-            Trip.trip_status == "COMPLETED",
-            func.date(Trip.created_at) >= start_date,
-            func.date(Trip.created_at) <= end_date
-        ).group_by(
-            func.date(Trip.created_at)
-        ).all()
+        # ✅ OPTIMIZED: O(days) reads from daily_revenue_rollup
+        revenue_data = await db.run_sync(crud_revenue_rollup.get_totals, start_date, end_date)
+        daily_data = await db.run_sync(crud_revenue_rollup.get_daily, start_date, end_date)
         
         return {
             "start_date": start_date,
             "end_date": end_date,
-            "total_revenue": revenue_data.total_revenue or Decimal('0'),
-            "total_trips": revenue_data.total_trips or 0,
+            "total_revenue": revenue_data.revenue or Decimal('0'),
+            "total_trips": revenue_data.trips or 0,
             "daily_breakdown": [
                 {
                     "date": data.date,
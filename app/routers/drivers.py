@@ -2,16 +2,30 @@
 Driver API endpoints - OPTIMIZED
 Uses CRUD layer for production-ready performance
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+from typing import List, Optional
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from app.api.deps import get_db
-from app.crud import crud_driver
-from app.schemas import DriverCreate, DriverUpdate, FCMTokenRequest, FCMTokenResponse
+from app.api.deps import get_async_db, get_db
+from app.crud import async_crud_driver_location, crud_driver
+from app.core.serializers import DRIVER_ENCODER, DRIVER_IMAGE_FIELDS
+from app.schemas import (
+    DriverCreate, DriverUpdate, FCMTokenRequest, FCMTokenResponse,
+    DriverLocationPoints, LocationBatchRequest, LocationBatchResponse
+)
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.core.constants import ErrorCode, KYCStatus
+from app.services.location_index import location_index, derive_current_status, driver_attributes_query
+from app.services.location_buffer import location_buffer, LocationBufferFull
+from app.services.location_history import location_history
+from app.services.driver_stream import driver_stream_hub, parse_bbox
 import uuid
 
 logger = get_logger(__name__)
@@ -24,53 +38,56 @@ class ApprovalRequest(BaseModel):
 router = APIRouter(prefix="/drivers", tags=["drivers"])
 
 
+def _with_current_status(db: Session, drivers: list) -> list:
+    """Fill current_status of DRIVER_ENCODER records from the driver_active_trips lookup"""
+    from app.crud import crud_trip
+
+    # ✅ OPTIMIZED: one lookup for the whole page, never the trip history
+    active_statuses = crud_trip.get_active_trip_statuses(db, [d.driver_id for d in drivers])
+    for driver in drivers:
+        driver.current_status = derive_current_status(active_statuses.get(driver.driver_id), driver.is_available)
+    return drivers
+
+
+def _with_renditions(drivers: list) -> list:
+    """Fill renditions of DRIVER_ENCODER records: thumbnail URLs for the admin grids"""
+    from app.routers.uploads import image_renditions
+
+    for driver in drivers:
+        driver.renditions = image_renditions(driver, DRIVER_IMAGE_FIELDS)
+    return drivers
+
+
 @router.get("", response_model=None, include_in_schema=False)
 @router.get("/", response_model=None)
 def get_all_drivers(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all drivers with pagination - OPTIMIZED"""
+    """
+    Get all drivers with pagination - OPTIMIZED
+    
+    Passing `cursor` (empty for the first page) switches from skip/limit to
+    keyset pagination on (created_at, driver_id) and returns
+    {"items": [...], "next_cursor": ...}.
+    """
     try:
-        from sqlalchemy.orm import joinedload
-        from app.models import Driver
-        
-        # ✅ OPTIMIZED: Using joinedload to get trips in one query for status calculation
-        drivers = db.query(Driver).filter(Driver.is_deleted == False).options(joinedload(Driver.trips)).offset(skip).limit(limit).all()
-        
-        # Convert to dict to avoid validation issues
-        result = []
-        for driver in drivers:
-            result.append({
-                "driver_id": driver.driver_id,
-                "name": driver.name,
-                "phone_number": str(driver.phone_number),
-                "email": driver.email,
-                "kyc_verified": driver.kyc_verified,
-                "primary_location": driver.primary_location,
-                "photo_url": driver.photo_url,
-                "aadhar_url": driver.aadhar_url,
-                "licence_url": driver.licence_url,
-                "licence_number": driver.licence_number,
-                "aadhar_number": driver.aadhar_number,
-                "licence_expiry": driver.licence_expiry.isoformat() if driver.licence_expiry else None,
-                "wallet_balance": float(driver.wallet_balance) if driver.wallet_balance else 0.0,
-                "device_id": driver.device_id,
-                "fcm_tokens": driver.fcm_tokens,
-                "is_available": driver.is_available,
-                "current_status": (
-                    "driving" if any(t.trip_status == "STARTED" for t in driver.trips if t.trip_status in ["ASSIGNED", "STARTED"]) else
-                    "busy" if any(t.trip_status == "ASSIGNED" for t in driver.trips if t.trip_status in ["ASSIGNED", "STARTED"]) else
-                    "offline" if driver.is_available is False else "available"
-                ),
-                "is_approved": driver.is_approved,
-                "errors": driver.errors,
-                "created_at": driver.created_at.isoformat() if driver.created_at else None,
-                "updated_at": driver.updated_at.isoformat() if driver.updated_at else None,
-                "police_verification_url": driver.police_verification_url
-            })
-        return result
+        # ✅ OPTIMIZED: Column projection straight to orjson (no ORM objects, no per-row dicts)
+        next_cursor = None
+        if cursor is not None:
+            # ✅ OPTIMIZED: Keyset pagination, newest drivers first
+            drivers, next_cursor = crud_driver.get_page_projected(db, DRIVER_ENCODER, cursor=cursor or None, limit=limit, order_by="-created_at")
+        else:
+            drivers = crud_driver.get_multi_projected(db, DRIVER_ENCODER, skip=skip, limit=limit)
+        _with_current_status(db, drivers)
+        _with_renditions(drivers)
+        if cursor is not None:
+            return ORJSONResponse({"items": drivers, "next_cursor": next_cursor})
+        return ORJSONResponse(drivers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching drivers: {e}", exc_info=True)
         raise HTTPException(
@@ -80,14 +97,13 @@ def get_all_drivers(
 
 
 @router.get("/locations")
-def get_all_driver_locations(db: Session = Depends(get_db)):
+async def get_all_driver_locations(db: AsyncSession = Depends(get_async_db)):
     """Get all drivers with their real-time GPS location - ENHANCED with categories"""
-    from app.models import Driver, DriverLiveLocation, Trip
-    from sqlalchemy import and_
+    from app.models import Driver, DriverLiveLocation, DriverActiveTrip
     
-    # Query join between Driver and LiveLocation, and outer join with active Trips
-    # We only care about trips that are currently ASSIGNED or STARTED
-    results = db.query(
+    # Query join between Driver and LiveLocation, and outer join with the
+    # driver_active_trips lookup (only ASSIGNED or STARTED trips live there)
+    results = await db.execute(select(
         Driver.driver_id,
         Driver.name.label("driver_name"),
         Driver.photo_url,
@@ -96,15 +112,12 @@ def get_all_driver_locations(db: Session = Depends(get_db)):
         DriverLiveLocation.latitude,
         DriverLiveLocation.longitude,
         DriverLiveLocation.last_updated,
-        Trip.trip_status.label("active_trip_status")
+        DriverActiveTrip.trip_status.label("active_trip_status")
     ).filter(Driver.is_deleted == False).join(
         DriverLiveLocation, Driver.driver_id == DriverLiveLocation.driver_id
     ).outerjoin(
-        Trip, and_(
-            Driver.driver_id == Trip.assigned_driver_id,
-            Trip.trip_status.in_(["ASSIGNED", "STARTED"])
-        )
-    ).all()
+        DriverActiveTrip, Driver.driver_id == DriverActiveTrip.driver_id
+    ))
     
     response = []
     for r in results:
@@ -131,6 +144,217 @@ def get_all_driver_locations(db: Session = Depends(get_db)):
         
     return response
 
+
+def _sse_event(event: str, payload: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _bbox_or_400(min_lat, min_lng, max_lat, max_lng):
+    try:
+        return parse_bbox(min_lat, min_lng, max_lat, max_lng)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/locations/stream")
+async def stream_driver_locations(
+    request: Request,
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lng: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lng: Optional[float] = Query(None, ge=-180, le=180),
+):
+    """
+    Server-Sent Events feed for the admin map - served from the in-memory location index
+
+    Sends a `snapshot` event, then a `delta` event per tick with the drivers
+    whose position or current_status changed (coalesced) and those that left
+    the viewport.
+    """
+    bbox = _bbox_or_400(min_lat, min_lng, max_lat, max_lng)
+
+    async def event_stream():
+        subscription = driver_stream_hub.subscribe(bbox)
+        try:
+            yield _sse_event("snapshot", subscription.snapshot())
+            idle = 0.0
+            while not await request.is_disconnected():
+                await asyncio.sleep(driver_stream_hub.tick_seconds)
+                delta = subscription.poll()
+                if delta is not None:
+                    idle = 0.0
+                    yield _sse_event("delta", delta)
+                else:
+                    idle += driver_stream_hub.tick_seconds
+                    if idle >= driver_stream_hub.heartbeat_seconds:
+                        idle = 0.0
+                        yield b": keep-alive\n\n"
+        finally:
+            driver_stream_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/locations/ws")
+async def driver_locations_websocket(websocket: WebSocket):
+    """
+    WebSocket variant of the admin map feed
+
+    Messages: {"type": "snapshot", ...} then {"type": "delta", ...} every
+    tick, however often the client sends. The client may send
+    {"bbox": [min_lat, min_lng, max_lat, max_lng]} (or {"bbox": null}) at any
+    time to pan the viewport and get a new snapshot; invalid messages are
+    answered with {"type": "error"}. Pings handled by other workers arrive
+    with the index refresh (see DriverStreamHub).
+    """
+    params = websocket.query_params
+    try:
+        bbox = parse_bbox(*(
+            float(params[name]) if params.get(name) else None
+            for name in ("min_lat", "min_lng", "max_lat", "max_lng")
+        ))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    await websocket.accept()
+    subscription = driver_stream_hub.subscribe(bbox)
+    try:
+        await websocket.send_json({"type": "snapshot", **subscription.snapshot()})
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + driver_stream_hub.tick_seconds
+        while True:
+            # Wait for a client message only until the next tick, so deltas keep flowing
+            message = None
+            try:
+                message = await asyncio.wait_for(websocket.receive_json(), timeout=max(0.0, next_tick - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": f"Invalid JSON: {e}"})
+
+            if isinstance(message, dict) and "bbox" in message:
+                try:
+                    new_bbox = parse_bbox(*message["bbox"]) if message["bbox"] else None
+                except (TypeError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                else:
+                    await websocket.send_json({"type": "snapshot", **subscription.set_bbox(new_bbox)})
+
+            if loop.time() >= next_tick:
+                next_tick = loop.time() + driver_stream_hub.tick_seconds
+                delta = subscription.poll()
+                if delta is not None:
+                    await websocket.send_json({"type": "delta", **delta})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        driver_stream_hub.unsubscribe(subscription)
+
+
+@router.get("/nearby")
+def get_nearby_drivers(
+    lat: float = Query(..., ge=-90, le=90, description="Pickup latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Pickup longitude"),
+    radius_km: float = Query(5.0, gt=0, description="Search radius in km"),
+    k: int = Query(10, ge=1, le=100, description="Maximum number of drivers to return"),
+    vehicle_type: Optional[str] = Query(None, description="Optional vehicle type filter"),
+):
+    """Get the k nearest available approved drivers around a point - served from the in-memory location index"""
+    if radius_km > settings.NEARBY_MAX_RADIUS_KM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"radius_km must not exceed {settings.NEARBY_MAX_RADIUS_KM}"
+        )
+
+    matches = location_index.nearest(lat, lng, radius_km, k=k, vehicle_type=vehicle_type)
+
+    return [
+        {
+            "driver_id": entry.driver_id,
+            "driver_name": entry.driver_name,
+            "vehicle_type": entry.vehicle_type,
+            "latitude": entry.latitude,
+            "longitude": entry.longitude,
+            "distance_km": round(distance, 3),
+            "current_status": entry.current_status,
+            "last_updated": entry.last_updated.isoformat() if entry.last_updated else None
+        }
+        for distance, entry in matches
+    ]
+
+
+def _ingest_location_batch(db: Session, batches: List[tuple]) -> LocationBatchResponse:
+    """
+    Store the newest point per driver of a replayed batch
+
+    Every point is validated and recorded in the location history, but only
+    the latest fix of each driver is kept in driver_live_location and all
+    drivers are written with one INSERT ... ON DUPLICATE KEY UPDATE.
+    """
+    from datetime import datetime, timezone
+    from app.crud.crud_location import crud_driver_location
+
+    now = datetime.utcnow()
+    newest = {}
+    trails = {}
+    points_received = 0
+    for driver_id, points in batches:
+        points_received += len(points)
+        trail = trails.setdefault(driver_id, [])
+        for point in points:
+            recorded_at = point.recorded_at
+            if recorded_at.tzinfo is not None:
+                recorded_at = recorded_at.astimezone(timezone.utc).replace(tzinfo=None)
+            # Device clocks drift; never let a fix claim to be from the future
+            recorded_at = min(recorded_at, now)
+            trail.append((recorded_at, point.latitude, point.longitude))
+            current = newest.get(driver_id)
+            if current is None or recorded_at >= current[2]:
+                newest[driver_id] = (point.latitude, point.longitude, recorded_at)
+
+    # ✅ OPTIMIZED: Drivers already in the location index are known; only cold ids hit the DB
+    unknown_ids = [driver_id for driver_id in newest if driver_id not in location_index]
+    missing = set()
+    if unknown_ids:
+        missing = set(unknown_ids) - crud_driver_location.get_existing_driver_ids(db, unknown_ids)
+        for driver_id in missing:
+            newest.pop(driver_id)
+
+    rows = [
+        {"driver_id": driver_id, "latitude": lat, "longitude": lng, "last_updated": ts}
+        for driver_id, (lat, lng, ts) in newest.items()
+    ]
+    written = crud_driver_location.upsert_many(db, rows, batch_size=max(len(rows), 1), verify_drivers=False)
+
+    for driver_id, (lat, lng, ts) in newest.items():
+        location_index.upsert_location(driver_id, lat, lng, ts)
+        # Every replayed point goes to the history trail, not just the newest
+        location_history.record_many(driver_id, trails[driver_id])
+
+    return LocationBatchResponse(
+        status="success",
+        points_received=points_received,
+        drivers_updated=written,
+        unknown_driver_ids=sorted(missing)
+    )
+
+
+@router.post("/locations/batch", response_model=LocationBatchResponse)
+def update_driver_locations_batch(payload: LocationBatchRequest, db: Session = Depends(get_db)):
+    """Replay queued GPS points of many drivers - newest point per driver written in a single upsert"""
+    try:
+        return _ingest_location_batch(db, [(item.driver_id, item.points) for item in payload.drivers])
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error ingesting location batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get("/fcm/all")
 def get_all_fcm_tokens(db: Session = Depends(get_db)):
     """Get all registered FCM tokens from all drivers for bulk notification list"""
@@ -180,46 +404,16 @@ def check_phone_number(payload: dict, db: Session = Depends(get_db)):
 def get_driver_by_id(driver_id: str, db: Session = Depends(get_db)):
     """Get driver by ID - OPTIMIZED"""
     try:
-        from sqlalchemy.orm import joinedload
-        from app.models import Driver
-        
-        # ✅ OPTIMIZED: Eager load trips for status calculation
-        driver = db.query(Driver).filter(Driver.is_deleted == False).options(joinedload(Driver.trips)).filter(Driver.driver_id == driver_id).first()
+        # ✅ OPTIMIZED: Same projection and encoder as the driver list
+        drivers = crud_driver.get_multi_projected(db, DRIVER_ENCODER, limit=1, filters={"driver_id": driver_id})
         
-        if not driver:
+        if not drivers:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail={"error_code": ErrorCode.DRIVER_NOT_FOUND, "message": "Driver not found"}
             )
         
-        return {
-            "driver_id": driver.driver_id,
-            "name": driver.name,
-            "phone_number": str(driver.phone_number),
-            "email": driver.email,
-            "kyc_verified": driver.kyc_verified,
-            "primary_location": driver.primary_location,
-            "photo_url": driver.photo_url,
-            "aadhar_url": driver.aadhar_url,
-            "licence_url": driver.licence_url,
-            "licence_number": driver.licence_number,
-            "aadhar_number": driver.aadhar_number,
-            "licence_expiry": driver.licence_expiry.isoformat() if driver.licence_expiry else None,
-            "wallet_balance": float(driver.wallet_balance) if driver.wallet_balance else 0.0,
-            "device_id": driver.device_id,
-            "fcm_tokens": driver.fcm_tokens,
-            "is_available": driver.is_available,
-            "current_status": (
-                "driving" if any(t.trip_status == "STARTED" for t in driver.trips if t.trip_status in ["ASSIGNED", "STARTED"]) else
-                "busy" if any(t.trip_status == "ASSIGNED" for t in driver.trips if t.trip_status in ["ASSIGNED", "STARTED"]) else
-                "offline" if driver.is_available is False else "available"
-            ),
-            "is_approved": driver.is_approved,
-            "errors": driver.errors,
-            "created_at": driver.created_at.isoformat() if driver.created_at else None,
-            "updated_at": driver.updated_at.isoformat() if driver.updated_at else None,
-            "police_verification_url": driver.police_verification_url
-        }
+        return ORJSONResponse(_with_renditions(_with_current_status(db, drivers))[0])
     except HTTPException:
         raise
     except Exception as e:
@@ -327,6 +521,7 @@ def update_driver_availability(
                 detail="Driver not found"
             )
         
+        location_index.update_attributes(driver_id, is_available=is_available)
         logger.info(f"Driver {driver_id} availability updated to {is_available}")
         
         return {
@@ -404,6 +599,7 @@ def approve_driver(
         driver.is_approved = is_approved
         db.commit()
         db.refresh(driver)
+        location_index.update_attributes(driver_id, is_approved=is_approved)
         
         status_text = "approved" if is_approved else "disapproved"
         logger.info(f"Driver {driver_id} {status_text}")
@@ -500,6 +696,7 @@ def delete_driver(driver_id: str, db: Session = Depends(get_db)):
                 detail="Driver not found"
             )
         
+        location_index.remove(driver_id)
         logger.info(f"Driver deleted: {driver_id}")
         
         return {
@@ -667,10 +864,9 @@ def clear_driver_errors(driver_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/{driver_id}/location")
-def update_driver_location(driver_id: str, payload: dict, db: Session = Depends(get_db)):
-    """Update driver's real-time GPS location - saves to driver_live_location table"""
-    from app.models import DriverLiveLocation
-    from decimal import Decimal
+async def update_driver_location(driver_id: str, payload: dict, db: AsyncSession = Depends(get_async_db)):
+    """Update driver's real-time GPS location - buffered and flushed to driver_live_location in batches"""
+    from datetime import datetime
 
     latitude = payload.get("latitude")
     longitude = payload.get("longitude")
@@ -681,37 +877,69 @@ def update_driver_location(driver_id: str, payload: dict, db: Session = Depends(
             detail="latitude and longitude are required"
         )
 
-    driver = crud_driver.get(db, id=driver_id)
-    if not driver:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Driver not found")
-
-    # Upsert into driver_live_location
-    existing = db.query(DriverLiveLocation).filter(
-        DriverLiveLocation.driver_id == driver_id
-    ).first()
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="latitude and longitude must be numbers"
+        )
 
-    if existing:
-        existing.latitude = Decimal(str(latitude))
-        existing.longitude = Decimal(str(longitude))
-    else:
-        db.add(DriverLiveLocation(
-            driver_id=driver_id,
-            latitude=Decimal(str(latitude)),
-            longitude=Decimal(str(longitude))
-        ))
+    # ✅ OPTIMIZED: Drivers already in the location index skip the DB lookup entirely
+    attributes = {}
+    if driver_id not in location_index:
+        # Everything dispatch filters on (vehicle type, active trip) in one query,
+        # so a driver mid-trip is not offered until the next index refresh
+        row = (await db.execute(driver_attributes_query(driver_id))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Driver not found")
+        attributes = row._asdict()
+
+    received_at = datetime.utcnow()
+    try:
+        location_buffer.submit(driver_id, lat, lng, received_at)
+    except LocationBufferFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Location service busy, retry shortly",
+            headers={"Retry-After": str(max(1, int(location_buffer.flush_interval)))}
+        )
 
-    db.commit()
+    # Indexed only once the buffer accepted the ping
+    location_index.upsert_location(driver_id, lat, lng, received_at, **attributes)
+    location_history.record(driver_id, lat, lng, received_at)
     return {"status": "success", "message": "Location updated", "driver_id": driver_id, "latitude": latitude, "longitude": longitude}
 
 
+@router.post("/{driver_id}/locations/batch", response_model=LocationBatchResponse)
+def update_driver_location_batch(driver_id: str, payload: DriverLocationPoints, db: Session = Depends(get_db)):
+    """Replay GPS points a driver queued while offline - only the newest point is stored"""
+    try:
+        result = _ingest_location_batch(db, [(driver_id, payload.points)])
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error ingesting location batch for driver {driver_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if result.unknown_driver_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Driver not found")
+    return result
+
+
 @router.get("/{driver_id}/location")
-def get_driver_location(driver_id: str, db: Session = Depends(get_db)):
+async def get_driver_location(driver_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get driver's current real-time GPS location"""
-    from app.models import DriverLiveLocation
+    # Serve from the index first: it already includes pings not yet flushed to MySQL
+    entry = location_index.get(driver_id)
+    if entry is not None and entry.last_updated is not None:
+        return {
+            "driver_id": driver_id,
+            "latitude": entry.latitude,
+            "longitude": entry.longitude,
+            "last_updated": entry.last_updated.isoformat()
+        }
 
-    location = db.query(DriverLiveLocation).filter(
-        DriverLiveLocation.driver_id == driver_id
-    ).first()
+    location = await async_crud_driver_location.get(db, driver_id)
 
     if not location:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Location not available for this driver")
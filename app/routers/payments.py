@@ -1,18 +1,20 @@
 """
 Payment API endpoints with Razorpay integration
 """
-from typing import List
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import PaymentTransaction
-from app.schemas import PaymentTransactionCreate, PaymentTransactionUpdate, PaymentTransactionResponse
+from app.schemas import CursorPage, PaymentTransactionCreate, PaymentTransactionUpdate, PaymentTransactionResponse
 import uuid
 import hmac
 import hashlib
 import os
 from app.models import WalletTransaction, Driver, PaymentTransaction
 from app.crud.crud_payment import crud_payment
+from app.core.serializers import PAYMENT_ENCODER
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
@@ -21,18 +23,25 @@ router = APIRouter(prefix="/payments", tags=["payments"])
 def get_payments_by_trip(trip_id: str, db: Session = Depends(get_db)):
     """Get all payments for a specific trip"""
     payments = crud_payment.get_by_trip(db, trip_id=trip_id)
-    return payments
+    return ORJSONResponse(PAYMENT_ENCODER.encode_many(payments))
 
-@router.get("/", response_model=List[PaymentTransactionResponse])
+@router.get("/", response_model=Union[List[PaymentTransactionResponse], CursorPage[PaymentTransactionResponse]])
 def get_all_payments(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all payment transactions"""
+    """Get all payment transactions (pass `cursor`, empty for the first page, for keyset pagination)"""
     try:
+        if cursor is not None:
+            payments, next_cursor = crud_payment.get_page(db, cursor=cursor or None, limit=limit, order_by="-created_at")
+            return ORJSONResponse({"items": PAYMENT_ENCODER.encode_many(payments), "next_cursor": next_cursor})
         payments = db.query(PaymentTransaction).offset(skip).limit(limit).all()
-        return payments
+        # Precompiled encoder instead of response_model validation
+        return ORJSONResponse(PAYMENT_ENCODER.encode_many(payments))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -49,7 +58,7 @@ def get_payment_details(payment_id: str, db: Session = Depends(get_db)):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Payment not found"
             )
-        return payment
+        return ORJSONResponse(PAYMENT_ENCODER.encode(payment))
     except HTTPException:
         raise
     except Exception as e:
@@ -214,7 +223,7 @@ def get_payments_by_driver(driver_id: str, db: Session = Depends(get_db)):
             )
         
         payments = db.query(PaymentTransaction).filter(PaymentTransaction.driver_id == driver_id).all()
-        return payments
+        return ORJSONResponse(PAYMENT_ENCODER.encode_many(payments))
     except HTTPException:
         raise
     except Exception as e:
@@ -235,7 +244,7 @@ def get_payment_by_razorpay_id(razorpay_payment_id: str, db: Session = Depends(g
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Payment not found"
             )
-        return payment
+        return ORJSONResponse(PAYMENT_ENCODER.encode(payment))
     except HTTPException:
         raise
     except Exception as e:
@@ -5,7 +5,6 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import VehicleTariffConfig
 from app.schemas import VehicleTariffConfigCreate, VehicleTariffConfigUpdate, VehicleTariffConfigResponse
 from app.crud.crud_payment import crud_tariff
 
@@ -40,10 +39,8 @@ def create_tariff_config(config: VehicleTariffConfigCreate, db: Session = Depend
     config_data = config.dict()
     config_data['tariff_id'] = str(uuid.uuid4())
     
-    db_config = VehicleTariffConfig(**config_data)
-    db.add(db_config)
-    db.commit()
-    db.refresh(db_config)
+    # Bumps the tariff cache version in the same commit (CRUDTariff._before_commit)
+    db_config = crud_tariff.create(db, obj_in=config_data)
     return db_config
 
 @router.put("/{config_id}", response_model=VehicleTariffConfigResponse)
@@ -60,6 +57,7 @@ def update_tariff_config(
             detail="Tariff configuration not found"
         )
     
+    # Bumps the tariff cache version in the same commit (CRUDTariff._before_commit)
     updated_config = crud_tariff.update(db, db_obj=config, obj_in=config_update)
     return updated_config
 
@@ -73,10 +71,9 @@ def toggle_tariff_config_active(config_id: str, db: Session = Depends(get_db)):
             detail="Tariff configuration not found"
         )
     
-    config.is_active = not config.is_active
-    db.commit()
-    db.refresh(config)
-    return config
+    # Bumps the tariff cache version in the same commit (CRUDTariff._before_commit)
+    updated_config = crud_tariff.update(db, db_obj=config, obj_in={"is_active": not config.is_active})
+    return updated_config
 
 @router.delete("/{config_id}")
 def delete_tariff_config(config_id: str, db: Session = Depends(get_db)):
@@ -88,8 +85,8 @@ def delete_tariff_config(config_id: str, db: Session = Depends(get_db)):
             detail="Tariff configuration not found"
         )
     
+    # Soft delete; bumps the tariff cache version in the same commit
     crud_tariff.delete(db, id=config_id)
-    db.commit()
     
     return {
         "message": "Tariff configuration deleted successfully",
@@ -1,8 +1,9 @@
 """
 Trip Driver Requests API endpoints
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import TripDriverRequest, Trip, Driver
@@ -10,21 +11,40 @@ from app.schemas import TripDriverRequestCreate, TripDriverRequestUpdate, TripDr
 from app.crud.crud_trip_request import crud_trip_request
 from app.crud.crud_trip import crud_trip
 from app.crud.crud_driver import crud_driver
+from app.services.trip_distance import trip_distance_verifier
 
 router = APIRouter(prefix="/trip-requests", tags=["trip-requests"])
 
+def _live(obj):
+    """Loaded relation unless it is soft-deleted (what crud_x.get would have returned)"""
+    return obj if obj is not None and not obj.is_deleted else None
+
+
 @router.get("/")
 def get_all_requests(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    start_date: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
     db: Session = Depends(get_db)
 ):
-    """Get all trip driver requests"""
-    requests = crud_trip_request.get_multi(db, skip=skip, limit=limit)
+    """Get all trip driver requests, newest first (pass `cursor`, empty for the first page, for keyset pagination)"""
+    # ✅ OPTIMIZED: driver name and customer name come from one joined query, not 2 lookups per row
+    filters = dict(status=status_filter, start_date=start_date, end_date=end_date)
+    next_cursor = None
+    if cursor is not None:
+        try:
+            requests, next_cursor = crud_trip_request.get_listing_page(db, cursor=cursor or None, limit=limit, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    else:
+        requests = crud_trip_request.get_listing(db, skip=skip, limit=limit, **filters)
     result = []
     for req in requests:
-        driver = crud_driver.get(db, id=req.driver_id)
-        trip = crud_trip.get(db, id=req.trip_id)
+        driver = _live(req.driver)
+        trip = _live(req.trip)
         result.append({
             "request_id": req.request_id,
             "trip_id": req.trip_id,
@@ -35,17 +55,19 @@ def get_all_requests(
             "created_at": req.created_at.isoformat() if req.created_at else None,
             "updated_at": req.updated_at.isoformat() if req.updated_at else None
         })
+    if cursor is not None:
+        return {"items": result, "next_cursor": next_cursor}
     return result
 
 @router.get("/{request_id}")
 def get_request_by_id(request_id: str, db: Session = Depends(get_db)):
     """Get trip driver request by ID"""
-    request = crud_trip_request.get(db, id=request_id)
+    request = crud_trip_request.get_with_related(db, request_id=request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
     
-    driver = crud_driver.get(db, id=request.driver_id)
-    trip = crud_trip.get(db, id=request.trip_id)
+    driver = _live(request.driver)
+    trip = _live(request.trip)
     
     return {
         "request_id": request.request_id,
@@ -155,6 +177,7 @@ def approve_request(request_id: str, db: Session = Depends(get_db)):
     for other in other_requests:
         other.status = "REJECTED"
     
+    crud_trip.sync_active_trip(db, trip)
     db.commit()
     
     return {
@@ -165,13 +188,29 @@ def approve_request(request_id: str, db: Session = Depends(get_db)):
     }
 
 @router.get("/trip/{trip_id}")
-def get_requests_by_trip(trip_id: str, db: Session = Depends(get_db)):
-    """Get all requests for a specific trip"""
-    requests = crud_trip_request.get_by_trip(db, trip_id=trip_id)
+def get_requests_by_trip(
+    trip_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    status_filter: Optional[str] = None,
+    start_date: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    db: Session = Depends(get_db)
+):
+    """Get all requests for a specific trip, newest first (pass `cursor` for keyset pagination)"""
+    filters = dict(trip_id=trip_id, status=status_filter, start_date=start_date, end_date=end_date, with_trip=False)
+    next_cursor = None
+    if cursor is not None:
+        try:
+            requests, next_cursor = crud_trip_request.get_listing_page(db, cursor=cursor or None, limit=limit, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    else:
+        requests = crud_trip_request.get_listing(db, limit=None, **filters)
     
     result = []
     for req in requests:
-        driver = crud_driver.get(db, id=req.driver_id)
+        driver = _live(req.driver)
         result.append({
             "request_id": req.request_id,
             "driver_id": req.driver_id,
@@ -180,16 +219,34 @@ def get_requests_by_trip(trip_id: str, db: Session = Depends(get_db)):
             "status": req.status,
             "created_at": req.created_at.isoformat() if req.created_at else None
         })
+    if cursor is not None:
+        return {"items": result, "next_cursor": next_cursor}
     return result
 
 @router.get("/driver/{driver_id}")
-def get_requests_by_driver(driver_id: str, db: Session = Depends(get_db)):
-    """Get all requests by a specific driver"""
-    requests = crud_trip_request.get_by_driver(db, driver_id=driver_id)
+def get_requests_by_driver(
+    driver_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    status_filter: Optional[str] = None,
+    start_date: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    db: Session = Depends(get_db)
+):
+    """Get all requests by a specific driver, newest first (pass `cursor` for keyset pagination)"""
+    filters = dict(driver_id=driver_id, status=status_filter, start_date=start_date, end_date=end_date, with_driver=False)
+    next_cursor = None
+    if cursor is not None:
+        try:
+            requests, next_cursor = crud_trip_request.get_listing_page(db, cursor=cursor or None, limit=limit, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    else:
+        requests = crud_trip_request.get_listing(db, limit=None, **filters)
     
     result = []
     for req in requests:
-        trip = crud_trip.get(db, id=req.trip_id)
+        trip = _live(req.trip)
         result.append({
             "request_id": req.request_id,
             "trip_id": req.trip_id,
@@ -199,6 +256,8 @@ def get_requests_by_driver(driver_id: str, db: Session = Depends(get_db)):
             "status": req.status,
             "created_at": req.created_at.isoformat() if req.created_at else None
         })
+    if cursor is not None:
+        return {"items": result, "next_cursor": next_cursor}
     return result
 
 @router.patch("/{request_id}/cancel")
@@ -235,6 +294,7 @@ def start_trip_legacy(request_id: str, db: Session = Depends(get_db)):
     trip.trip_status = "STARTED"
     from datetime import datetime
     trip.started_at = datetime.utcnow()
+    crud_trip.sync_active_trip(db, trip)
     db.commit()
     return {"status": "success", "message": "Trip started via request", "trip_id": trip.trip_id}
 
@@ -250,6 +310,8 @@ def complete_trip_legacy(request_id: str, db: Session = Depends(get_db)):
     trip.trip_status = "COMPLETED"
     from datetime import datetime
     trip.ended_at = datetime.utcnow()
+    crud_trip.sync_active_trip(db, trip)
+    trip_distance_verifier.verify(db, trip)
     db.commit()
     return {"status": "success", "message": "Trip completed via request", "trip_id": trip.trip_id}
 
@@ -2,17 +2,21 @@
 Trip API endpoints - OPTIMIZED
 Uses CRUD layer for production-ready performance
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.crud import crud_trip, crud_driver
-from app.schemas import TripCreate, TripUpdate, TripResponse
+from app.api.deps import get_async_db, get_db
+from app.crud import async_crud_trip, crud_trip, crud_driver
+from app.core.serializers import TRIP_ENCODER, TRIP_RESPONSE_ENCODER, TRIP_SUMMARY_ENCODER
+from app.schemas import CursorPage, TripCreate, TripUpdate, TripResponse
 from app.core.logging import get_logger
 from app.core.constants import TripStatus, ErrorCode
+from app.services.trip_distance import trip_distance_verifier
 import uuid
 
 logger = get_logger(__name__)
@@ -20,13 +24,23 @@ logger = get_logger(__name__)
 router = APIRouter(prefix="/trips", tags=["trips"])
 
 
-@router.get("/available", response_model=List[TripResponse])
-def get_available_trips(db: Session = Depends(get_db)):
+@router.get("/available", response_model=Union[List[TripResponse], CursorPage[TripResponse]])
+async def get_available_trips(
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get all available trips (OPEN status, no driver assigned) - OPTIMIZED"""
     try:
-        # ✅ OPTIMIZED: Specialized method
-        trips = crud_trip.get_available_trips(db)
-        return trips
+        if cursor is not None:
+            # ✅ OPTIMIZED: Keyset pagination (pass an empty cursor for the first page)
+            trips, next_cursor = await async_crud_trip.get_available_trips_page(db, cursor=cursor or None, limit=limit)
+            return ORJSONResponse({"items": TRIP_RESPONSE_ENCODER.encode_many(trips), "next_cursor": next_cursor})
+        # ✅ OPTIMIZED: Specialized method, precompiled encoder instead of response_model validation
+        trips = await async_crud_trip.get_available_trips(db)
+        return ORJSONResponse(TRIP_RESPONSE_ENCODER.encode_many(trips))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching available trips: {e}", exc_info=True)
         raise HTTPException(
@@ -37,59 +51,35 @@ def get_available_trips(db: Session = Depends(get_db)):
 
 @router.get("", response_model=None, include_in_schema=False)
 @router.get("/", response_model=None)
-def get_all_trips(
+async def get_all_trips(
     skip: int = 0, 
     limit: int = 100, 
     status_filter: str = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all trips with optional status filter - OPTIMIZED"""
+    """
+    Get all trips with optional status filter - OPTIMIZED
+    
+    Offset mode (skip/limit) returns a list. Passing `cursor` (empty for the
+    first page) switches to keyset mode, which returns
+    {"items": [...], "next_cursor": ...} and stays fast on deep pages.
+    """
     try:
-        if status_filter:
-            # ✅ OPTIMIZED: Status-based query
-            trips = crud_trip.get_by_status(db, status=status_filter, skip=skip, limit=limit)
-        else:
-            # ✅ OPTIMIZED: Using CRUD layer
-            trips = crud_trip.get_multi(db, skip=skip, limit=limit, order_by="-updated_at")
-        
-        # Convert to dict for response
-        result = []
-        for trip in trips:
-            result.append({
-                "trip_id": trip.trip_id,
-                "customer_name": trip.customer_name,
-                "customer_phone": trip.customer_phone,
-                "pickup_address": trip.pickup_address,
-                "drop_address": trip.drop_address,
-                "trip_type": trip.trip_type,
-                "vehicle_type": trip.vehicle_type,
-                "trip_status": trip.trip_status,
-                "assigned_driver_id": trip.assigned_driver_id,
-                "distance_km": float(trip.distance_km) if trip.distance_km else None,
-                "fare": float(trip.fare) if trip.fare else None,
-                "waiting_charges": float(trip.waiting_charges) if trip.waiting_charges else 0.0,
-                "inter_state_permit_charges": float(trip.inter_state_permit_charges) if trip.inter_state_permit_charges else 0.0,
-                "driver_allowance": float(trip.driver_allowance) if trip.driver_allowance else 0.0,
-                "luggage_cost": float(trip.luggage_cost) if trip.luggage_cost else 0.0,
-                "pet_cost": float(trip.pet_cost) if trip.pet_cost else 0.0,
-                "toll_charges": float(trip.toll_charges) if trip.toll_charges else 0.0,
-                "night_allowance": float(trip.night_allowance) if trip.night_allowance else 0.0,
-                "total_amount": float(trip.total_amount) if trip.total_amount else 0.0,
-                "odo_start": trip.odo_start,
-                "odo_end": trip.odo_end,
-                "odo_start_url": trip.odo_start_url,
-                "odo_end_url": trip.odo_end_url,
-                "started_at": trip.started_at.isoformat() if trip.started_at else None,
-                "ended_at": trip.ended_at.isoformat() if trip.ended_at else None,
-                "planned_start_at": trip.planned_start_at.isoformat() if trip.planned_start_at else None,
-                "planned_end_at": trip.planned_end_at.isoformat() if trip.planned_end_at else None,
-                "is_manual_assignment": trip.is_manual_assignment,
-                "passenger_count": trip.passenger_count,
-                "errors": trip.errors,
-                "created_at": trip.created_at.isoformat() if trip.created_at else None,
-                "updated_at": trip.updated_at.isoformat() if trip.updated_at else None
-            })
-        return result
+        # ✅ OPTIMIZED: Column projection straight to orjson (no ORM objects, no per-row dicts)
+        filters = {"trip_status": status_filter} if status_filter else None
+        if cursor is not None:
+            # ✅ OPTIMIZED: Keyset pagination on (updated_at, trip_id)
+            trips, next_cursor = await async_crud_trip.get_page_projected(
+                db, TRIP_ENCODER, cursor=cursor or None, limit=limit, filters=filters, order_by="-updated_at"
+            )
+            return ORJSONResponse({"items": trips, "next_cursor": next_cursor})
+        trips = await async_crud_trip.get_multi_projected(
+            db, TRIP_ENCODER, skip=skip, limit=limit, filters=filters, order_by="-updated_at"
+        )
+        return ORJSONResponse(trips)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching trips: {e}", exc_info=True)
         raise HTTPException(
@@ -99,11 +89,11 @@ def get_all_trips(
 
 
 @router.get("/{trip_id}")
-def get_trip_details(trip_id: str, db: Session = Depends(get_db)):
+async def get_trip_details(trip_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get trip details by ID with driver info - OPTIMIZED"""
     try:
         # ✅ OPTIMIZED: Eager load driver (1 query instead of 2)
-        trip = crud_trip.get_with_driver(db, trip_id)
+        trip = await async_crud_trip.get_with_driver(db, trip_id)
         
         if not trip:
             raise HTTPException(
@@ -111,41 +101,10 @@ def get_trip_details(trip_id: str, db: Session = Depends(get_db)):
                 detail={"error_code": ErrorCode.TRIP_NOT_FOUND, "message": "Trip not found"}
             )
         
-        # Build response with driver info
-        response = {
-            "trip_id": trip.trip_id,
-            "customer_name": trip.customer_name,
-            "customer_phone": trip.customer_phone,
-            "pickup_address": trip.pickup_address,
-            "drop_address": trip.drop_address,
-            "trip_type": trip.trip_type,
-            "vehicle_type": trip.vehicle_type,
-            "trip_status": trip.trip_status,
-            "assigned_driver_id": trip.assigned_driver_id,
-            "distance_km": float(trip.distance_km) if trip.distance_km else None,
-            "fare": float(trip.fare) if trip.fare else None,
-            "waiting_charges": float(trip.waiting_charges) if trip.waiting_charges else 0.0,
-            "inter_state_permit_charges": float(trip.inter_state_permit_charges) if trip.inter_state_permit_charges else 0.0,
-            "driver_allowance": float(trip.driver_allowance) if trip.driver_allowance else 0.0,
-            "luggage_cost": float(trip.luggage_cost) if trip.luggage_cost else 0.0,
-            "pet_cost": float(trip.pet_cost) if trip.pet_cost else 0.0,
-            "toll_charges": float(trip.toll_charges) if trip.toll_charges else 0.0,
-            "night_allowance": float(trip.night_allowance) if trip.night_allowance else 0.0,
-            "total_amount": float(trip.total_amount) if trip.total_amount else 0.0,
-            "odo_start": trip.odo_start,
-            "odo_end": trip.odo_end,
-            "odo_start_url": trip.odo_start_url,
-            "odo_end_url": trip.odo_end_url,
-            "started_at": trip.started_at.isoformat() if trip.started_at else None,
-            "ended_at": trip.ended_at.isoformat() if trip.ended_at else None,
-            "planned_start_at": trip.planned_start_at.isoformat() if trip.planned_start_at else None,
-            "planned_end_at": trip.planned_end_at.isoformat() if trip.planned_end_at else None,
-            "is_manual_assignment": trip.is_manual_assignment,
-            "passenger_count": trip.passenger_count,
-            "errors": trip.errors,
-            "created_at": trip.created_at.isoformat() if trip.created_at else None,
-            "updated_at": trip.updated_at.isoformat() if trip.updated_at else None
-        }
+        # ✅ OPTIMIZED: Precompiled encoder (same shape as the list) plus the GPS check
+        response = TRIP_ENCODER.encode(trip)
+        response["gps_distance_km"] = float(trip.gps_distance.gps_distance_km) if trip.gps_distance and trip.gps_distance.gps_distance_km is not None else None
+        response["distance_flagged"] = bool(trip.gps_distance and trip.gps_distance.is_flagged)
         
         # Add driver info if available (already loaded via eager loading)
         if trip.assigned_driver:
@@ -161,7 +120,7 @@ def get_trip_details(trip_id: str, db: Session = Depends(get_db)):
                 )
             }
         
-        return response
+        return ORJSONResponse(response)
     except HTTPException:
         raise
     except Exception as e:
@@ -172,6 +131,54 @@ def get_trip_details(trip_id: str, db: Session = Depends(get_db)):
         )
 
 
+@router.get("/{trip_id}/route")
+async def get_trip_route(trip_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get the GPS breadcrumb of a trip (started_at..ended_at) from the driver location history"""
+    from app.services.location_history import location_history
+
+    try:
+        trip = await async_crud_trip.get(db, id=trip_id)
+        if not trip:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={"error_code": ErrorCode.TRIP_NOT_FOUND, "message": "Trip not found"}
+            )
+
+        if not trip.assigned_driver_id or not trip.started_at:
+            return {
+                "trip_id": trip_id,
+                "driver_id": trip.assigned_driver_id,
+                "started_at": None,
+                "ended_at": None,
+                "point_count": 0,
+                "points": []
+            }
+
+        ended_at = trip.ended_at or datetime.utcnow()
+        # Trail decoding uses the sync CRUD layer; run_sync keeps it on the async connection
+        points = await db.run_sync(location_history.get_trail, trip.assigned_driver_id, trip.started_at, ended_at)
+
+        return {
+            "trip_id": trip_id,
+            "driver_id": trip.assigned_driver_id,
+            "started_at": trip.started_at.isoformat(),
+            "ended_at": trip.ended_at.isoformat() if trip.ended_at else None,
+            "point_count": len(points),
+            "points": [
+                {"latitude": lat, "longitude": lng, "recorded_at": ts.isoformat()}
+                for ts, lat, lng in points
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching route for trip {trip_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch trip route"
+        )
+
+
 @router.post("", status_code=status.HTTP_201_CREATED)
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def create_trip(trip: TripCreate, db: Session = Depends(get_db)):
@@ -317,6 +324,9 @@ def update_trip_status(
                 detail="Trip not found"
             )
         
+        if new_status == TripStatus.COMPLETED and trip_distance_verifier.verify(db, trip):
+            db.commit()
+
         logger.info(f"Trip {trip_id} status updated to {new_status}")
         
         return {
@@ -426,25 +436,29 @@ def delete_trip(trip_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/driver/{driver_id}")
-def get_trips_by_driver(driver_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_trips_by_driver(
+    driver_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get all trips assigned to a specific driver - OPTIMIZED"""
     try:
-        # ✅ OPTIMIZED: Driver-specific query
-        trips = crud_trip.get_by_driver(db, driver_id=driver_id, skip=skip, limit=limit)
-        
-        result = []
-        for trip in trips:
-            result.append({
-                "trip_id": trip.trip_id,
-                "customer_name": trip.customer_name,
-                "pickup_address": trip.pickup_address,
-                "drop_address": trip.drop_address,
-                "trip_status": trip.trip_status,
-                "fare": float(trip.fare) if trip.fare else None,
-                "created_at": trip.created_at.isoformat() if trip.created_at else None
-            })
-        
-        return result
+        next_cursor = None
+        if cursor is not None:
+            # ✅ OPTIMIZED: Keyset pagination on (created_at, trip_id)
+            trips, next_cursor = await async_crud_trip.get_by_driver_page(db, driver_id=driver_id, cursor=cursor or None, limit=limit)
+        else:
+            # ✅ OPTIMIZED: Driver-specific query
+            trips = await async_crud_trip.get_by_driver(db, driver_id=driver_id, skip=skip, limit=limit)
+        
+        result = TRIP_SUMMARY_ENCODER.encode_many(trips)
+        if cursor is not None:
+            return ORJSONResponse({"items": result, "next_cursor": next_cursor})
+        return ORJSONResponse(result)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching trips for driver {driver_id}: {e}", exc_info=True)
         raise HTTPException(
@@ -454,11 +468,11 @@ def get_trips_by_driver(driver_id: str, skip: int = 0, limit: int = 100, db: Ses
 
 
 @router.get("/statistics/dashboard")
-def get_trip_statistics(db: Session = Depends(get_db)):
+async def get_trip_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get trip statistics for admin dashboard - OPTIMIZED"""
     try:
         # ✅ OPTIMIZED: Single method call for all stats
-        stats = crud_trip.get_statistics(db)
+        stats = await async_crud_trip.get_statistics(db)
         return stats
     except Exception as e:
         logger.error(f"Error fetching trip statistics: {e}", exc_info=True)
@@ -493,6 +507,7 @@ def update_odometer_start(
         if trip.trip_status == TripStatus.ASSIGNED:
             trip.trip_status = TripStatus.STARTED
             trip.started_at = datetime.utcnow()
+            crud_trip.sync_active_trip(db, trip)
         
         db.commit()
         db.refresh(trip)
@@ -533,7 +548,9 @@ def update_odometer_end(
     """Update trip ending odometer reading, save extra charges, and auto-complete trip."""
     try:
         from app.models import Driver, WalletTransaction
-        from app.core.constants import DEFAULT_DRIVER_COMMISSION_PERCENT, WalletTransactionType
+        from app.core.constants import WalletTransactionType
+        from app.core.fare_rules import commission_for
+        from app.services.tariff_cache import tariff_cache
         from decimal import Decimal, ROUND_HALF_UP
         import uuid
 
@@ -594,9 +611,9 @@ def update_odometer_end(
                 if "driver_allowance" in fare_data and fare_data["driver_allowance"] > 0:
                     trip.driver_allowance = Decimal(fare_data["driver_allowance"]).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
-                # Deduct platform commission from driver wallet
-                comm_pct = Decimal(str(DEFAULT_DRIVER_COMMISSION_PERCENT)) / Decimal("100")
-                commission_amount = (trip.fare * comm_pct).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+                # Deduct platform commission from driver wallet (tariff rate, like update_status)
+                commission_percent = tariff_cache.commission_percent(db, trip.vehicle_type)
+                commission_amount = commission_for(trip.fare, commission_percent)
 
                 logger.info(f"Trip {trip_id}: Fare=₹{trip.fare}, Commission=₹{commission_amount}")
 
@@ -620,6 +637,12 @@ def update_odometer_end(
         trip.total_amount = crud_trip.calculate_total_amount(trip)
         logger.info(f"Trip {trip_id}: total_amount=₹{trip.total_amount}")
 
+        # ── Keep driver_active_trips in the same transaction ──────────────
+        crud_trip.sync_active_trip(db, trip)
+
+        # ── Cross-check odometer against the GPS trail ────────────────────
+        gps_check = trip_distance_verifier.verify(db, trip)
+
         db.commit()
         db.refresh(trip)
 
@@ -642,12 +665,15 @@ def update_odometer_end(
             "pet_cost":                   float(trip.pet_cost or 0),
             # ── Grand total ──
             "total_amount": float(trip.total_amount) if trip.total_amount else 0.0,
-            "trip_status": trip.trip_status
+            "trip_status": trip.trip_status,
+            # ── GPS cross-check ──
+            "gps_distance_km": float(gps_check.gps_distance_km) if gps_check and gps_check.gps_distance_km is not None else None,
+            "distance_flagged": bool(gps_check and gps_check.is_flagged)
         }
 
         if commission_amount is not None:
             response["commission_deducted"]          = float(commission_amount)
-            response["commission_percentage"]         = DEFAULT_DRIVER_COMMISSION_PERCENT
+            response["commission_percentage"]         = float(commission_percent)
             response["driver_collects_from_customer"] = float(trip.total_amount) if trip.total_amount else 0.0
             response["wallet_updated"]                = True
 
@@ -674,6 +700,7 @@ def start_trip(trip_id: str, db: Session = Depends(get_db)):
 
         trip.trip_status = TripStatus.STARTED
         trip.started_at = datetime.utcnow()
+        crud_trip.sync_active_trip(db, trip)
         db.commit()
         db.refresh(trip)
         logger.info(f"Trip started: {trip_id}")
@@ -732,6 +759,8 @@ def complete_trip(trip_id: str, db: Session = Depends(get_db)):
 
         trip.trip_status = TripStatus.COMPLETED
         trip.ended_at = datetime.utcnow()
+        crud_trip.sync_active_trip(db, trip)
+        trip_distance_verifier.verify(db, trip)
         db.commit()
         db.refresh(trip)
 
@@ -759,11 +788,8 @@ def complete_trip(trip_id: str, db: Session = Depends(get_db)):
 def recalculate_trip_fare(trip_id: str, db: Session = Depends(get_db)):
     """Manually recalculate fare for a completed trip and update wallet"""
     try:
-        from app.models import Driver, WalletTransaction
-        from app.core.constants import DEFAULT_DRIVER_COMMISSION_PERCENT, WalletTransactionType
-        from decimal import Decimal
-        import uuid
-        
+        from app.services.fare_recalculation import FareRecalculationJob
+
         # ✅ OPTIMIZED: Get trip using CRUD
         trip = crud_trip.get(db, id=trip_id)
         if not trip:
@@ -771,74 +797,39 @@ def recalculate_trip_fare(trip_id: str, db: Session = Depends(get_db)):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Trip not found"
             )
-        
-        # ✅ OPTIMIZED: Calculate fare using CRUD
-        fare_data = crud_trip.calculate_fare(db, trip)
-        new_fare = fare_data["fare"]
-        chargeable_distance = fare_data["chargeable_distance"]
-        
-        if not new_fare:
+        if trip.trip_status != TripStatus.COMPLETED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only completed trips can be recalculated"
+            )
+
+        # Same rules as the bulk job: fare, distance, driver allowance, total and the
+        # commission difference at the tariff rate, settled in the driver's wallet
+        report = FareRecalculationJob(trip_ids=[trip_id]).run(db, apply=True)
+
+        if report.skipped:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot calculate fare. Missing odometer readings or tariff config."
             )
-        
-        # Update distance_km to match chargeable distance
-        trip.distance_km = chargeable_distance
-        
-        old_fare = trip.fare or Decimal(0)
-        
-        # If fare hasn't changed, just return
-        if old_fare == new_fare:
+        if not report.diffs:
+            db.refresh(trip)
             return {
                 "message": "Fare is already up to date",
                 "trip_id": trip_id,
-                "fare": float(new_fare)
+                "fare": float(trip.fare)
             }
 
-        # Calculate difference in COMMISSION to update wallet
-        old_commission = (old_fare * Decimal(str(DEFAULT_DRIVER_COMMISSION_PERCENT)) / Decimal("100")).quantize(Decimal("0.01"))
-        new_commission = (new_fare * Decimal(str(DEFAULT_DRIVER_COMMISSION_PERCENT)) / Decimal("100")).quantize(Decimal("0.01"))
-        
-        commission_difference = new_commission - old_commission
-        
-        # Update trip fare
-        trip.fare = new_fare
-        
-        # ✅ Recalculate total amount
-        trip.total_amount = crud_trip.calculate_total_amount(trip)
-        
-        # Update wallet if a driver is assigned
-        if trip.assigned_driver_id:
-            driver = db.query(Driver).filter(Driver.is_deleted == False).filter(Driver.driver_id == trip.assigned_driver_id).first()
-            if driver:
-                # If commission increased, we need to DEBIT more from wallet
-                # If commission decreased, we need to CREDIT some back
-                adj_type = "DEBIT" if commission_difference > 0 else "CREDIT"
-                
-                adjustment = WalletTransaction(
-                    wallet_id=str(uuid.uuid4()),
-                    driver_id=trip.assigned_driver_id,
-                    trip_id=trip.trip_id,
-                    amount=abs(commission_difference),
-                    transaction_type=adj_type
-                )
-                db.add(adjustment)
-                
-                # Update balance (Subtract the difference in commission)
-                driver.wallet_balance = (driver.wallet_balance or Decimal(0)) - commission_difference
-                
-                logger.info(f"Trip {trip_id} recalculated. Commission adjusted by ₹{commission_difference}")
-
-        db.commit()
-        db.refresh(trip)
-        
+        diff = report.diffs[0]
+        logger.info(f"Trip {trip_id} recalculated. Commission adjusted by ₹{diff.commission_delta}")
         return {
             "message": "Fare recalculated and wallet adjusted successfully",
             "trip_id": trip_id,
-            "old_fare": float(old_fare),
-            "new_fare": float(new_fare),
-            "net_adjustment": float(net_difference)
+            "old_fare": float(diff.old_fare),
+            "new_fare": float(diff.new_fare),
+            "driver_allowance": float(diff.new_driver_allowance) if diff.new_driver_allowance is not None else None,
+            "total_amount": float(diff.new_total_amount),
+            "net_adjustment": float(diff.commission_delta)
         }
     except HTTPException:
         raise
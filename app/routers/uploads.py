@@ -2,23 +2,33 @@
 File upload router for KYC documents and photos
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
 import os
 import shutil
+import tempfile
 from dotenv import load_dotenv
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Driver, Vehicle, Trip
-from app.crud.crud_driver import crud_driver
-from app.crud.crud_vehicle import crud_vehicle
-from app.crud.crud_trip import crud_trip
+from app.crud.crud_driver import async_crud_driver
+from app.crud.crud_vehicle import async_crud_vehicle
+from app.crud.crud_trip import async_crud_trip
+from app.crud.crud_upload import async_crud_uploaded_file
 import pathlib
-from app.core.image_processing import compress_image
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.image_processing import RENDITIONS, rendition_path, rendition_urls
+from app.core.upload_limit import upload_too_large
+from app.services.image_pipeline import ImagePipelineBusy, image_pipeline
 
 # Load environment variables with absolute path
 env_path = pathlib.Path(__file__).parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+logger = get_logger(__name__)
+
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
 # Allowed file extensions - Synced with mobile formats
@@ -33,12 +43,161 @@ POSITION_MAPPING = {
     "inside": "inside", "insideview": "inside", "inside_view": "inside", "interior": "inside"
 }
 
-def save_file(file: UploadFile, folder: str, entity_type: str = None, entity_id: str = None, doc_type: str = None) -> str:
-    """Save uploaded file and return URL"""
-    # Use absolute path to ensure consistency
-    UPLOAD_DIR = "/var/www/projects/client_side/chola_cabs/backend/cab_app/uploads"
-    BASE_URL = "https://api.cholacabs.in/uploads"
-    
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".webp"}
+
+# Use absolute path to ensure consistency
+UPLOAD_DIR = "/var/www/projects/client_side/chola_cabs/backend/cab_app/uploads"
+BASE_URL = "https://api.cholacabs.in/uploads"
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def _spool_to_folder(file: UploadFile, folder_path: str) -> Tuple[str, str]:
+    """
+    Copy the upload in chunks to a temp file next to its destination; returns (path, SHA-256)
+
+    Starlette spools the multipart part to disk beyond 1 MB, so memory stays at one
+    chunk. The content hash is computed and UPLOAD_MAX_BYTES enforced on the exact size
+    in the same pass. The copy is what the worker process decodes from, and what is
+    renamed into place when the original is kept.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder_path, prefix=".upload-", suffix=".part")
+    try:
+        file.file.seek(0)
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := file.file.read(COPY_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise upload_too_large(settings.UPLOAD_MAX_BYTES)
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(COPY_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stored_copy(candidates: List[Tuple[str, Optional[str]]], file_path: str) -> Optional[Tuple[str, str]]:
+    """
+    (path, stored_hash) of an intact stored file among (storage_path, stored_hash) index rows
+
+    The file at `file_path` itself is tried first. A row only counts if it was stored the
+    same way (.jpg / .pdf) and its file still hashes to the recorded stored_hash: a file
+    replaced by a write whose index update was rolled back no longer does.
+    """
+    ext = os.path.splitext(file_path)[1]
+    for path, stored_hash in sorted(candidates, key=lambda candidate: candidate[0] != file_path):
+        if (
+            path and stored_hash and os.path.splitext(path)[1] == ext
+            and os.path.isfile(path) and _file_hash(path) == stored_hash
+        ):
+            return path, stored_hash
+    return None
+
+
+def _link_into_place(source: str, file_path: str) -> None:
+    """
+    Hard-link (or copy across filesystems) a stored file to `file_path`
+
+    Stored files are only ever replaced by rename, never rewritten in place, so
+    a link keeps its content when either name is replaced later.
+    """
+    if os.path.exists(file_path) and os.path.samefile(source, file_path):
+        return  # already linked; renaming a link over itself would leave the temp link behind
+    tmp_path = os.path.join(os.path.dirname(file_path), f".{os.path.basename(file_path)}.link")
+    _discard(tmp_path)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, file_path)
+
+
+def _link_stored(source: str, file_path: str) -> bool:
+    """Put a stored file and its renditions at `file_path`; False if renditions are missing"""
+    _link_into_place(source, file_path)
+    complete = True
+    for name in RENDITIONS:
+        source_rendition = rendition_path(source, name)
+        if os.path.isfile(source_rendition):
+            _link_into_place(source_rendition, rendition_path(file_path, name))
+        else:
+            _discard(rendition_path(file_path, name))
+            complete = False
+    return complete
+
+
+def _local_path(url: Optional[str]) -> Optional[str]:
+    """Path of a file saved by save_file, from its URL (None for URLs stored elsewhere)"""
+    if not url or not url.startswith(f"{BASE_URL}/"):
+        return None
+    return os.path.join(UPLOAD_DIR, url[len(BASE_URL) + 1:])
+
+
+def stored_rendition_urls(url: Optional[str]) -> Dict[str, str]:
+    """
+    Rendition URLs of an uploaded image for responses ({} for PDFs)
+
+    A rendition that is neither on disk nor being rendered on this worker (pool busy,
+    job failed, uploaded before renditions existed) falls back to the original URL, so
+    a grid never points at a missing thumbnail.
+    """
+    urls = rendition_urls(url)
+    path = _local_path(url)
+    if not urls or path is None or image_pipeline.rendering(path):
+        return urls
+    for name in urls:
+        if not os.path.isfile(rendition_path(path, name)):
+            urls[name] = url
+    return urls
+
+
+def image_renditions(obj, fields: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """stored_rendition_urls of each image URL field of a record, keyed by field name"""
+    renditions = {}
+    for name in fields:
+        urls = stored_rendition_urls(getattr(obj, name))
+        if urls:
+            renditions[name] = urls
+    return renditions
+
+
+def _discard(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def save_file(
+    file: UploadFile,
+    folder: str,
+    entity_type: str = None,
+    entity_id: str = None,
+    doc_type: str = None,
+    db: Optional[AsyncSession] = None
+) -> str:
+    """Save uploaded file and return URL (images are compressed on the image pipeline's worker processes)
+
+    Files over UPLOAD_MAX_BYTES are rejected with 413 (oversized request bodies are already
+    cut off while streaming by UploadLimitMiddleware). Compressed images get small and medium
+    renditions beside them in the background (see stored_rendition_urls).
+
+    With `db`, uploads are deduplicated by content hash (uploaded_files, committed with the
+    caller's transaction): the same bytes again for the same file are not written at all, and
+    bytes already stored under another name are linked there without compressing them again.
+    """
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(400, "Invalid file type")
@@ -55,121 +214,163 @@ def save_file(file: UploadFile, folder: str, entity_type: str = None, entity_id:
                 filename = '_'.join(parts[2:])
     
     folder_path = os.path.join(UPLOAD_DIR, folder)
-    os.makedirs(folder_path, exist_ok=True)
+    await run_in_threadpool(os.makedirs, folder_path, exist_ok=True)
     
     # Force .jpg extension for all compressed images for browser compatibility
     # (.heic, .webp don't view directly in some browsers like Chrome)
-    if ext in [".jpg", ".jpeg", ".png", ".heic", ".webp"]:
+    if ext in IMAGE_EXTENSIONS:
         filename = os.path.splitext(filename)[0] + ".jpg"
 
     file_path = os.path.join(folder_path, filename)
+    url = f"{BASE_URL}/{folder}/{filename}"
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise upload_too_large(settings.UPLOAD_MAX_BYTES)
     
-    # Compress images, keep PDFs as is
-    if ext in [".jpg", ".jpeg", ".png", ".heic", ".webp"]:
-        try:
-            compressed_buffer = compress_image(file)
-            with open(file_path, "wb") as buffer:
-                buffer.write(compressed_buffer.getvalue())
-        except Exception as e:
-            # Fallback to standard copy if compression fails
-            file.file.seek(0)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-    else:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+    # ✅ OPTIMIZED: Stream the upload to disk in chunks, hashing it on the way; no copy of it is held in memory
+    upload_path, content_hash = await run_in_threadpool(_spool_to_folder, file, folder_path)
+    compressed_path = f"{upload_path}.jpg"
+    try:
+        if db is not None:
+            # ✅ OPTIMIZED: Content already stored -> no compression and (for the same file) no write at all
+            rows = await async_crud_uploaded_file.get_by_hash(db, content_hash)
+            candidates = [(row.storage_path, row.stored_hash) for row in rows]
+            stored = await run_in_threadpool(_stored_copy, candidates, file_path)
+            if stored and stored[0] == file_path:
+                logger.info(f"Unchanged upload for {filename}, keeping the stored file")
+                return url
+            if stored:
+                source, stored_hash = stored
+                complete = await run_in_threadpool(_link_stored, source, file_path)
+                if not complete and ext in IMAGE_EXTENSIONS:
+                    image_pipeline.schedule_renditions(file_path)
+                await async_crud_uploaded_file.record(
+                    db, url, content_hash, await run_in_threadpool(os.path.getsize, file_path),
+                    storage_path=file_path, stored_hash=stored_hash
+                )
+                logger.info(f"Duplicate upload for {filename}, linked {source}")
+                return url
+        
+        # Compress images, keep PDFs as is
+        kept_original = True
+        if ext in IMAGE_EXTENSIONS:
+            try:
+                # ✅ OPTIMIZED: A worker process decodes the temp file and writes the JPEG itself
+                await image_pipeline.compress_file(upload_path, compressed_path)
+                kept_original = False
+            except ImagePipelineBusy:
+                raise HTTPException(503, "Image processing is busy, please retry", headers={"Retry-After": "5"})
+            except Exception as e:
+                # Fallback to the original if compression fails or times out
+                logger.warning(f"Image compression failed for {filename}, saving original: {e}")
+        stored_path = upload_path if kept_original else compressed_path
+        # A kept original is the upload itself, so its hash is known already
+        stored_hash = content_hash if kept_original else await run_in_threadpool(_file_hash, compressed_path)
+        size_bytes = await run_in_threadpool(os.path.getsize, stored_path)
+        # Renditions of an earlier upload must never outlive it, whether or not new ones get rendered
+        await run_in_threadpool(_discard, *(rendition_path(file_path, name) for name in RENDITIONS))
+        await run_in_threadpool(os.replace, stored_path, file_path)
+        if not kept_original:
+            # ✅ OPTIMIZED: Thumbnails for the admin grids are rendered after the response, on the pool
+            image_pipeline.schedule_renditions(file_path)
+        if db is not None:
+            await async_crud_uploaded_file.record(
+                db, url, content_hash, size_bytes, storage_path=file_path, stored_hash=stored_hash
+            )
+    finally:
+        # (a job that timed out deletes compressed_path itself once it ends, see compress_file)
+        await run_in_threadpool(_discard, upload_path, compressed_path)
     
-    return f"{BASE_URL}/{folder}/{filename}"
+    return url
 
 @router.post("/driver/{driver_id}/photo")
-async def upload_driver_photo(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def upload_driver_photo(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/photos", "driver", driver_id, "photo")
+    url = await save_file(file, "drivers/photos", "driver", driver_id, "photo", db=db)
     driver.photo_url = url
-    db.commit()
-    return {"photo_url": url}
+    await db.commit()
+    return {"photo_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/driver/{driver_id}/aadhar")
-async def upload_aadhar(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def upload_aadhar(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/aadhar", "driver", driver_id, "aadhar")
+    url = await save_file(file, "drivers/aadhar", "driver", driver_id, "aadhar", db=db)
     driver.aadhar_url = url
-    db.commit()
-    return {"aadhar_url": url}
+    await db.commit()
+    return {"aadhar_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/driver/{driver_id}/licence")
-async def upload_licence(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def upload_licence(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/licence", "driver", driver_id, "licence")
+    url = await save_file(file, "drivers/licence", "driver", driver_id, "licence", db=db)
     driver.licence_url = url
-    db.commit()
-    return {"licence_url": url}
+    await db.commit()
+    return {"licence_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/driver/{driver_id}/police_verification")
-async def upload_police_verification(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def upload_police_verification(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/police_verification", "driver", driver_id, "police_verification")
+    url = await save_file(file, "drivers/police_verification", "driver", driver_id, "police_verification", db=db)
     driver.police_verification_url = url
-    db.commit()
-    return {"police_verification_url": url}
+    await db.commit()
+    return {"police_verification_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/trip/{trip_id}/odo_start")
-async def upload_odo_start(trip_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    trip = crud_trip.get(db, id=trip_id)
+async def upload_odo_start(trip_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    trip = await async_crud_trip.get(db, id=trip_id)
     if not trip:
         raise HTTPException(404, "Trip not found")
-    url = save_file(file, "trips/odo", "trip", trip_id, "odo_start")
+    url = await save_file(file, "trips/odo", "trip", trip_id, "odo_start", db=db)
     trip.odo_start_url = url
-    db.commit()
-    return {"odo_start_url": url}
+    await db.commit()
+    return {"odo_start_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/trip/{trip_id}/odo_end")
-async def upload_odo_end(trip_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    trip = crud_trip.get(db, id=trip_id)
+async def upload_odo_end(trip_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    trip = await async_crud_trip.get(db, id=trip_id)
     if not trip:
         raise HTTPException(404, "Trip not found")
-    url = save_file(file, "trips/odo", "trip", trip_id, "odo_end")
+    url = await save_file(file, "trips/odo", "trip", trip_id, "odo_end", db=db)
     trip.odo_end_url = url
-    db.commit()
-    return {"odo_end_url": url}
+    await db.commit()
+    return {"odo_end_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/vehicle/{vehicle_id}/rc")
-async def upload_rc(vehicle_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    vehicle = crud_vehicle.get(db, id=vehicle_id)
+async def upload_rc(vehicle_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    vehicle = await async_crud_vehicle.get(db, id=vehicle_id)
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
-    url = save_file(file, "vehicles/rc", "vehicle", vehicle_id, "rc")
+    url = await save_file(file, "vehicles/rc", "vehicle", vehicle_id, "rc", db=db)
     vehicle.rc_book_url = url
-    db.commit()
-    return {"rc_book_url": url}
+    await db.commit()
+    return {"rc_book_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/vehicle/{vehicle_id}/fc")
-async def upload_fc(vehicle_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    vehicle = crud_vehicle.get(db, id=vehicle_id)
+async def upload_fc(vehicle_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    vehicle = await async_crud_vehicle.get(db, id=vehicle_id)
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
-    url = save_file(file, "vehicles/fc", "vehicle", vehicle_id, "fc")
+    url = await save_file(file, "vehicles/fc", "vehicle", vehicle_id, "fc", db=db)
     vehicle.fc_certificate_url = url
-    db.commit()
-    return {"fc_certificate_url": url}
+    await db.commit()
+    return {"fc_certificate_url": url, "renditions": stored_rendition_urls(url)}
 
 @router.post("/vehicle/{vehicle_id}/photo/{position}")
-async def upload_vehicle_photo(vehicle_id: str, position: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    vehicle = crud_vehicle.get(db, id=vehicle_id)
+async def upload_vehicle_photo(vehicle_id: str, position: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    vehicle = await async_crud_vehicle.get(db, id=vehicle_id)
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
@@ -178,82 +379,82 @@ async def upload_vehicle_photo(vehicle_id: str, position: str, file: UploadFile
     if not normalized_pos:
         raise HTTPException(400, f"Invalid position: {position}. Allowed: {', '.join(set(POSITION_MAPPING.values()))}")
     
-    url = save_file(file, f"vehicles/{normalized_pos}", "vehicle", vehicle_id, normalized_pos)
+    url = await save_file(file, f"vehicles/{normalized_pos}", "vehicle", vehicle_id, normalized_pos, db=db)
     setattr(vehicle, f"vehicle_{normalized_pos}_url", url)
-    db.commit()
-    return {f"vehicle_{normalized_pos}_url": url}
+    await db.commit()
+    return {f"vehicle_{normalized_pos}_url": url, "renditions": stored_rendition_urls(url)}
 
 # RE-UPLOAD ENDPOINTS (PUT methods)
 
 @router.put("/driver/{driver_id}/photo")
-async def reupload_driver_photo(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def reupload_driver_photo(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/photos", "driver", driver_id, "photo")
+    url = await save_file(file, "drivers/photos", "driver", driver_id, "photo", db=db)
     driver.photo_url = url
-    db.commit()
-    return {"photo_url": url, "message": "Driver photo re-uploaded successfully"}
+    await db.commit()
+    return {"photo_url": url, "renditions": stored_rendition_urls(url), "message": "Driver photo re-uploaded successfully"}
 
 @router.put("/driver/{driver_id}/aadhar")
-async def reupload_aadhar(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def reupload_aadhar(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/aadhar", "driver", driver_id, "aadhar")
+    url = await save_file(file, "drivers/aadhar", "driver", driver_id, "aadhar", db=db)
     driver.aadhar_url = url
-    db.commit()
-    return {"aadhar_url": url, "message": "Aadhar document re-uploaded successfully"}
+    await db.commit()
+    return {"aadhar_url": url, "renditions": stored_rendition_urls(url), "message": "Aadhar document re-uploaded successfully"}
 
 @router.put("/driver/{driver_id}/licence")
-async def reupload_licence(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def reupload_licence(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
     
-    url = save_file(file, "drivers/licence", "driver", driver_id, "licence")
+    url = await save_file(file, "drivers/licence", "driver", driver_id, "licence", db=db)
     driver.licence_url = url
-    db.commit()
-    return {"licence_url": url, "message": "Licence document re-uploaded successfully"}
+    await db.commit()
+    return {"licence_url": url, "renditions": stored_rendition_urls(url), "message": "Licence document re-uploaded successfully"}
 
 @router.put("/driver/{driver_id}/police_verification")
-async def reupload_police_verification(driver_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    driver = crud_driver.get(db, id=driver_id)
+async def reupload_police_verification(driver_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    driver = await async_crud_driver.get(db, id=driver_id)
     if not driver:
         raise HTTPException(404, "Driver not found")
-    url = save_file(file, "drivers/police_verification", "driver", driver_id, "police_verification")
+    url = await save_file(file, "drivers/police_verification", "driver", driver_id, "police_verification", db=db)
     driver.police_verification_url = url
-    db.commit()
-    return {"police_verification_url": url}
+    await db.commit()
+    return {"police_verification_url": url, "renditions": stored_rendition_urls(url)}
 
 
 @router.put("/vehicle/{vehicle_id}/rc")
-async def reupload_rc(vehicle_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    vehicle = crud_vehicle.get(db, id=vehicle_id)
+async def reupload_rc(vehicle_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    vehicle = await async_crud_vehicle.get(db, id=vehicle_id)
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
-    url = save_file(file, "vehicles/rc", "vehicle", vehicle_id, "rc")
+    url = await save_file(file, "vehicles/rc", "vehicle", vehicle_id, "rc", db=db)
     vehicle.rc_book_url = url
-    db.commit()
-    return {"rc_book_url": url, "message": "RC book re-uploaded successfully"}
+    await db.commit()
+    return {"rc_book_url": url, "renditions": stored_rendition_urls(url), "message": "RC book re-uploaded successfully"}
 
 @router.put("/vehicle/{vehicle_id}/fc")
-async def reupload_fc(vehicle_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    vehicle = crud_vehicle.get(db, id=vehicle_id)
+async def reupload_fc(vehicle_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    vehicle = await async_crud_vehicle.get(db, id=vehicle_id)
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
-    url = save_file(file, "vehicles/fc", "vehicle", vehicle_id, "fc")
+    url = await save_file(file, "vehicles/fc", "vehicle", vehicle_id, "fc", db=db)
     vehicle.fc_certificate_url = url
-    db.commit()
-    return {"fc_certificate_url": url, "message": "FC certificate re-uploaded successfully"}
+    await db.commit()
+    return {"fc_certificate_url": url, "renditions": stored_rendition_urls(url), "message": "FC certificate re-uploaded successfully"}
 
 @router.put("/vehicle/{vehicle_id}/photo/{position}")
-async def reupload_vehicle_photo(vehicle_id: str, position: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    vehicle = crud_vehicle.get(db, id=vehicle_id)
+async def reupload_vehicle_photo(vehicle_id: str, position: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    vehicle = await async_crud_vehicle.get(db, id=vehicle_id)
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
@@ -262,7 +463,7 @@ async def reupload_vehicle_photo(vehicle_id: str, position: str, file: UploadFil
     if not normalized_pos:
         raise HTTPException(400, f"Invalid position: {position}. Allowed: {', '.join(set(POSITION_MAPPING.values()))}")
     
-    url = save_file(file, f"vehicles/{normalized_pos}", "vehicle", vehicle_id, normalized_pos)
+    url = await save_file(file, f"vehicles/{normalized_pos}", "vehicle", vehicle_id, normalized_pos, db=db)
     setattr(vehicle, f"vehicle_{normalized_pos}_url", url)
-    db.commit()
-    return {f"vehicle_{normalized_pos}_url": url, "message": f"Vehicle {normalized_pos} photo re-uploaded successfully"}
+    await db.commit()
+    return {f"vehicle_{normalized_pos}_url": url, "renditions": stored_rendition_urls(url), "message": f"Vehicle {normalized_pos} photo re-uploaded successfully"}
@@ -4,10 +4,12 @@ Uses CRUD layer for production-ready performance
 """
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.crud import crud_vehicle, crud_driver
+from app.core.serializers import VEHICLE_ENCODER, VEHICLE_IMAGE_FIELDS
 from app.schemas import VehicleCreate, VehicleUpdate, VehicleResponse
 from app.core.logging import get_logger
 from app.core.constants import ErrorCode
@@ -18,6 +20,15 @@ logger = get_logger(__name__)
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
 
+def _encode(vehicle) -> dict:
+    """VEHICLE_ENCODER dict plus the thumbnail URLs of its photos and documents"""
+    from app.routers.uploads import image_renditions
+
+    data = VEHICLE_ENCODER.encode(vehicle)
+    data["renditions"] = image_renditions(vehicle, VEHICLE_IMAGE_FIELDS)
+    return data
+
+
 @router.get("", response_model=List[VehicleResponse], include_in_schema=False)
 @router.get("/", response_model=List[VehicleResponse])
 def get_all_vehicles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
@@ -25,7 +36,8 @@ def get_all_vehicles(skip: int = 0, limit: int = 100, db: Session = Depends(get_
     try:
         # ✅ OPTIMIZED: Using CRUD layer
         vehicles = crud_vehicle.get_multi(db, skip=skip, limit=limit)
-        return vehicles
+        # ✅ OPTIMIZED: Precompiled encoder instead of response_model validation
+        return ORJSONResponse([_encode(vehicle) for vehicle in vehicles])
     except Exception as e:
         logger.error(f"Error fetching vehicles: {e}", exc_info=True)
         raise HTTPException(
@@ -47,7 +59,7 @@ def get_vehicle_by_id(vehicle_id: str, db: Session = Depends(get_db)):
                 detail={"error_code": ErrorCode.VEHICLE_NOT_FOUND, "message": "Vehicle not found"}
             )
         
-        return vehicle
+        return ORJSONResponse(_encode(vehicle))
     except HTTPException:
         raise
     except Exception as e:
@@ -72,7 +84,7 @@ def get_vehicles_by_driver(driver_id: str, db: Session = Depends(get_db)):
         
         # ✅ OPTIMIZED: Driver-specific query
         vehicles = crud_vehicle.get_by_driver(db, driver_id=driver_id)
-        return vehicles
+        return ORJSONResponse([_encode(vehicle) for vehicle in vehicles])
     except HTTPException:
         raise
     except Exception as e:
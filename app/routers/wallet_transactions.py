@@ -1,29 +1,39 @@
 """
 Wallet Transaction API endpoints
 """
-from typing import List
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import WalletTransaction, Driver
 from app.schemas import (
-    WalletTransactionCreate, WalletTransactionUpdate, 
+    CursorPage, WalletTransactionCreate, WalletTransactionUpdate, 
     WalletTransactionResponse, WalletTransactionType
 )
 from app.crud.crud_payment import crud_wallet
 from app.crud.crud_driver import crud_driver
+from app.core.serializers import WALLET_TRANSACTION_ENCODER
 
 router = APIRouter(prefix="/wallet-transactions", tags=["wallet-transactions"])
 
-@router.get("/", response_model=List[WalletTransactionResponse])
+@router.get("/", response_model=Union[List[WalletTransactionResponse], CursorPage[WalletTransactionResponse]])
 def get_all_wallet_transactions(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all wallet transactions"""
+    """Get all wallet transactions (pass `cursor`, empty for the first page, for keyset pagination)"""
+    if cursor is not None:
+        try:
+            transactions, next_cursor = crud_wallet.get_page(db, cursor=cursor or None, limit=limit, order_by="-created_at")
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ORJSONResponse({"items": WALLET_TRANSACTION_ENCODER.encode_many(transactions), "next_cursor": next_cursor})
     transactions = crud_wallet.get_multi(db, skip=skip, limit=limit)
-    return transactions
+    # Precompiled encoder instead of response_model validation
+    return ORJSONResponse(WALLET_TRANSACTION_ENCODER.encode_many(transactions))
 
 @router.get("/{transaction_id}", response_model=WalletTransactionResponse)
 def get_wallet_transaction_details(transaction_id: str, db: Session = Depends(get_db)):
@@ -34,7 +44,7 @@ def get_wallet_transaction_details(transaction_id: str, db: Session = Depends(ge
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Wallet transaction not found"
         )
-    return transaction
+    return ORJSONResponse(WALLET_TRANSACTION_ENCODER.encode(transaction))
 
 @router.post("/", response_model=WalletTransactionResponse, status_code=status.HTTP_201_CREATED)
 def create_wallet_transaction(transaction: WalletTransactionCreate, db: Session = Depends(get_db)):
@@ -116,4 +126,4 @@ def get_wallet_transactions_by_driver(driver_id: str, db: Session = Depends(get_
         )
     
     transactions = crud_wallet.get_by_driver(db, driver_id=driver_id)
-    return transactions
\ No newline at end of file
+    return ORJSONResponse(WALLET_TRANSACTION_ENCODER.encode_many(transactions))
\ No newline at end of file
@@ -3,8 +3,8 @@ Pydantic schemas for request/response validation
 """
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, ConfigDict
+from typing import Dict, Generic, Optional, List, TypeVar
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from enum import Enum
 
 # Enums
@@ -32,6 +32,14 @@ class WalletTransactionType(str, Enum):
     ADMIN_CREDIT = "admin_credit"
     ADMIN_DEBIT = "admin_debit"
 
+# Pagination
+ItemT = TypeVar("ItemT")
+
+class CursorPage(BaseModel, Generic[ItemT]):
+    """One page of a cursor-paginated listing; pass next_cursor back to get the next page"""
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
+
 # FCM Token Schemas
 class FCMTokenRequest(BaseModel):
     fcm_token: str
@@ -79,10 +87,36 @@ class DriverResponse(DriverBase):
     created_at: datetime
     updated_at: datetime
     police_verification_url: Optional[str] = None
+    # GET responses: {"photo_url": {"small": ..., "medium": ...}, ...}
+    renditions: Optional[Dict[str, Dict[str, str]]] = None
     
     class Config:
         from_attributes = True
 
+# Driver Location Batch Schemas
+class LocationPoint(BaseModel):
+    """A single GPS fix recorded on the device"""
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    recorded_at: datetime
+
+class DriverLocationPoints(BaseModel):
+    """Queued GPS fixes of one driver"""
+    points: List[LocationPoint] = Field(..., min_length=1, max_length=1000)
+
+class DriverLocationBatch(DriverLocationPoints):
+    driver_id: str
+
+class LocationBatchRequest(BaseModel):
+    """GPS fixes of many drivers replayed in one request"""
+    drivers: List[DriverLocationBatch] = Field(..., min_length=1, max_length=1000)
+
+class LocationBatchResponse(BaseModel):
+    status: str
+    points_received: int
+    drivers_updated: int
+    unknown_driver_ids: List[str] = []
+
 # Vehicle Schemas
 class VehicleBase(BaseModel):
     vehicle_type: str
@@ -131,6 +165,8 @@ class VehicleResponse(BaseModel):
     errors: Optional[dict] = None
     created_at: datetime
     updated_at: datetime
+    # GET responses: {"vehicle_front_url": {"small": ..., "medium": ...}, ...}
+    renditions: Optional[Dict[str, Dict[str, str]]] = None
 
 # Trip Schemas
 class TripBase(BaseModel):
@@ -1,4 +1,18 @@
 # Storage Service Package
 from .storage_service import storage_service, StorageService
+from .location_index import location_index, DriverLocationIndex
+from .location_buffer import location_buffer, LocationWriteBuffer, LocationBufferFull
+from .location_history import location_history, LocationHistoryBuffer
+from .trip_distance import trip_distance_verifier, TripDistanceVerifier
+from .driver_stream import driver_stream_hub, DriverStreamHub
+from .dashboard_stats import dashboard_stats, DashboardStatsService
 
-__all__ = ['storage_service', 'StorageService']
+__all__ = [
+    'storage_service', 'StorageService',
+    'location_index', 'DriverLocationIndex',
+    'location_buffer', 'LocationWriteBuffer', 'LocationBufferFull',
+    'location_history', 'LocationHistoryBuffer',
+    'trip_distance_verifier', 'TripDistanceVerifier',
+    'driver_stream_hub', 'DriverStreamHub',
+    'dashboard_stats', 'DashboardStatsService',
+]
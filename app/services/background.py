@@ -0,0 +1,56 @@
+"""
+Background helpers for periodic in-process work
+"""
+import threading
+from typing import Callable, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask:
+    """
+    Run a callable every `interval` seconds on a daemon thread
+
+    Used by write-behind buffers that must keep flushing even while the event
+    loop is busy. `stop()` runs the callable one last time so buffered data is
+    not lost on shutdown.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self._run_once()
+
+    def _run_once(self) -> None:
+        try:
+            self.func()
+        except Exception as e:
+            logger.error(f"Periodic task {self.name} failed: {e}", exc_info=True)
+
+    def stop(self, final_run: bool = True, timeout: float = 10.0) -> None:
+        """Stop the thread and optionally run the callable one final time"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if final_run:
+            self._run_once()
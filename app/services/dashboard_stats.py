@@ -0,0 +1,163 @@
+"""
+Dashboard statistics
+One conditional-aggregation pass per table, cached for a short TTL and shared
+by the analytics dashboard, the trip statistics endpoint and /api/v1/stats
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.constants import TripStatus
+from app.models import Driver, Trip, Vehicle
+
+
+@dataclass(frozen=True)
+class DashboardStats:
+    """Point-in-time counters; soft-deleted rows are excluded everywhere"""
+    day: date
+    total_trips: int
+    open_trips: int
+    assigned_trips: int
+    started_trips: int
+    completed_trips: int
+    cancelled_trips: int
+    today_trips: int
+    total_revenue: Decimal
+    today_revenue: Decimal
+    total_fare: Decimal
+    total_drivers: int
+    available_drivers: int
+    active_drivers: int
+    total_vehicles: int
+    approved_vehicles: int
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+class DashboardStatsService:
+    """
+    Computes DashboardStats in three queries (trips, drivers, vehicles)
+
+    "Today" is the half-open range [midnight, next midnight) on created_at,
+    so the comparison stays sargable instead of wrapping the column in DATE().
+    Results are cached per worker for `ttl_seconds`; concurrent callers during
+    a refresh wait for the one computation instead of each running it.
+    """
+
+    def __init__(self, ttl_seconds: float = 10.0):
+        self.ttl_seconds = ttl_seconds
+        self._cached: Optional[DashboardStats] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+
+    def compute(self, db: Session, day: Optional[date] = None) -> DashboardStats:
+        """Run the aggregation queries (bypasses the cache)"""
+        day = day or date.today()
+        day_start = datetime.combine(day, dt_time.min)
+        day_end = day_start + timedelta(days=1)
+        completed = Trip.trip_status == TripStatus.COMPLETED.value
+        today = and_(Trip.created_at >= day_start, Trip.created_at < day_end)
+
+        trips = db.query(
+            func.count(Trip.trip_id).label("total"),
+            _count_if(Trip.trip_status == TripStatus.OPEN.value).label("open"),
+            _count_if(Trip.trip_status == TripStatus.ASSIGNED.value).label("assigned"),
+            _count_if(Trip.trip_status == TripStatus.STARTED.value).label("started"),
+            _count_if(completed).label("completed"),
+            _count_if(Trip.trip_status == TripStatus.CANCELLED.value).label("cancelled"),
+            _count_if(today).label("today"),
+            _sum_if(completed, Trip.total_amount).label("revenue"),
+            _sum_if(and_(completed, today), Trip.total_amount).label("today_revenue"),
+            _sum_if(completed, Trip.fare).label("fare"),
+        ).filter(Trip.is_deleted == False).one()
+
+        drivers = db.query(
+            func.count(Driver.driver_id).label("total"),
+            _count_if(Driver.is_available == True).label("available"),
+            _count_if(and_(Driver.is_available == True, Driver.is_approved == True)).label("active"),
+        ).filter(Driver.is_deleted == False).one()
+
+        vehicles = db.query(
+            func.count(Vehicle.vehicle_id).label("total"),
+            _count_if(Vehicle.vehicle_approved == True).label("approved"),
+        ).filter(Vehicle.is_deleted == False).one()
+
+        return DashboardStats(
+            day=day,
+            total_trips=int(trips.total or 0),
+            open_trips=int(trips.open),
+            assigned_trips=int(trips.assigned),
+            started_trips=int(trips.started),
+            completed_trips=int(trips.completed),
+            cancelled_trips=int(trips.cancelled),
+            today_trips=int(trips.today),
+            total_revenue=Decimal(str(trips.revenue)),
+            today_revenue=Decimal(str(trips.today_revenue)),
+            total_fare=Decimal(str(trips.fare)),
+            total_drivers=int(drivers.total or 0),
+            available_drivers=int(drivers.available),
+            active_drivers=int(drivers.active),
+            total_vehicles=int(vehicles.total or 0),
+            approved_vehicles=int(vehicles.approved),
+        )
+
+    def _fresh(self) -> Optional[DashboardStats]:
+        cached = self._cached
+        if cached is not None and time.monotonic() < self._expires_at and cached.day == date.today():
+            return cached
+        return None
+
+    def _store(self, stats: DashboardStats) -> DashboardStats:
+        self._cached = stats
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        return stats
+
+    def get(self, db: Session) -> DashboardStats:
+        """Cached statistics, recomputed after the TTL or when the day changes"""
+        cached = self._fresh()
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._fresh()
+            if cached is not None:
+                return cached
+            return self._store(self.compute(db))
+
+    async def get_async(self, db: AsyncSession) -> DashboardStats:
+        """
+        get() for async endpoints
+
+        Waiters queue on an asyncio.Lock (a threading.Lock would block the
+        event loop) and the aggregation runs on the AsyncSession via run_sync.
+        """
+        cached = self._fresh()
+        if cached is not None:
+            return cached
+        async with self._async_lock:
+            cached = self._fresh()
+            if cached is not None:
+                return cached
+            return self._store(await db.run_sync(self.compute))
+
+    def invalidate(self) -> None:
+        self._cached = None
+
+
+# Singleton instance
+dashboard_stats = DashboardStatsService(ttl_seconds=settings.DASHBOARD_STATS_TTL_SECONDS)
@@ -0,0 +1,128 @@
+"""
+Push channel for the admin map
+Streams driver positions and derived status from the in-memory location index
+"""
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.location_index import DriverLocationIndex, in_bbox, location_index
+
+
+BBox = Tuple[float, float, float, float]
+
+
+class DriverStatusSubscription:
+    """
+    One viewer of the driver map
+
+    `snapshot()` returns the drivers currently in the viewport; each later
+    `poll()` returns only what changed since the previous call. Changes
+    between two polls are coalesced - a driver that moved ten times is sent
+    once with its latest state. Drivers leaving the viewport (or deleted) are
+    reported in `removed`. A subscriber that fell behind the index's change
+    log gets every visible driver as upserted instead.
+    """
+
+    def __init__(self, index: DriverLocationIndex, bbox: Optional[BBox] = None):
+        self.index = index
+        self.bbox = bbox
+        self.version = 0
+        self._visible: set = set()
+
+    def snapshot(self) -> dict:
+        self.version, entries = self.index.snapshot(self.bbox)
+        self._visible = {e.driver_id for e in entries}
+        return {"version": self.version, "drivers": [e.to_dict() for e in entries]}
+
+    def set_bbox(self, bbox: Optional[BBox]) -> dict:
+        """Change the viewport; returns a fresh snapshot"""
+        self.bbox = bbox
+        return self.snapshot()
+
+    def poll(self) -> Optional[dict]:
+        """Coalesced delta since the last snapshot/poll, or None if nothing changed"""
+        version, changed = self.index.changes_since(self.version)
+        if changed is None:
+            return self._resync()
+        self.version = version
+        upserted: List[dict] = []
+        removed: List[str] = []
+        for driver_id, entry in changed:
+            if entry is not None and entry.latitude is not None and (self.bbox is None or in_bbox(entry, self.bbox)):
+                self._visible.add(driver_id)
+                upserted.append(entry.to_dict())
+            elif driver_id in self._visible:
+                self._visible.discard(driver_id)
+                removed.append(driver_id)
+        if not upserted and not removed:
+            return None
+        return {"version": version, "upserted": upserted, "removed": removed}
+
+    def _resync(self) -> dict:
+        """Full snapshot shaped as a delta: all visible drivers upserted, vanished ones removed"""
+        previous = self._visible
+        snapshot = self.snapshot()
+        return {
+            "version": snapshot["version"],
+            "upserted": snapshot["drivers"],
+            "removed": sorted(previous - self._visible),
+        }
+
+
+def parse_bbox(
+    min_lat: Optional[float],
+    min_lng: Optional[float],
+    max_lat: Optional[float],
+    max_lng: Optional[float]
+) -> Optional[BBox]:
+    """
+    Build a viewport from optional query values
+
+    Raises:
+        ValueError: If only some corners are given or they are inverted
+    """
+    values = (min_lat, min_lng, max_lat, max_lng)
+    if all(v is None for v in values):
+        return None
+    if any(v is None for v in values):
+        raise ValueError("min_lat, min_lng, max_lat and max_lng must be given together")
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError("Bounding box minimums must not exceed maximums")
+    return (float(min_lat), float(min_lng), float(max_lat), float(max_lng))
+
+
+class DriverStreamHub:
+    """
+    Creates subscriptions and keeps count of connected viewers
+
+    The hub reads this worker's location index. A ping handled by another
+    gunicorn worker reaches it through MySQL with the periodic index refresh,
+    so viewers see other workers' pings up to LOCATION_INDEX_REFRESH_SECONDS
+    (plus LOCATION_FLUSH_INTERVAL_SECONDS) late; pings and status
+    changes handled by this worker show up on the next tick.
+    """
+
+    def __init__(self, index: DriverLocationIndex, tick_seconds: float = 1.0, heartbeat_seconds: float = 15.0):
+        self.index = index
+        self.tick_seconds = tick_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscriptions: Dict[int, DriverStatusSubscription] = {}
+
+    def subscribe(self, bbox: Optional[BBox] = None) -> DriverStatusSubscription:
+        subscription = DriverStatusSubscription(self.index, bbox)
+        self._subscriptions[id(subscription)] = subscription
+        return subscription
+
+    def unsubscribe(self, subscription: DriverStatusSubscription) -> None:
+        self._subscriptions.pop(id(subscription), None)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscriptions), "version": self.index.version}
+
+
+# Singleton instance
+driver_stream_hub = DriverStreamHub(
+    location_index,
+    tick_seconds=settings.DRIVER_STREAM_TICK_SECONDS,
+    heartbeat_seconds=settings.DRIVER_STREAM_HEARTBEAT_SECONDS
+)
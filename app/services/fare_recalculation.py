@@ -0,0 +1,343 @@
+"""
+Bulk fare recalculation
+Replays the current tariffs over completed trips (after a tariff correction),
+as a dry-run diff report or applied in chunked transactions
+"""
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.constants import TripStatus, WalletTransactionType
+from app.core.fare_rules import (
+    commission_for, compute_fares, from_paise, is_round_trip, to_paise, trip_days_array,
+)
+from app.core.logging import get_logger
+from app.crud.crud_revenue import EXTRA_COLUMNS
+from app.models import Driver, Trip, WalletTransaction
+from app.services.tariff_cache import tariff_cache
+
+logger = get_logger(__name__)
+
+TRIP_COLUMNS = (
+    Trip.trip_id, Trip.vehicle_type, Trip.trip_type, Trip.assigned_driver_id,
+    Trip.odo_start, Trip.odo_end, Trip.fare, Trip.distance_km, Trip.total_amount,
+    Trip.started_at, Trip.ended_at, Trip.planned_start_at, Trip.planned_end_at,
+) + tuple(getattr(Trip, name) for name in EXTRA_COLUMNS)
+ADJUSTMENT_REASON = "Fare recalculation"
+# Extra charges the recalculation carries over as stored; driver_allowance is re-priced
+CARRIED_EXTRAS = tuple(name for name in EXTRA_COLUMNS if name != "driver_allowance")
+
+
+@dataclass
+class FareDiff:
+    """One trip whose stored fare or distance differs from the current tariff"""
+    trip_id: str
+    vehicle_type: Optional[str]
+    trip_type: Optional[str]
+    driver_id: Optional[str]
+    old_fare: Decimal
+    new_fare: Decimal
+    old_distance_km: Optional[Decimal]
+    new_distance_km: Decimal
+    old_driver_allowance: Optional[Decimal]
+    new_driver_allowance: Optional[Decimal]
+    old_total_amount: Optional[Decimal]
+    new_total_amount: Decimal
+    commission_delta: Decimal  # > 0: debit the driver's wallet, < 0: credit it back
+
+
+@dataclass
+class FareRecalculationReport:
+    """Outcome of a run; `diffs` holds every changed trip"""
+    applied: bool
+    total: int = 0
+    scanned: int = 0
+    unchanged: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+    fare_delta: Decimal = Decimal("0.00")
+    commission_delta: Decimal = Decimal("0.00")
+    wallet_adjustments: int = 0
+    chunks_committed: int = 0
+    last_trip_id: Optional[str] = None
+    diffs: List[FareDiff] = field(default_factory=list)
+
+    @property
+    def changed(self) -> int:
+        return len(self.diffs)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["changed"] = self.changed
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+
+ProgressCallback = Callable[[FareRecalculationReport], None]
+
+
+class FareRecalculationJob:
+    """
+    Recalculate the fares of completed trips with the current tariffs
+
+    Trips are selected by vehicle type and/or an inclusive ended_at date
+    range, or by an explicit trip id list, and walked in trip_id order in
+    chunks of `chunk_size`. Each chunk is read as column tuples and priced
+    in one vectorized pass (app.core.fare_rules).
+
+    - Dry run (default): nothing is written; the report lists every trip
+      whose fare or chargeable distance would change.
+    - apply: each chunk is one transaction. The chunk's rows are locked, the
+      changed trips get the new fare, distance, driver allowance and total
+      amount, and the commission difference (at the tariff's own commission
+      rate, as charged at completion) is settled per trip with a DEBIT/CREDIT
+      wallet transaction; the driver balance changes with one UPDATE per driver.
+      Trips are written through the ORM so the revenue rollup follows.
+
+    Applying is resumable: after every committed chunk the last trip_id is
+    written to `checkpoint_path`, and a rerun with the same selection
+    continues after it. Rerunning from scratch is safe as well, since
+    trips that already carry the new fare are unchanged and skipped.
+    """
+
+    def __init__(
+        self,
+        *,
+        vehicle_type: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        trip_ids: Optional[Sequence[str]] = None,
+        chunk_size: int = 500,
+        checkpoint_path: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.vehicle_type = vehicle_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.trip_ids = sorted(set(trip_ids)) if trip_ids else None
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.progress = progress
+
+    @property
+    def selection(self) -> dict:
+        return {
+            "vehicle_type": self.vehicle_type,
+            "start_date": self.start_date.isoformat() if self.start_date else None,
+            "end_date": self.end_date.isoformat() if self.end_date else None,
+            "trip_ids": self.trip_ids,
+        }
+
+    def _filtered(self, stmt):
+        stmt = stmt.where(Trip.trip_status == TripStatus.COMPLETED.value, Trip.is_deleted == False)
+        if self.vehicle_type:
+            stmt = stmt.where(Trip.vehicle_type == self.vehicle_type)
+        if self.start_date:
+            stmt = stmt.where(Trip.ended_at >= datetime.combine(self.start_date, time.min))
+        if self.end_date:
+            stmt = stmt.where(Trip.ended_at < datetime.combine(self.end_date + timedelta(days=1), time.min))
+        if self.trip_ids is not None:
+            stmt = stmt.where(Trip.trip_id.in_(self.trip_ids))
+        return stmt
+
+    def _read_chunk(self, db: Session, after: Optional[str], lock: bool):
+        stmt = self._filtered(select(*TRIP_COLUMNS))
+        if after is not None:
+            stmt = stmt.where(Trip.trip_id > after)
+        stmt = stmt.order_by(Trip.trip_id).limit(self.chunk_size)
+        if lock:
+            stmt = stmt.with_for_update()
+        return db.execute(stmt).all()
+
+    def _price(self, db: Session, rows, report: FareRecalculationReport) -> List[FareDiff]:
+        """Price one chunk; returns the trips whose fare, distance or allowance changes"""
+        tariffs, priced = [], []
+        for row in rows:
+            tariff = tariff_cache.get(db, row.vehicle_type)
+            reason = None
+            if row.odo_start is None or row.odo_end is None:
+                reason = "missing_odometer"
+            elif tariff is None:
+                reason = "no_tariff"
+            elif (tariff.round_trip_per_km if is_round_trip(row.trip_type) else tariff.one_way_per_km) is None:
+                reason = "incomplete_tariff"
+            if reason:
+                report.skipped[reason] = report.skipped.get(reason, 0) + 1
+                continue
+            tariffs.append(tariff)
+            priced.append(row)
+        if not priced:
+            return []
+
+        def ints(values) -> np.ndarray:
+            return np.fromiter(values, dtype=np.int64, count=len(priced))
+
+        fares = compute_fares(
+            odo_start=ints(row.odo_start for row in priced),
+            odo_end=ints(row.odo_end for row in priced),
+            round_trip=np.fromiter((is_round_trip(row.trip_type) for row in priced), dtype=bool, count=len(priced)),
+            trip_days=trip_days_array(
+                [row.started_at for row in priced], [row.ended_at for row in priced],
+                [row.planned_start_at for row in priced], [row.planned_end_at for row in priced]
+            ),
+            one_way_per_km_paise=ints(to_paise(t.one_way_per_km) for t in tariffs),
+            round_trip_per_km_paise=ints(to_paise(t.round_trip_per_km) for t in tariffs),
+            one_way_min_km=ints(t.one_way_min_km or 0 for t in tariffs),
+            round_trip_min_km=ints(t.round_trip_min_km or 0 for t in tariffs),
+            driver_allowance_paise=ints(to_paise(t.driver_allowance) for t in tariffs),
+        )
+
+        diffs = []
+        for row, tariff, fare_paise, chargeable_km, allowance_paise in zip(
+            priced, tariffs, fares.fare_paise, fares.chargeable_km, fares.driver_allowance_paise
+        ):
+            new_fare = from_paise(fare_paise)
+            new_distance = Decimal(int(chargeable_km))
+            old_fare = row.fare or Decimal("0")
+            if not new_fare:
+                report.skipped["zero_fare"] = report.skipped.get("zero_fare", 0) + 1
+                continue
+            # Like trip completion: a tariff without an allowance leaves the stored one alone
+            new_allowance = from_paise(allowance_paise) if allowance_paise > 0 else row.driver_allowance
+            if new_fare == old_fare and new_distance == row.distance_km and new_allowance == row.driver_allowance:
+                report.unchanged += 1
+                continue
+            extras = sum((getattr(row, name) or Decimal("0") for name in CARRIED_EXTRAS), Decimal("0"))
+            percent = tariff_cache.commission_percent(db, row.vehicle_type)
+            diffs.append(FareDiff(
+                trip_id=row.trip_id,
+                vehicle_type=row.vehicle_type,
+                trip_type=row.trip_type,
+                driver_id=row.assigned_driver_id,
+                old_fare=old_fare,
+                new_fare=new_fare,
+                old_distance_km=row.distance_km,
+                new_distance_km=new_distance,
+                old_driver_allowance=row.driver_allowance,
+                new_driver_allowance=new_allowance,
+                old_total_amount=row.total_amount,
+                new_total_amount=new_fare + extras + (new_allowance or Decimal("0")),
+                commission_delta=commission_for(new_fare, percent) - commission_for(old_fare, percent),
+            ))
+        return diffs
+
+    def _apply(self, db: Session, diffs: List[FareDiff], report: FareRecalculationReport) -> None:
+        """Write one chunk's changes (trips, wallet transactions, balances) into the session"""
+        trips = {
+            trip.trip_id: trip
+            for trip in db.query(Trip).filter(Trip.trip_id.in_([d.trip_id for d in diffs])).all()
+        }
+        driver_ids = {d.driver_id for d in diffs if d.driver_id and d.commission_delta}
+        live_drivers = set(db.execute(
+            select(Driver.driver_id).where(Driver.driver_id.in_(driver_ids), Driver.is_deleted == False)
+        ).scalars()) if driver_ids else set()
+
+        balance_deltas: Dict[str, Decimal] = {}
+        for diff in diffs:
+            trip = trips[diff.trip_id]
+            trip.fare = diff.new_fare
+            trip.distance_km = diff.new_distance_km
+            trip.driver_allowance = diff.new_driver_allowance
+            trip.total_amount = diff.new_total_amount
+            if diff.driver_id in live_drivers and diff.commission_delta:
+                db.add(WalletTransaction(
+                    wallet_id=str(uuid.uuid4()),
+                    driver_id=diff.driver_id,
+                    trip_id=diff.trip_id,
+                    amount=abs(diff.commission_delta),
+                    transaction_type=(WalletTransactionType.DEBIT if diff.commission_delta > 0 else WalletTransactionType.CREDIT).value,
+                    reason=ADJUSTMENT_REASON,
+                ))
+                balance_deltas[diff.driver_id] = balance_deltas.get(diff.driver_id, Decimal("0")) + diff.commission_delta
+                report.wallet_adjustments += 1
+
+        db.flush()
+        for driver_id, delta in balance_deltas.items():
+            db.query(Driver).filter(Driver.driver_id == driver_id).update(
+                {Driver.wallet_balance: func.coalesce(Driver.wallet_balance, 0) - delta},
+                synchronize_session=False
+            )
+
+    def _load_checkpoint(self) -> Optional[str]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("selection") != self.selection:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different selection: {checkpoint.get('selection')}")
+        return checkpoint.get("last_trip_id")
+
+    def _save_checkpoint(self, report: FareRecalculationReport) -> None:
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "selection": self.selection,
+                "last_trip_id": report.last_trip_id,
+                "saved_at": datetime.utcnow().isoformat(),
+            }, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def run(self, db: Session, apply: bool = False) -> FareRecalculationReport:
+        """
+        Price every selected trip; with `apply`, commit the changes chunk by chunk
+
+        Returns:
+            FareRecalculationReport (for a resumed run: the trips after the checkpoint)
+        """
+        report = FareRecalculationReport(applied=apply)
+        after = self._load_checkpoint() if apply else None
+        total_stmt = self._filtered(select(func.count(Trip.trip_id)))
+        if after is not None:
+            total_stmt = total_stmt.where(Trip.trip_id > after)
+            logger.info(f"Resuming fare recalculation after trip {after}")
+        report.total = db.execute(total_stmt).scalar() or 0
+
+        # Fresh tariffs for the whole run, not whatever this process cached earlier
+        tariff_cache.load(db)
+        db.rollback()
+
+        while True:
+            rows = self._read_chunk(db, after, lock=apply)
+            if not rows:
+                break
+            diffs = self._price(db, rows, report)
+            after = rows[-1].trip_id
+            if apply:
+                try:
+                    if diffs:
+                        self._apply(db, diffs, report)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                report.chunks_committed += 1
+            else:
+                db.rollback()  # end the read transaction between chunks
+            report.scanned += len(rows)
+            report.last_trip_id = after
+            report.diffs.extend(diffs)
+            report.fare_delta += sum((d.new_fare - d.old_fare for d in diffs), Decimal("0"))
+            report.commission_delta += sum((d.commission_delta for d in diffs), Decimal("0"))
+            if apply:
+                self._save_checkpoint(report)
+            if self.progress:
+                self.progress(report)
+
+        logger.info(
+            f"Fare recalculation {'applied' if apply else 'dry run'}: {report.scanned} trips scanned, "
+            f"{report.changed} changed, fare delta {report.fare_delta}, commission delta {report.commission_delta}"
+        )
+        return report
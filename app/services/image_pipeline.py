@@ -0,0 +1,223 @@
+"""
+Image compression process pool
+Uploads await JPEG compression on worker processes instead of decoding,
+resizing and re-encoding on the request's worker
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.image_processing import compress_image_file, make_renditions_file
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ImagePipelineBusy(Exception):
+    """Raised when `max_pending` jobs are already queued or running"""
+
+
+class ImageJobTimeout(Exception):
+    """Raised when a job does not finish within `job_timeout` seconds"""
+
+
+def _discard_output(path: str, future: Future) -> None:
+    # The caller gave up on the job; whatever it wrote after that is nobody's file
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ImagePipeline:
+    """
+    Bounded pool of image worker processes with an async API
+
+    - `await compress_file(src, dest)` runs compress_image_file on one of
+      `workers` processes, so decoding (HEIC/JPEG), LANCZOS resizing and the
+      JPEG quality search use other cores and never hold this process' GIL.
+      Only the two paths and the output size cross the process boundary.
+    - At most `max_pending` jobs are queued or running per app worker;
+      beyond that submit() raises ImagePipelineBusy right away instead
+      of letting uploads pile up (the router answers 503).
+    - A job that takes longer than `job_timeout` raises ImageJobTimeout.
+      A job that already started cannot be interrupted, so it keeps its
+      slot until it finishes and still counts towards `max_pending`;
+      compress_file deletes the output such a job writes once it ends
+      (a job still queued is cancelled instead).
+    - Background jobs (`submit_background`, e.g. upload renditions) only
+      start while less than half of `max_pending` is in use, so uploads
+      always keep the other half; otherwise they are skipped.
+      `rendering(path)` tells whether renditions of a path are still queued
+      or running here, so responses can list them before they exist.
+    - The pool starts on first use. Workers are spawned, not forked, so
+      they do not inherit DB connections or background threads. If a worker
+      dies (e.g. killed for memory) the pool is replaced on the next job.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, job_timeout: float = 30.0):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.job_timeout = job_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rendering: Dict[str, int] = {}  # path -> queued/running rendition jobs
+        self.completed_total = 0
+        self.failed_total = 0
+        self.rejected_total = 0
+        self.timeout_total = 0
+        self.background_skipped_total = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Image pipeline started with {self.workers} worker processes")
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _job_done(self, future: Future) -> None:
+        # Runs on the executor's management thread once the job really ends
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed_total += 1
+            else:
+                self.completed_total += 1
+
+    def _submit(self, fn, args, kwargs) -> Future:
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died since the last job: start a fresh pool once
+            self._discard_executor(executor)
+            return self._get_executor().submit(fn, *args, **kwargs)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queue `fn(*args, **kwargs)` on a worker process (fn must be picklable)"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected_total += 1
+                raise ImagePipelineBusy(f"{self._pending} image jobs already pending")
+            self._pending += 1
+        try:
+            future = self._submit(fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._job_done)
+        return future
+
+    def submit_background(self, fn, *args, **kwargs) -> Optional[Future]:
+        """Queue low-priority work without waiting for it; None if skipped because the pool is busy"""
+        with self._lock:
+            if self._pending >= self.max_pending // 2:
+                self.background_skipped_total += 1
+                return None
+        try:
+            return self.submit(fn, *args, **kwargs)
+        except ImagePipelineBusy:
+            return None
+
+    async def _result(self, future: Future):
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.job_timeout)
+        except asyncio.TimeoutError:
+            self.timeout_total += 1
+            raise ImageJobTimeout(f"Image job did not finish within {self.job_timeout}s")
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn` on the pool and await its result within `job_timeout`"""
+        return await self._result(self.submit(fn, *args, **kwargs))
+
+    async def compress_file(
+        self, src_path: str, dest_path: str, max_size_kb: int = 500, quality: int = 80, max_dimension: int = 1200
+    ) -> int:
+        """
+        Write the compressed JPEG of the image at `src_path` to `dest_path` (see compress_image_file)
+
+        If this raises while the job is still queued or running (timeout, request cancelled),
+        `dest_path` belongs to the job: it is deleted as soon as the job ends.
+        """
+        future = self.submit(
+            compress_image_file, src_path, dest_path, max_size_kb=max_size_kb, quality=quality, max_dimension=max_dimension
+        )
+        try:
+            return await self._result(future)
+        except BaseException:
+            if not future.cancel():
+                future.add_done_callback(partial(_discard_output, dest_path))
+            raise
+
+    def schedule_renditions(self, src_path: str) -> Optional[Future]:
+        """Write the renditions of a stored image in the background (see make_renditions_file); None if skipped"""
+        with self._lock:
+            self._rendering[src_path] = self._rendering.get(src_path, 0) + 1
+        future = self.submit_background(make_renditions_file, src_path)
+        if future is None:
+            logger.warning(f"Image pipeline busy, no renditions for {src_path}")
+            self._renditions_done(src_path)
+        else:
+            future.add_done_callback(partial(self._renditions_done, src_path))
+        return future
+
+    def _renditions_done(self, src_path: str, future: Optional[Future] = None) -> None:
+        with self._lock:
+            if self._rendering.get(src_path, 0) > 1:
+                self._rendering[src_path] -= 1
+            else:
+                self._rendering.pop(src_path, None)
+        if future is not None and not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Renditions failed for {src_path}: {future.exception()}")
+
+    def rendering(self, src_path: str) -> bool:
+        """True while renditions of `src_path` are queued or running on this worker"""
+        return src_path in self._rendering
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed_total": self.completed_total,
+            "failed_total": self.failed_total,
+            "rejected_total": self.rejected_total,
+            "timeout_total": self.timeout_total,
+            "background_skipped_total": self.background_skipped_total,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Singleton instance (worker processes start with the first upload)
+image_pipeline = ImagePipeline(
+    workers=settings.IMAGE_WORKERS,
+    max_pending=settings.IMAGE_MAX_PENDING,
+    job_timeout=settings.IMAGE_JOB_TIMEOUT_SECONDS
+)
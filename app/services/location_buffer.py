@@ -0,0 +1,129 @@
+"""
+Write-behind buffer for driver GPS pings
+Pings are accepted into memory and the latest position per driver is flushed
+to driver_live_location in batched upserts on a fixed interval
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.background import PeriodicTask
+
+logger = get_logger(__name__)
+
+
+class LocationBufferFull(Exception):
+    """Raised when the buffer cannot accept more drivers until the next flush"""
+
+
+class LocationWriteBuffer:
+    """
+    Coalescing write-behind store for driver live locations
+
+    - Only the newest ping per driver is kept, so memory is bounded by the
+      number of active drivers, not by the ping rate.
+    - Backpressure: once `max_pending` distinct drivers are waiting (e.g. MySQL
+      is down and flushes keep failing) pings from new drivers are rejected
+      with LocationBufferFull; drivers already pending keep coalescing.
+    - A failed flush puts its rows back unless a newer ping arrived meanwhile.
+    - `stop()` flushes whatever is pending so a graceful shutdown loses nothing.
+    """
+
+    def __init__(self, flush_interval: float = 2.0, max_pending: int = 50000, batch_size: int = 500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending: Dict[str, Tuple[float, float, datetime]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = PeriodicTask("location-write-behind", flush_interval, self.flush)
+        self.flushed_total = 0
+        self.failed_flushes = 0
+        self.rejected_total = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, driver_id: str, latitude: float, longitude: float, last_updated: Optional[datetime] = None) -> None:
+        """
+        Accept a ping without touching the database
+
+        Raises:
+            LocationBufferFull: If the buffer is saturated
+        """
+        last_updated = last_updated or datetime.utcnow()
+        with self._lock:
+            current = self._pending.get(driver_id)
+            if current is None:
+                if len(self._pending) >= self.max_pending:
+                    self.rejected_total += 1
+                    raise LocationBufferFull("Location buffer is full, retry later")
+            elif current[2] > last_updated:
+                return
+            self._pending[driver_id] = (float(latitude), float(longitude), last_updated)
+
+    def _requeue(self, batch: Dict[str, Tuple[float, float, datetime]]) -> None:
+        with self._lock:
+            for driver_id, value in batch.items():
+                current = self._pending.get(driver_id)
+                if current is None or current[2] < value[2]:
+                    self._pending[driver_id] = value
+
+    def flush(self) -> int:
+        """
+        Write all pending positions to MySQL
+
+        Returns:
+            Number of rows written
+        """
+        from app.database import session_scope
+        from app.crud.crud_location import crud_driver_location
+
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+
+            rows = [
+                {"driver_id": driver_id, "latitude": lat, "longitude": lng, "last_updated": ts}
+                for driver_id, (lat, lng, ts) in batch.items()
+            ]
+            try:
+                with session_scope() as db:
+                    written = crud_driver_location.upsert_many(db, rows, batch_size=self.batch_size)
+            except Exception:
+                self.failed_flushes += 1
+                self._requeue(batch)
+                raise
+
+            self.flushed_total += written
+            if written != len(rows):
+                logger.warning(f"Dropped {len(rows) - written} location pings for unknown drivers")
+            return written
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "flushed_total": self.flushed_total,
+            "failed_flushes": self.failed_flushes,
+            "rejected_total": self.rejected_total,
+        }
+
+    def start(self) -> None:
+        self._task.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write out everything still pending"""
+        self._task.stop(final_run=True)
+
+
+# Singleton instance
+location_buffer = LocationWriteBuffer(
+    flush_interval=settings.LOCATION_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.LOCATION_BUFFER_MAX_PENDING,
+    batch_size=settings.LOCATION_FLUSH_BATCH_SIZE
+)
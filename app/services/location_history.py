@@ -0,0 +1,165 @@
+"""
+Append-only driver location history
+Every ping is kept in memory and periodically appended to driver_location_history
+as compact delta-encoded chunks (see app.core.location_codec)
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.location_codec import encode_chunk, window_start_for
+from app.core.logging import get_logger
+from app.services.background import PeriodicTask
+
+logger = get_logger(__name__)
+
+
+class LocationHistoryBuffer:
+    """
+    Write-behind recorder for the GPS trail of every driver
+
+    Recording a ping is a list append; the flusher groups pending points by
+    (driver, window) and appends one encoded chunk per window with a single
+    batched upsert. History is best effort: if MySQL is unavailable long
+    enough for `max_pending_points` to be reached, new points are dropped
+    (and counted) instead of rejecting the live location update.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 1800,
+        flush_interval: float = 10.0,
+        max_pending_points: int = 500000,
+        batch_size: int = 500
+    ):
+        self.window_seconds = window_seconds
+        self.max_pending_points = max_pending_points
+        self.batch_size = batch_size
+        self._pending: Dict[str, List[Tuple[datetime, float, float]]] = defaultdict(list)
+        self._pending_points = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = PeriodicTask("location-history", flush_interval, self.flush)
+        self.flushed_total = 0
+        self.dropped_total = 0
+        self.failed_flushes = 0
+
+    def record(self, driver_id: str, latitude: float, longitude: float, recorded_at: Optional[datetime] = None) -> bool:
+        """Record one point; returns False if it was dropped"""
+        return self.record_many(driver_id, [(recorded_at or datetime.utcnow(), latitude, longitude)]) == 1
+
+    def record_many(self, driver_id: str, points: Iterable[Tuple[datetime, float, float]]) -> int:
+        """
+        Record (timestamp, lat, lng) points of a driver
+
+        Returns:
+            Number of points accepted
+        """
+        points = [(ts, float(lat), float(lng)) for ts, lat, lng in points]
+        with self._lock:
+            room = self.max_pending_points - self._pending_points
+            if room < len(points):
+                self.dropped_total += len(points) - max(room, 0)
+                points = points[:max(room, 0)]
+            if points:
+                self._pending[driver_id].extend(points)
+                self._pending_points += len(points)
+        return len(points)
+
+    def _requeue(self, batch: Dict[str, List[Tuple[datetime, float, float]]]) -> None:
+        with self._lock:
+            for driver_id, points in batch.items():
+                self._pending[driver_id][:0] = points
+                self._pending_points += len(points)
+
+    def flush(self) -> int:
+        """
+        Append all pending points to driver_location_history
+
+        Returns:
+            Number of points written
+        """
+        from app.database import session_scope
+        from app.crud.crud_location import crud_driver_location_history
+
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending_points:
+                    return 0
+                batch, self._pending = self._pending, defaultdict(list)
+                self._pending_points = 0
+
+            windows: Dict[Tuple[str, datetime], list] = defaultdict(list)
+            for driver_id, points in batch.items():
+                for point in points:
+                    windows[(driver_id, window_start_for(point[0], self.window_seconds))].append(point)
+
+            rows = []
+            for (driver_id, window_start), points in windows.items():
+                rows.append({
+                    "driver_id": driver_id,
+                    "window_start": window_start,
+                    "first_point_at": min(p[0] for p in points),
+                    "last_point_at": max(p[0] for p in points),
+                    "point_count": len(points),
+                    "data": encode_chunk(window_start, points),
+                })
+
+            try:
+                with session_scope() as db:
+                    crud_driver_location_history.append_chunks(db, rows, batch_size=self.batch_size)
+            except Exception:
+                self.failed_flushes += 1
+                self._requeue(batch)
+                raise
+
+            written = sum(row["point_count"] for row in rows)
+            self.flushed_total += written
+            return written
+
+    def pending_points(self, driver_id: str, start: datetime, end: datetime) -> List[Tuple[datetime, float, float]]:
+        """Points of a driver recorded by this worker that are not flushed yet"""
+        with self._lock:
+            return [p for p in self._pending.get(driver_id, ()) if start <= p[0] <= end]
+
+    def get_trail(self, db, driver_id: str, start: datetime, end: datetime) -> List[Tuple[datetime, float, float]]:
+        """
+        Get the (timestamp, lat, lng) trail of a driver between start and end
+
+        Stored windows are merged with points of this worker that are still
+        waiting for a flush, so an in-progress trip shows its latest pings.
+        """
+        from app.crud.crud_location import crud_driver_location_history
+
+        points = crud_driver_location_history.get_points(db, driver_id, start, end, self.window_seconds)
+        pending = self.pending_points(driver_id, start, end)
+        if pending:
+            points = sorted(points + pending, key=lambda p: p[0])
+        return points
+
+    def stats(self) -> dict:
+        return {
+            "pending_points": self._pending_points,
+            "max_pending_points": self.max_pending_points,
+            "flushed_total": self.flushed_total,
+            "dropped_total": self.dropped_total,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    def start(self) -> None:
+        self._task.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write out everything still pending"""
+        self._task.stop(final_run=True)
+
+
+# Singleton instance
+location_history = LocationHistoryBuffer(
+    window_seconds=settings.LOCATION_HISTORY_WINDOW_SECONDS,
+    flush_interval=settings.LOCATION_HISTORY_FLUSH_SECONDS,
+    max_pending_points=settings.LOCATION_HISTORY_MAX_PENDING_POINTS,
+    batch_size=settings.LOCATION_FLUSH_BATCH_SIZE
+)
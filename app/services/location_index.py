@@ -0,0 +1,480 @@
+"""
+In-memory geospatial index of driver live locations
+Answers "k nearest available drivers within R km" without touching MySQL
+"""
+import math
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 110.574
+# How long the change log keeps removed drivers; subscribers further behind resync
+REMOVED_RETENTION_SECONDS = 300
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def in_bbox(entry: "DriverLocationEntry", bbox: Tuple[float, float, float, float]) -> bool:
+    """True if the entry lies inside (min_lat, min_lng, max_lat, max_lng)"""
+    min_lat, min_lng, max_lat, max_lng = bbox
+    return min_lat <= entry.latitude <= max_lat and min_lng <= entry.longitude <= max_lng
+
+
+def derive_current_status(active_trip_status: Optional[str], is_available: Optional[bool]) -> str:
+    """
+    Derive the driver status shown on the admin map
+    Priority: Trip Activity > Manual Toggle
+    """
+    if active_trip_status == "STARTED":
+        return "driving"
+    if active_trip_status == "ASSIGNED":
+        return "busy"
+    if is_available is False:
+        return "offline"
+    return "available"
+
+
+def driver_attributes_query(driver_id: str):
+    """
+    One-row select of the index attributes of a live driver (None row if deleted/unknown)
+
+    Same rules as DriverLocationIndex.refresh_from_db: the vehicle type of an
+    approved vehicle, then the most recently updated one; a STARTED trip wins
+    over an ASSIGNED one.
+    """
+    from sqlalchemy import select
+    from app.models import Driver, DriverActiveTrip, Vehicle
+
+    vehicle_type = select(Vehicle.vehicle_type).where(
+        Vehicle.driver_id == Driver.driver_id, Vehicle.is_deleted == False
+    ).order_by(
+        Vehicle.vehicle_approved.desc(), Vehicle.updated_at.desc(), Vehicle.vehicle_id
+    ).limit(1).scalar_subquery()
+    active_trip_status = select(DriverActiveTrip.trip_status).where(
+        DriverActiveTrip.driver_id == Driver.driver_id
+    ).order_by(
+        # "STARTED" sorts after "ASSIGNED"
+        DriverActiveTrip.trip_status.desc()
+    ).limit(1).scalar_subquery()
+    return select(
+        Driver.name.label("driver_name"),
+        Driver.phone_number,
+        Driver.photo_url,
+        Driver.is_available,
+        Driver.is_approved,
+        vehicle_type.label("vehicle_type"),
+        active_trip_status.label("active_trip_status")
+    ).where(Driver.driver_id == driver_id, Driver.is_deleted == False)
+
+
+class DriverLocationEntry:
+    """Latest known position and dispatch attributes of one driver"""
+
+    __slots__ = (
+        "driver_id", "latitude", "longitude", "last_updated", "monotonic_ts", "cell", "version",
+        "driver_name", "phone_number", "photo_url", "vehicle_type", "is_available", "is_approved",
+        "active_trip_status",
+    )
+
+    def __init__(self, driver_id: str):
+        self.driver_id = driver_id
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+        self.last_updated: Optional[datetime] = None
+        self.monotonic_ts: float = 0.0
+        self.cell: Optional[Tuple[int, int]] = None
+        self.version: int = 0
+        self.driver_name: Optional[str] = None
+        self.phone_number = None
+        self.photo_url: Optional[str] = None
+        self.vehicle_type: Optional[str] = None
+        self.is_available: Optional[bool] = True
+        self.is_approved: Optional[bool] = False
+        self.active_trip_status: Optional[str] = None
+
+    @property
+    def current_status(self) -> str:
+        return derive_current_status(self.active_trip_status, self.is_available)
+
+    @property
+    def is_dispatchable(self) -> bool:
+        """Approved, toggled available and not on an active trip"""
+        return bool(self.is_approved) and self.is_available is not False and self.active_trip_status is None
+
+    @property
+    def display_state(self) -> tuple:
+        """Fields shown on the admin map; a change here is pushed to stream subscribers"""
+        return (self.latitude, self.longitude, self.current_status, self.driver_name, self.photo_url, self.phone_number)
+
+    def to_dict(self) -> dict:
+        """Same shape as an item of GET /drivers/locations"""
+        return {
+            "driver_id": self.driver_id,
+            "driver_name": self.driver_name,
+            "photo_url": self.photo_url,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "phone_number": str(self.phone_number) if self.phone_number is not None else None,
+            "current_status": self.current_status,
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None
+        }
+
+
+class DriverLocationIndex:
+    """
+    Uniform lat/lng grid bucket index
+
+    Each driver lives in exactly one cell of `cell_size_deg` degrees. A radius
+    query only visits the cells overlapping the bounding box of the search
+    circle, so lookups cost O(drivers in nearby cells) instead of O(fleet).
+
+    The index is process-local: every gunicorn worker keeps its own copy,
+    warmed from MySQL at startup and periodically re-synced by `refresh_from_db`.
+
+    Every change to what the admin map shows (position, derived status,
+    name/photo/phone) bumps a global `version` and is recorded in a change
+    log ordered by version, so stream subscribers can ask for "everything
+    changed since version N" without scanning the fleet. Removed drivers
+    leave the log after REMOVED_RETENTION_SECONDS (pruned on refresh); a
+    subscriber asking from before that point is told to resync.
+    """
+
+    _ATTRIBUTES = (
+        "driver_name", "phone_number", "photo_url", "vehicle_type",
+        "is_available", "is_approved", "active_trip_status",
+    )
+
+    def __init__(self, cell_size_deg: float = 0.05, stale_after_seconds: int = 600):
+        self.cell_size_deg = cell_size_deg
+        self.stale_after_seconds = stale_after_seconds
+        self._entries: Dict[str, DriverLocationEntry] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._lock = threading.RLock()
+        self._version = 0
+        # driver_id -> version of its last visible change (or removal), oldest first
+        self._changes: "OrderedDict[str, int]" = OrderedDict()
+        # driver_id -> monotonic time of removal, for pruning the change log
+        self._removed: Dict[str, float] = {}
+        self._pruned_version = 0
+
+    def _cell_for(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (int(math.floor(latitude / self.cell_size_deg)), int(math.floor(longitude / self.cell_size_deg)))
+
+    def _move(self, entry: DriverLocationEntry, cell: Tuple[int, int]) -> None:
+        if entry.cell == cell:
+            return
+        if entry.cell is not None:
+            bucket = self._cells.get(entry.cell)
+            if bucket is not None:
+                bucket.discard(entry.driver_id)
+                if not bucket:
+                    del self._cells[entry.cell]
+        self._cells.setdefault(cell, set()).add(entry.driver_id)
+        entry.cell = cell
+
+    def _record_change(self, driver_id: str) -> int:
+        self._version += 1
+        self._changes[driver_id] = self._version
+        self._changes.move_to_end(driver_id)
+        entry = self._entries.get(driver_id)
+        if entry is not None:
+            entry.version = self._version
+        return self._version
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, driver_id: str) -> bool:
+        return driver_id in self._entries
+
+    def get(self, driver_id: str) -> Optional[DriverLocationEntry]:
+        """Get the indexed entry for a driver"""
+        return self._entries.get(driver_id)
+
+    def upsert_location(
+        self,
+        driver_id: str,
+        latitude: float,
+        longitude: float,
+        last_updated: Optional[datetime] = None,
+        **attributes
+    ) -> bool:
+        """
+        Record a driver position
+
+        Older positions never overwrite newer ones, so out-of-order replays
+        and periodic DB re-syncs are safe.
+
+        Returns:
+            True if the stored position changed
+        """
+        last_updated = last_updated or datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(driver_id)
+            if entry is None:
+                entry = self._new_entry(driver_id)
+            before = entry.display_state
+            self._apply_attributes(entry, attributes)
+            if entry.last_updated is not None and last_updated < entry.last_updated:
+                if entry.display_state != before:
+                    self._record_change(driver_id)
+                return False
+            entry.latitude = float(latitude)
+            entry.longitude = float(longitude)
+            entry.last_updated = last_updated
+            entry.monotonic_ts = time.monotonic() - max(0.0, (datetime.utcnow() - last_updated).total_seconds())
+            self._move(entry, self._cell_for(entry.latitude, entry.longitude))
+            if entry.display_state != before:
+                self._record_change(driver_id)
+            return True
+
+    def update_attributes(self, driver_id: str, **attributes) -> None:
+        """Update dispatch attributes (availability, approval, trip status...) of a driver"""
+        with self._lock:
+            entry = self._entries.get(driver_id)
+            if entry is None:
+                entry = self._new_entry(driver_id)
+            before = entry.display_state
+            self._apply_attributes(entry, attributes)
+            if entry.latitude is not None and entry.display_state != before:
+                self._record_change(driver_id)
+
+    def _new_entry(self, driver_id: str) -> DriverLocationEntry:
+        entry = DriverLocationEntry(driver_id)
+        self._entries[driver_id] = entry
+        self._removed.pop(driver_id, None)
+        return entry
+
+    def _apply_attributes(self, entry: DriverLocationEntry, attributes: dict) -> None:
+        for name, value in attributes.items():
+            if name not in self._ATTRIBUTES:
+                raise ValueError(f"Unknown driver index attribute: {name}")
+            setattr(entry, name, value)
+
+    def remove(self, driver_id: str) -> None:
+        """Drop a driver from the index (e.g. after soft delete)"""
+        with self._lock:
+            entry = self._entries.pop(driver_id, None)
+            if entry is not None and entry.cell is not None:
+                bucket = self._cells.get(entry.cell)
+                if bucket is not None:
+                    bucket.discard(driver_id)
+                    if not bucket:
+                        del self._cells[entry.cell]
+                self._record_change(driver_id)
+                self._removed[driver_id] = time.monotonic()
+
+    def prune_removed(self, older_than_seconds: float = REMOVED_RETENTION_SECONDS) -> int:
+        """Drop drivers removed more than `older_than_seconds` ago from the change log"""
+        cutoff = time.monotonic() - older_than_seconds
+        with self._lock:
+            expired = [driver_id for driver_id, removed_at in self._removed.items() if removed_at < cutoff]
+            for driver_id in expired:
+                del self._removed[driver_id]
+                version = self._changes.pop(driver_id, None)
+                if version is not None:
+                    self._pruned_version = max(self._pruned_version, version)
+            return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            for driver_id in list(self._entries):
+                self.remove(driver_id)
+
+    def snapshot(self, bbox: Optional[Tuple[float, float, float, float]] = None) -> Tuple[int, List[DriverLocationEntry]]:
+        """
+        All positioned drivers, optionally inside (min_lat, min_lng, max_lat, max_lng)
+
+        Returns:
+            (version, entries) - pass the version to `changes_since` for deltas
+        """
+        with self._lock:
+            entries = [
+                e for e in self._entries.values()
+                if e.latitude is not None and (bbox is None or in_bbox(e, bbox))
+            ]
+            return self._version, entries
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[List[Tuple[str, Optional[DriverLocationEntry]]]]]:
+        """
+        Drivers whose map state changed after `version`, each reported once
+
+        Returns:
+            (current version, [(driver_id, entry or None if removed)]); the list is
+            None when removals after `version` were pruned already (take a new snapshot)
+        """
+        changed = []
+        with self._lock:
+            if version < self._pruned_version:
+                return self._version, None
+            for driver_id in reversed(self._changes):
+                if self._changes[driver_id] <= version:
+                    break
+                changed.append((driver_id, self._entries.get(driver_id)))
+            return self._version, changed
+
+    def _cells_in_radius(self, latitude: float, longitude: float, radius_km: float) -> Iterable[Tuple[int, int]]:
+        d_lat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = max(0.01, math.cos(math.radians(latitude)))
+        d_lng = min(180.0, radius_km / (111.320 * cos_lat))
+        min_row, min_col = self._cell_for(latitude - d_lat, longitude - d_lng)
+        max_row, max_col = self._cell_for(latitude + d_lat, longitude + d_lng)
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield (row, col)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        k: int = 10,
+        vehicle_type: Optional[str] = None,
+        only_dispatchable: bool = True
+    ) -> List[Tuple[float, DriverLocationEntry]]:
+        """
+        Find the k nearest drivers within radius_km of a point
+
+        Args:
+            latitude: Pickup latitude
+            longitude: Pickup longitude
+            radius_km: Search radius in kilometres
+            k: Maximum number of drivers to return
+            vehicle_type: Optional vehicle type filter (case-insensitive)
+            only_dispatchable: Skip drivers that are unapproved, offline or on a trip
+
+        Returns:
+            List of (distance_km, entry) sorted by distance
+        """
+        vehicle_type_norm = vehicle_type.strip().lower() if vehicle_type else None
+        stale_before = time.monotonic() - self.stale_after_seconds
+        candidates = []
+        with self._lock:
+            for cell in self._cells_in_radius(latitude, longitude, radius_km):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for driver_id in bucket:
+                    entry = self._entries[driver_id]
+                    if entry.monotonic_ts < stale_before:
+                        continue
+                    if only_dispatchable and not entry.is_dispatchable:
+                        continue
+                    if vehicle_type_norm and (entry.vehicle_type or "").lower() != vehicle_type_norm:
+                        continue
+                    distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+                    if distance <= radius_km:
+                        candidates.append((distance, driver_id, entry))
+        return [(distance, entry) for distance, _, entry in heapq.nsmallest(k, candidates)]
+
+    def refresh_from_db(self, db) -> int:
+        """
+        Re-sync the index from MySQL in a single query
+
+        Positions are only applied if newer than what the index already holds
+        (both sides are naive UTC from the app clock); dispatch attributes are
+        always taken from the database. A driver with several vehicles gets
+        the type of an approved one, then the most recently updated.
+
+        Returns:
+            Number of drivers loaded
+        """
+        from sqlalchemy import and_
+        from app.models import Driver, DriverActiveTrip, DriverLiveLocation, Vehicle
+
+        rows = db.query(
+            Driver.driver_id,
+            Driver.name,
+            Driver.phone_number,
+            Driver.photo_url,
+            Driver.is_available,
+            Driver.is_approved,
+            Driver.is_deleted,
+            DriverLiveLocation.latitude,
+            DriverLiveLocation.longitude,
+            DriverLiveLocation.last_updated,
+            Vehicle.vehicle_type,
+            DriverActiveTrip.trip_status.label("active_trip_status")
+        ).join(
+            DriverLiveLocation, Driver.driver_id == DriverLiveLocation.driver_id
+        ).outerjoin(
+            Vehicle, and_(Vehicle.driver_id == Driver.driver_id, Vehicle.is_deleted == False)
+        ).outerjoin(
+            DriverActiveTrip, Driver.driver_id == DriverActiveTrip.driver_id
+        ).order_by(
+            # The first row of each driver carries the vehicle it dispatches with
+            Driver.driver_id,
+            Vehicle.vehicle_approved.desc(),
+            Vehicle.updated_at.desc(),
+            Vehicle.vehicle_id
+        ).all()
+
+        seen = set()
+        for r in rows:
+            if r.is_deleted:
+                self.remove(r.driver_id)
+                continue
+            if r.driver_id in seen:
+                # Several vehicles / active trips: keep the STARTED trip if any
+                if r.active_trip_status == "STARTED":
+                    self.update_attributes(r.driver_id, active_trip_status="STARTED")
+                continue
+            seen.add(r.driver_id)
+            self.upsert_location(
+                r.driver_id,
+                float(r.latitude),
+                float(r.longitude),
+                r.last_updated or datetime.utcnow(),
+                driver_name=r.name,
+                phone_number=r.phone_number,
+                photo_url=r.photo_url,
+                vehicle_type=r.vehicle_type,
+                is_available=r.is_available,
+                is_approved=r.is_approved,
+                active_trip_status=r.active_trip_status
+            )
+
+        # Prune drivers that went quiet; recent pings not yet in MySQL are kept
+        stale_before = time.monotonic() - self.stale_after_seconds
+        with self._lock:
+            for driver_id in [d for d, e in self._entries.items() if d not in seen and e.monotonic_ts < stale_before]:
+                self.remove(driver_id)
+        self.prune_removed()
+
+        return len(seen)
+
+
+# Singleton instance
+location_index = DriverLocationIndex(
+    cell_size_deg=settings.LOCATION_INDEX_CELL_DEG,
+    stale_after_seconds=settings.LOCATION_STALE_SECONDS
+)
+
+
+def refresh_location_index() -> int:
+    """Re-sync the singleton index using a short-lived session"""
+    from app.database import session_scope
+
+    with session_scope() as db:
+        return location_index.refresh_from_db(db)
@@ -2,13 +2,16 @@
 Cloud Storage Service - S3-Compatible (AWS S3, Cloudflare R2, etc.)
 Handles file uploads to cloud storage instead of local file system
 """
+import io
 import os
 import boto3
 from botocore.exceptions import ClientError
+from concurrent.futures import Future, ThreadPoolExecutor
 from fastapi import UploadFile, HTTPException
 from datetime import datetime
 import logging
-from app.core.image_processing import compress_image
+from app.core.image_processing import RENDITIONS, compress_image, make_renditions_bytes, rendition_path
+from app.services.image_pipeline import image_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,8 @@ class StorageService:
             )
             self.bucket_name = os.getenv("S3_BUCKET_NAME")
             self.base_url = os.getenv("S3_PUBLIC_URL", f"https://{self.bucket_name}.s3.amazonaws.com")
+            # Uploads renditions rendered on the image pipeline, off its result thread
+            self._rendition_uploader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="s3-renditions")
         else:
             # Fallback to local storage
             self.upload_dir = os.getenv("UPLOAD_DIR", "d:/cab_ap/uploads")
@@ -68,9 +73,10 @@ class StorageService:
             
             # Compress if it's an image
             ext = os.path.splitext(file_path)[1].lower()
+            compressed = None
             if ext in [".jpg", ".jpeg", ".png", ".heic", ".webp"]:
                 try:
-                    file_body = compress_image(file)
+                    file_body = compressed = compress_image(file)
                 except Exception as e:
                     logger.warning(f"Compression failed, uploading original: {e}")
                     file.file.seek(0)
@@ -89,6 +95,9 @@ class StorageService:
                 }
             )
             
+            if compressed is not None:
+                self._schedule_s3_renditions(compressed.getvalue(), file_path)
+            
             # Generate public URL
             url = f"{self.base_url}/{file_path}"
             logger.info(f"File uploaded to S3: {url}")
@@ -101,6 +110,35 @@ class StorageService:
             logger.error(f"Unexpected error during S3 upload: {str(e)}")
             raise HTTPException(500, f"Upload failed: {str(e)}")
     
+    def _schedule_s3_renditions(self, data: bytes, file_path: str) -> None:
+        """Render small/medium renditions on the image pipeline, then upload them beside the original"""
+        future = image_pipeline.submit_background(make_renditions_bytes, io.BytesIO(data))
+        if future is None:
+            logger.warning(f"Image pipeline busy, no renditions for {file_path}")
+            return
+        
+        def rendered(done: Future) -> None:
+            if done.cancelled():
+                return
+            if done.exception() is not None:
+                logger.warning(f"Renditions failed for {file_path}: {done.exception()}")
+                return
+            self._rendition_uploader.submit(self._upload_renditions_to_s3, done.result(), file_path)
+        
+        future.add_done_callback(rendered)
+    
+    def _upload_renditions_to_s3(self, renditions: dict, file_path: str) -> None:
+        for rendition, data in renditions.items():
+            try:
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(data),
+                    self.bucket_name,
+                    rendition_path(file_path, rendition),
+                    ExtraArgs={'ContentType': "image/jpeg", 'ACL': 'public-read'}
+                )
+            except Exception as e:
+                logger.warning(f"Rendition upload failed for {file_path} ({rendition}): {e}")
+    
     def _upload_to_local(self, file: UploadFile, folder: str, filename: str) -> str:
         """Upload file to local file system (fallback)"""
         try:
@@ -118,7 +156,8 @@ class StorageService:
                 try:
                     compressed_buffer = compress_image(file)
                     with open(file_path, "wb") as buffer:
-                        buffer.write(compressed_buffer.getvalue())
+                        buffer.write(compressed_buffer.getbuffer())
+                    image_pipeline.schedule_renditions(file_path)
                 except Exception as e:
                     logger.warning(f"Compression failed, saving original: {e}")
                     file.file.seek(0)
@@ -145,7 +184,7 @@ class StorageService:
             return self._delete_from_local(file_url)
     
     def _delete_from_s3(self, file_url: str) -> bool:
-        """Delete file from S3"""
+        """Delete file and its renditions from S3"""
         try:
             # Extract file path from URL
             file_path = file_url.replace(self.base_url + "/", "")
@@ -154,6 +193,9 @@ class StorageService:
                 Bucket=self.bucket_name,
                 Key=file_path
             )
+            for rendition in (RENDITIONS if file_path.endswith(".jpg") else ()):
+                # Deleting a rendition that was never uploaded succeeds as well
+                self.s3_client.delete_object(Bucket=self.bucket_name, Key=rendition_path(file_path, rendition))
             logger.info(f"File deleted from S3: {file_path}")
             return True
         except Exception as e:
@@ -161,13 +203,16 @@ class StorageService:
             return False
     
     def _delete_from_local(self, file_url: str) -> bool:
-        """Delete file from local storage"""
+        """Delete file and its renditions from local storage"""
         try:
             # Extract file path from URL
             file_path = file_url.replace(self.base_url + "/", "")
             full_path = os.path.join(self.upload_dir, file_path)
             
             if os.path.exists(full_path):
+                for rendition in RENDITIONS:
+                    if os.path.exists(rendition_path(full_path, rendition)):
+                        os.remove(rendition_path(full_path, rendition))
                 os.remove(full_path)
                 logger.info(f"File deleted locally: {full_path}")
                 return True
@@ -0,0 +1,150 @@
+"""
+In-process cache of the active vehicle tariffs
+Fare calculation and commission lookups read tariffs from memory; tariff
+writes bump a version stamp that every worker polls to reload its copy
+"""
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.constants import DEFAULT_DRIVER_COMMISSION_PERCENT
+from app.core.logging import get_logger
+from app.models import CacheVersion, VehicleTariffConfig
+from app.services.background import PeriodicTask
+
+logger = get_logger(__name__)
+
+CACHE_NAME = "tariffs"
+
+
+def read_cache_version(db: Session, name: str) -> int:
+    """Current version stamp of a cache (0 if it was never bumped)"""
+    version = db.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_cache_version(db: Session, name: str) -> None:
+    """Move a cache's version stamp on; commits with the caller's transaction"""
+    updated = db.query(CacheVersion).filter(CacheVersion.name == name).update(
+        {CacheVersion.version: CacheVersion.version + 1, CacheVersion.updated_at: func.now()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(CacheVersion(name=name, version=1))
+
+
+@dataclass(frozen=True)
+class TariffRates:
+    """Immutable copy of the VehicleTariffConfig columns fare calculation reads"""
+    tariff_id: str
+    vehicle_type: Optional[str]
+    one_way_per_km: Optional[Decimal]
+    round_trip_per_km: Optional[Decimal]
+    driver_allowance: Optional[Decimal]
+    one_way_min_km: Optional[int]
+    round_trip_min_km: Optional[int]
+    driver_commission: Optional[Decimal]
+
+
+def _key(vehicle_type: Optional[str]) -> str:
+    # MySQL's default collation compares vehicle_type case-insensitively
+    return (vehicle_type or "").strip().lower()
+
+
+class TariffCache:
+    """
+    Active tariffs keyed by vehicle_type, shared by all requests of a worker
+
+    - Loaded at startup and reloaded whenever the `tariffs` row in
+      cache_versions changes. The tariff_config write paths bump it in the
+      same transaction (`mark_changed`), and a background thread per worker
+      checks it every `check_interval` seconds - one primary-key read
+      instead of a tariff query per fare.
+    - The writing worker drops its own copy at once, so its next lookup
+      reloads; other workers follow within `check_interval`.
+    - With several active rows for one vehicle type the most recently
+      updated wins.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self._tariffs: Dict[str, TariffRates] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._task = PeriodicTask("tariff-cache", check_interval, self.check)
+        self.reloads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._version is not None
+
+    def load(self, db: Session) -> int:
+        """Read every active tariff; returns the number of vehicle types cached"""
+        # No autoflush: flushing the caller's trips would re-enter the cache from the
+        # revenue rollup listener while the lock is held
+        with self._lock, db.no_autoflush:
+            # Version first: a write landing between the two reads only causes one extra reload
+            version = read_cache_version(db, CACHE_NAME)
+            rows = db.query(VehicleTariffConfig).filter(
+                VehicleTariffConfig.is_active == True,
+                VehicleTariffConfig.is_deleted == False
+            ).order_by(VehicleTariffConfig.updated_at.desc(), VehicleTariffConfig.tariff_id).all()
+
+            tariffs: Dict[str, TariffRates] = {}
+            for row in rows:
+                tariffs.setdefault(_key(row.vehicle_type), TariffRates(
+                    tariff_id=row.tariff_id,
+                    vehicle_type=row.vehicle_type,
+                    one_way_per_km=row.one_way_per_km,
+                    round_trip_per_km=row.round_trip_per_km,
+                    driver_allowance=row.driver_allowance,
+                    one_way_min_km=row.one_way_min_km,
+                    round_trip_min_km=row.round_trip_min_km,
+                    driver_commission=row.driver_commission,
+                ))
+            self._tariffs = tariffs
+            self._version = version
+            self.reloads += 1
+            return len(tariffs)
+
+    def get(self, db: Session, vehicle_type: Optional[str]) -> Optional[TariffRates]:
+        """Active tariff for a vehicle type; `db` is only used when the cache is cold"""
+        if self._version is None:
+            self.load(db)
+        return self._tariffs.get(_key(vehicle_type))
+
+    def commission_percent(self, db: Session, vehicle_type: Optional[str]) -> Decimal:
+        """Commission percent debited on a vehicle type's fares (tariff rate, else the default)"""
+        tariff = self.get(db, vehicle_type)
+        if tariff is not None and tariff.driver_commission is not None:
+            return Decimal(str(tariff.driver_commission))
+        return Decimal(str(DEFAULT_DRIVER_COMMISSION_PERCENT))
+
+    def mark_changed(self, db: Session) -> None:
+        """Call before committing a tariff write: bumps the stamp and drops this worker's copy"""
+        bump_cache_version(db, CACHE_NAME)
+        self._version = None
+
+    def check(self) -> None:
+        """Reload if another worker changed the tariffs (runs on the background thread)"""
+        from app.database import session_scope
+
+        with session_scope() as db:
+            if self._version is None or read_cache_version(db, CACHE_NAME) != self._version:
+                loaded = self.load(db)
+                logger.info(f"Tariff cache reloaded: {loaded} vehicle types")
+
+    def start(self) -> None:
+        self._task.start()
+
+    def stop(self) -> None:
+        self._task.stop(final_run=False)
+
+
+# Singleton instance
+tariff_cache = TariffCache(check_interval=settings.TARIFF_CACHE_CHECK_SECONDS)
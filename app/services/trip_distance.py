@@ -0,0 +1,105 @@
+"""
+Trip distance verification
+Cross-checks the odometer distance of a trip against its recorded GPS trail
+"""
+from decimal import Decimal
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.gps_distance import compute_trail_distance
+from app.core.logging import get_logger
+from app.models import Trip, TripGpsDistance
+from app.services.location_history import location_history
+
+logger = get_logger(__name__)
+
+
+class TripDistanceVerifier:
+    """
+    Computes the GPS distance of a trip and flags odometer mismatches
+
+    A trip is flagged when GPS and odometer distances differ by more than
+    `mismatch_percent` of the odometer distance *and* by at least
+    `mismatch_min_km`, so short city rides are not flagged for a few
+    hundred metres of GPS noise.
+    """
+
+    def __init__(self, max_speed_kmh: float = 200.0, mismatch_percent: float = 15.0, mismatch_min_km: float = 3.0):
+        self.max_speed_kmh = max_speed_kmh
+        self.mismatch_percent = mismatch_percent
+        self.mismatch_min_km = mismatch_min_km
+
+    def _load_trail(self, db: Session, trip: Trip):
+        from app.crud.crud_location import crud_driver_location_history
+
+        start, end = trip.started_at, trip.ended_at
+        seconds, lats, lngs = crud_driver_location_history.get_point_arrays(
+            db, trip.assigned_driver_id, start, end, location_history.window_seconds
+        )
+        pending = location_history.pending_points(trip.assigned_driver_id, start, end)
+        if pending:
+            seconds = np.concatenate([seconds, [(p[0] - start).total_seconds() for p in pending]])
+            lats = np.concatenate([lats, [p[1] for p in pending]])
+            lngs = np.concatenate([lngs, [p[2] for p in pending]])
+        return seconds, lats, lngs
+
+    def verify(self, db: Session, trip: Trip) -> Optional[TripGpsDistance]:
+        """
+        Compute and store the GPS distance of a finished trip
+
+        The row is added to the session but not committed, so it lands in the
+        same transaction as the trip completion. Failures are logged and never
+        block completing the trip.
+
+        Returns:
+            The stored TripGpsDistance, or None if the trip cannot be checked
+        """
+        if not trip.assigned_driver_id or not trip.started_at or not trip.ended_at:
+            return None
+
+        try:
+            # Savepoint: a failure here must not roll back the trip completion
+            with db.begin_nested():
+                result = compute_trail_distance(*self._load_trail(db, trip), max_speed_kmh=self.max_speed_kmh)
+
+                odometer_km = None
+                if trip.odo_start is not None and trip.odo_end is not None:
+                    odometer_km = float(trip.odo_end - trip.odo_start)
+
+                mismatch_percent = None
+                is_flagged = False
+                if result.distance_km is not None and odometer_km:
+                    difference = abs(result.distance_km - odometer_km)
+                    mismatch_percent = difference / odometer_km * 100
+                    is_flagged = mismatch_percent > self.mismatch_percent and difference >= self.mismatch_min_km
+
+                record = db.merge(TripGpsDistance(
+                    trip_id=trip.trip_id,
+                    gps_distance_km=Decimal(str(round(result.distance_km, 2))) if result.distance_km is not None else None,
+                    odometer_distance_km=Decimal(str(odometer_km)) if odometer_km is not None else None,
+                    mismatch_percent=Decimal(str(round(mismatch_percent, 2))) if mismatch_percent is not None else None,
+                    is_flagged=is_flagged,
+                    point_count=result.point_count,
+                    rejected_points=result.rejected_points
+                ))
+
+                if is_flagged:
+                    logger.warning(
+                        f"Trip {trip.trip_id}: GPS distance {result.distance_km} km vs odometer "
+                        f"{odometer_km} km ({mismatch_percent:.1f}% mismatch)"
+                    )
+                return record
+        except Exception as e:
+            logger.error(f"GPS distance verification failed for trip {trip.trip_id}: {e}", exc_info=True)
+            return None
+
+
+# Singleton instance
+trip_distance_verifier = TripDistanceVerifier(
+    max_speed_kmh=settings.GPS_MAX_SPEED_KMH,
+    mismatch_percent=settings.GPS_DISTANCE_MISMATCH_PERCENT,
+    mismatch_min_km=settings.GPS_DISTANCE_MISMATCH_MIN_KM
+)
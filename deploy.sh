@@ -55,7 +55,14 @@ if [ ! -f "$APP_DIR/.env" ]; then
     echo "nano $APP_DIR/.env"
 fi
 
-echo -e "${YELLOW}Step 9: Creating systemd service...${NC}"
+echo -e "${YELLOW}Step 9: Running database migrations...${NC}"
+# Existing databases created by the old create_all bootstrap are adopted as-is
+if ! alembic upgrade head; then
+    echo -e "${RED}WARNING: Migrations failed - check the DB_* settings in .env, then run:${NC}"
+    echo "cd $APP_DIR && $VENV_DIR/bin/alembic upgrade head"
+fi
+
+echo -e "${YELLOW}Step 10: Creating systemd service...${NC}"
 cat > /etc/systemd/system/cab-api.service << 'EOF'
 [Unit]
 Description=Cab Booking FastAPI Application
@@ -74,7 +81,7 @@ RestartSec=3
 WantedBy=multi-user.target
 EOF
 
-echo -e "${YELLOW}Step 10: Configuring Nginx...${NC}"
+echo -e "${YELLOW}Step 11: Configuring Nginx...${NC}"
 cat > /etc/nginx/sites-available/cab-api << 'EOF'
 server {
     listen 80;
@@ -112,16 +119,16 @@ EOF
 ln -sf /etc/nginx/sites-available/cab-api /etc/nginx/sites-enabled/
 rm -f /etc/nginx/sites-enabled/default
 
-echo -e "${YELLOW}Step 11: Testing Nginx configuration...${NC}"
+echo -e "${YELLOW}Step 12: Testing Nginx configuration...${NC}"
 nginx -t
 
-echo -e "${YELLOW}Step 12: Starting services...${NC}"
+echo -e "${YELLOW}Step 13: Starting services...${NC}"
 systemctl daemon-reload
 systemctl enable cab-api
 systemctl start cab-api
 systemctl restart nginx
 
-echo -e "${YELLOW}Step 13: Configuring firewall...${NC}"
+echo -e "${YELLOW}Step 14: Configuring firewall...${NC}"
 ufw allow 22/tcp
 ufw allow 80/tcp
 ufw allow 443/tcp
@@ -138,9 +145,10 @@ systemctl status cab-api --no-pager
 echo ""
 echo -e "${YELLOW}Next Steps:${NC}"
 echo "1. Edit .env file: nano $APP_DIR/.env"
-echo "2. Restart service: systemctl restart cab-api"
-echo "3. Check logs: journalctl -u cab-api -f"
-echo "4. Test API: curl http://72.62.196.30/health"
-echo "5. Access Swagger: http://72.62.196.30/docs"
+echo "2. Apply migrations: cd $APP_DIR && $VENV_DIR/bin/alembic upgrade head"
+echo "3. Restart service: systemctl restart cab-api"
+echo "4. Check logs: journalctl -u cab-api -f"
+echo "5. Test API: curl http://72.62.196.30/health"
+echo "6. Access Swagger: http://72.62.196.30/docs"
 echo ""
 echo -e "${GREEN}Your API is now running!${NC}"
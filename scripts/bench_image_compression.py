@@ -0,0 +1,152 @@
+"""
+Benchmark upload image compression against the previous quality loop
+
+For every image of the corpus, runs the old algorithm (full decode, LANCZOS
+resize, optimized JPEG re-encoded at quality 80, 70, ... until it fits) and
+app.core.image_processing.compress_image_bytes, and prints CPU ms per image
+(process time, mean of --repeat runs) and output KB.
+
+Without --corpus a synthetic phone-photo corpus is generated: 12 MP and
+8 MP camera JPEGs in both orientations, a 12 MP HEIC and a PNG screenshot.
+
+    python -m scripts.bench_image_compression
+    python -m scripts.bench_image_compression --corpus ~/phone-photos --max-kb 300
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+CORPUS_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".heif", ".webp"}
+
+
+def legacy_compress(image_data: bytes, max_size_kb: int = 500, quality: int = 80, max_dimension: int = 1200) -> bytes:
+    """compress_image before decode-time downscaling and the quality search"""
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+
+    width, height = img.size
+    if width > max_dimension or height > max_dimension:
+        if width > height:
+            new_width = max_dimension
+            new_height = int(height * (max_dimension / width))
+        else:
+            new_height = max_dimension
+            new_width = int(width * (max_dimension / height))
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    img.save(output, format="JPEG", optimize=True, quality=quality)
+    while output.tell() > max_size_kb * 1024 and quality > 30:
+        output = io.BytesIO()
+        quality -= 10
+        img.save(output, format="JPEG", optimize=True, quality=quality)
+    return output.getvalue()
+
+
+def _photo(width: int, height: int, seed: int) -> Image.Image:
+    """Sky-like gradients and soft shapes over fine texture, plus sensor noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    x /= width
+    y /= height
+    channels = []
+    for _ in range(3):
+        layer = 90 + 80 * y + 30 * np.sin(2 * np.pi * (x * rng.uniform(1, 3) + rng.uniform()))
+        for _ in range(6):
+            cx, cy, r = rng.uniform(), rng.uniform(), rng.uniform(0.05, 0.3)
+            layer += rng.uniform(-60, 60) * np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * r * r))
+        layer += 12 * np.sin(2 * np.pi * 180 * x) * np.sin(2 * np.pi * 140 * y) * (y > 0.6)
+        channels.append(layer)
+    # Foliage/fabric-like detail at a quarter of the resolution survives the resize to 1200px
+    detail = Image.fromarray(rng.normal(128, 40, (height // 4, width // 4)).clip(0, 255).astype(np.uint8))
+    detail = np.asarray(detail.resize((width, height), Image.Resampling.BILINEAR), dtype=np.float32) - 128
+    arr = np.stack(channels, axis=-1) + detail[..., None] + rng.normal(0, 4, (height, width, 3))
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+
+
+def _encoded(img: Image.Image, fmt: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+
+def synthetic_corpus() -> List[Tuple[str, bytes]]:
+    corpus = [
+        ("camera-12mp-landscape.jpg", _encoded(_photo(4032, 3024, 1), "JPEG", quality=92)),
+        ("camera-12mp-portrait.jpg", _encoded(_photo(3024, 4032, 2), "JPEG", quality=92)),
+        ("camera-8mp.jpg", _encoded(_photo(3264, 2448, 3), "JPEG", quality=90)),
+        ("screenshot.png", _encoded(_photo(1170, 2532, 4).quantize(64), "PNG")),
+    ]
+    try:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+        corpus.append(("camera-12mp.heic", _encoded(_photo(4032, 3024, 5), "HEIF", quality=80)))
+    except ImportError:
+        pass
+    return corpus
+
+
+def load_corpus(path: str) -> List[Tuple[str, bytes]]:
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if os.path.splitext(name)[1].lower() in CORPUS_EXTENSIONS:
+            with open(os.path.join(path, name), "rb") as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> Tuple[float, bytes]:
+    """Mean CPU ms of `fn` plus its last result"""
+    start = time.process_time()
+    for _ in range(repeat):
+        data = fn()
+    return (time.process_time() - start) * 1000 / repeat, data
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="Directory of images (default: synthetic phone photos)")
+    parser.add_argument("--max-kb", type=int, default=500, help="Target size in KB")
+    parser.add_argument("--max-dimension", type=int, default=1200, help="Longest side after resizing")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per image and path")
+    args = parser.parse_args(argv)
+
+    from app.core.image_processing import compress_image_bytes  # registers the HEIF opener
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not corpus:
+        parser.error(f"no images in {args.corpus}")
+
+    print(f"target {args.max_kb} KB, {args.max_dimension}px, mean of {args.repeat} runs (CPU ms)")
+    print(f"{'image':28} {'input KB':>9} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'old KB':>7} {'new KB':>7}")
+    totals = [0.0, 0.0, 0, 0]
+    for name, data in corpus:
+        old_ms, old_out = timed(lambda: legacy_compress(data, args.max_kb, 80, args.max_dimension), args.repeat)
+        new_ms, new_out = timed(
+            lambda: compress_image_bytes(data, max_size_kb=args.max_kb, max_dimension=args.max_dimension), args.repeat
+        )
+        totals[0] += old_ms
+        totals[1] += new_ms
+        totals[2] += len(old_out)
+        totals[3] += len(new_out)
+        print(
+            f"{name[:28]:28} {len(data) / 1024:9.0f} {old_ms:8.1f} {new_ms:8.1f} {old_ms / new_ms:7.1f}x "
+            f"{len(old_out) / 1024:7.0f} {len(new_out) / 1024:7.0f}"
+        )
+    count = len(corpus)
+    print(
+        f"{'mean per image':28} {'':9} {totals[0] / count:8.1f} {totals[1] / count:8.1f} {totals[0] / totals[1]:7.1f}x "
+        f"{totals[2] / count / 1024:7.0f} {totals[3] / count / 1024:7.0f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Benchmark the response serializers against the per-field paths they replace
+
+For each hot response shape, encodes N in-memory model objects to JSON bytes
+and prints the mean time per batch for each path:
+
+- dict+encoder: per-field dict per object, then FastAPI's jsonable_encoder
+  (the old hand-built list responses)
+- pydantic: response_model validation from attributes, then jsonable_encoder
+  (routes returning ORM objects)
+- encode / records: app.core.serializers RecordEncoder.encode_many (ORM
+  objects) and .records (projection rows), then orjson
+
+    python -m scripts.bench_serializers
+    python -m scripts.bench_serializers --rows 5000 --repeat 20
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, List, Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import inspect
+
+
+# Enum-backed columns need values the response schemas accept
+SAMPLES = {
+    "trip_status": "COMPLETED",
+    "kyc_verified": "approved",
+    "status": "SUCCESS",
+    "payment_transactions.transaction_type": "CASH",
+    "wallet_transactions.transaction_type": "credit",
+}
+
+
+def _value(column, index: int) -> Any:
+    """Plausible value for a column of the given type (errors stays NULL: its schema type varies)"""
+    for key in (f"{column.table.name}.{column.name}", column.name):
+        if key in SAMPLES:
+            return SAMPLES[key]
+    if column.name == "errors":
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    if python_type is Decimal:
+        return Decimal(f"{100 + index % 900}.50")
+    if python_type is datetime:
+        return datetime(2026, 1, 1, 8, 30) + timedelta(minutes=index)
+    if python_type is date:
+        return date(2027, 1, 1) + timedelta(days=index % 365)
+    if python_type is bool:
+        return index % 2 == 0
+    if python_type is int:
+        return 9000000000 + index if column.name == "phone_number" else index % 7 + 1
+    if python_type is str:
+        return f"{column.name}-{index}"
+    return None
+
+
+def make_objects(model, count: int) -> List[Any]:
+    columns = inspect(model).columns
+    return [model(**{column.key: _value(column, i) for column in columns}) for i in range(count)]
+
+
+def per_field_dict(fields) -> Callable[[Any], dict]:
+    """The old route code: one getattr + conversion per field per object"""
+    def to_dict(obj):
+        result = {}
+        for name in fields:
+            value = getattr(obj, name)
+            if isinstance(value, Decimal):
+                value = float(value) if value else None
+            elif isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            result[name] = value
+        return result
+    return to_dict
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Objects per batch")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed batches per path")
+    args = parser.parse_args(argv)
+
+    from app.core.serializers import (
+        DRIVER_ENCODER, PAYMENT_ENCODER, TRIP_ENCODER, TRIP_RESPONSE_ENCODER,
+        VEHICLE_ENCODER, WALLET_TRANSACTION_ENCODER,
+    )
+    from app.schemas import (
+        PaymentTransactionResponse, TripResponse, VehicleResponse, WalletTransactionResponse,
+    )
+
+    cases = [
+        ("trip list", TRIP_ENCODER, None),
+        ("trip (TripResponse)", TRIP_RESPONSE_ENCODER, TripResponse),
+        # DriverResponse types phone_number as str over a BigInteger column, so the
+        # driver routes never validated ORM objects against it
+        ("driver", DRIVER_ENCODER, None),
+        ("vehicle", VEHICLE_ENCODER, VehicleResponse),
+        ("payment", PAYMENT_ENCODER, PaymentTransactionResponse),
+        ("wallet transaction", WALLET_TRANSACTION_ENCODER, WalletTransactionResponse),
+    ]
+
+    print(f"{args.rows} objects per batch, mean of {args.repeat} batches (ms)")
+    print(f"{'shape':22} {'dict+encoder':>13} {'pydantic':>9} {'encode':>8} {'records':>8} {'speedup':>8}")
+    for label, encoder, schema in cases:
+        objs = make_objects(encoder.model, args.rows)
+        rows = [tuple(getattr(obj, name) for name in encoder.fields) for obj in objs]
+        to_dict = per_field_dict(encoder.fields)
+
+        baseline = timed(lambda: orjson.dumps(jsonable_encoder([to_dict(obj) for obj in objs])), args.repeat)
+        validated = None
+        if schema is not None:
+            validated = timed(
+                lambda: orjson.dumps(jsonable_encoder([schema.model_validate(obj, from_attributes=True) for obj in objs])),
+                args.repeat
+            )
+        encoded = timed(lambda: orjson.dumps(encoder.encode_many(objs)), args.repeat)
+        records = timed(lambda: orjson.dumps(encoder.records(rows)), args.repeat)
+
+        slowest = max(baseline, validated or 0.0)
+        pydantic = f"{validated:.2f}" if validated is not None else "-"
+        print(
+            f"{label:22} {baseline:>13.2f} {pydantic:>9} "
+            f"{encoded:>8.2f} {records:>8.2f} {slowest / encoded:>7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+SQL budget / N+1 check for the read endpoints
+
+Seeds a throwaway SQLite database (see scripts/check_query_plans.py), calls
+the listing and detail endpoints through the real app with the query budget
+tracker attached and prints its per-route report. A route fails when a
+request runs more statements than its budget or repeats one statement
+QUERY_BUDGET_REPEAT_THRESHOLD times or more.
+
+    python -m scripts.check_query_budget
+    python -m scripts.check_query_budget --report query_budget.json   # keep the JSON report as a CI artifact
+
+Exits with status 1 if any route is over budget.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from scripts.check_query_plans import migrate, seed
+
+PATHS = [
+    "/api/v1/drivers/",
+    "/api/v1/drivers/driver-1",
+    "/api/v1/drivers/locations",
+    "/api/v1/vehicles/",
+    "/api/v1/trips/",
+    "/api/v1/trips/?cursor=",
+    "/api/v1/trips/available",
+    "/api/v1/trips/trip-1",
+    "/api/v1/trips/driver/driver-1",
+    "/api/v1/trips/statistics/dashboard",
+    "/api/v1/trip-requests/",
+    "/api/v1/trip-requests/?cursor=",
+    "/api/v1/trip-requests/request-1",
+    "/api/v1/trip-requests/trip/trip-1",
+    "/api/v1/trip-requests/driver/driver-1",
+    "/api/v1/payments/",
+    "/api/v1/wallet-transactions/",
+    "/api/v1/tariff-config/",
+    "/api/v1/analytics/dashboard",
+]
+
+
+def run(paths: List[str], database_path: str) -> dict:
+    """Call every path once against a seeded copy; returns the tracker report"""
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.core.query_budget import QueryBudgetMiddleware, query_budget_tracker
+    from app.database import get_async_db, get_db
+    from app.main import app
+
+    engine = create_engine(f"sqlite:///{database_path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    migrate(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    db = SessionLocal()
+    try:
+        seed(db)
+    finally:
+        db.close()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    if not settings.QUERY_BUDGET_ENABLED:
+        app.add_middleware(QueryBudgetMiddleware)
+    query_budget_tracker.mode = "log"
+    query_budget_tracker.instrument_engine(engine)
+    query_budget_tracker.instrument_engine(async_engine.sync_engine)
+    query_budget_tracker.reset()
+
+    # No `with`: the lifespan jobs (active-trip rebuild, flushers) need MySQL
+    client = TestClient(app, raise_server_exceptions=False)
+    for path in paths:
+        response = client.get(path)
+        if response.status_code >= 400:
+            print(f"[WARN] GET {path} -> {response.status_code}")
+    return query_budget_tracker.report()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--report", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    from app.core.query_budget import query_budget_tracker
+
+    handle, database_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        report = run(PATHS, database_path)
+    finally:
+        os.remove(database_path)
+
+    print(query_budget_tracker.format_report())
+    if args.report:
+        query_budget_tracker.write_report(args.report)
+    violating = report["violating_routes"]
+    for name in violating:
+        print(f"[FAIL] {name}")
+    print(f"{len(violating)} of {len(report['routes'])} routes over budget" if violating else "All routes within budget")
+    return 1 if violating else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
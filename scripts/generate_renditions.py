@@ -0,0 +1,55 @@
+"""
+Generate missing small/medium renditions for stored upload images
+
+Uploads render their renditions in the background; images stored before
+renditions existed, or whose rendering was skipped while the image pipeline
+was busy, are filled in by this script (safe to run repeatedly).
+
+    python -m scripts.generate_renditions
+    python -m scripts.generate_renditions --root /path/to/uploads --force
+"""
+import argparse
+import os
+import sys
+from typing import Iterator, List, Optional
+
+
+def stored_images(root: str) -> Iterator[str]:
+    """Compressed upload JPEGs under `root` (not renditions or temp files)"""
+    from app.core.image_processing import RENDITIONS
+
+    suffixes = tuple(f"_{rendition}.jpg" for rendition in RENDITIONS)
+    for folder, _, names in os.walk(root):
+        for name in sorted(names):
+            if name.lower().endswith(".jpg") and not name.startswith(".") and not name.endswith(suffixes):
+                yield os.path.join(folder, name)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.routers.uploads import UPLOAD_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default=UPLOAD_DIR, help="Upload directory")
+    parser.add_argument("--force", action="store_true", help="Re-render existing renditions too")
+    args = parser.parse_args(argv)
+
+    from app.core.image_processing import RENDITIONS, make_renditions_file, rendition_path
+
+    rendered = skipped = failed = 0
+    for path in stored_images(args.root):
+        if not args.force and all(os.path.exists(rendition_path(path, rendition)) for rendition in RENDITIONS):
+            skipped += 1
+            continue
+        try:
+            make_renditions_file(path)
+            rendered += 1
+        except Exception as e:
+            # e.g. an original kept because it could not be decoded
+            print(f"  {path}: {e}")
+            failed += 1
+    print(f"{rendered} rendered, {skipped} already present, {failed} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Rebuild driver_active_trips from the trips table
+
+The table is kept in step with every trip commit and was backfilled by
+migration 0007; run this to repair it after bulk SQL edits that bypass the
+ORM. Workers pick the change up on their next location index refresh.
+
+    python -m scripts.rebuild_active_trips
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args(argv)
+
+    from app.database import session_scope
+    from app.crud import crud_trip
+
+    with session_scope() as db:
+        active = crud_trip.rebuild_active_trips(db)
+
+    print(f"driver_active_trips rebuilt: {active} active trips")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Rebuild daily_revenue_rollup from the trips table
+
+The rollup is maintained incrementally on every trip flush; run this to
+backfill, or to repair it after bulk SQL edits that bypass the ORM.
+
+    python -m scripts.rebuild_revenue_rollup                                   # every day
+    python -m scripts.rebuild_revenue_rollup --start 2026-01-01 --end 2026-01-31
+"""
+import argparse
+import sys
+from datetime import date
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild, inclusive (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    if args.start and args.end and args.start > args.end:
+        parser.error("--start must not be after --end")
+
+    from app.database import session_scope
+    from app.crud.crud_revenue import crud_revenue_rollup
+
+    with session_scope() as db:
+        rows = crud_revenue_rollup.rebuild(db, start_date=args.start, end_date=args.end)
+
+    scope = f"{args.start or 'beginning'} .. {args.end or 'today'}"
+    print(f"daily_revenue_rollup rebuilt for {scope}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Recalculate completed-trip fares with the current tariffs
+
+Dry run by default: prints what would change (and writes the full diff as
+JSON with --report). --apply commits the new fares and the wallet
+commission adjustments chunk by chunk; with --checkpoint an interrupted run
+continues where it stopped when started again with the same selection.
+
+    python -m scripts.recalculate_fares --vehicle-type sedan --start 2026-09-01 --end 2026-09-30
+    python -m scripts.recalculate_fares --trip-id <id> --trip-id <id> --report diff.json
+    python -m scripts.recalculate_fares --vehicle-type sedan --start 2026-09-01 --apply --checkpoint sedan-sept.json
+"""
+import argparse
+import sys
+from datetime import date
+from typing import List, Optional
+
+
+def _print_progress(report) -> None:
+    print(
+        f"  {report.scanned}/{report.total} trips scanned, {report.changed} changed"
+        + (f", {report.chunks_committed} chunks committed" if report.applied else ""),
+        flush=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicle-type", help="Only trips of this vehicle type")
+    parser.add_argument("--start", type=date.fromisoformat, help="First trip end date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last trip end date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--trip-id", action="append", dest="trip_ids", help="Only this trip (repeatable)")
+    parser.add_argument("--apply", action="store_true", help="Write the new fares and wallet adjustments")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Trips per transaction")
+    parser.add_argument("--checkpoint", help="Resume file for --apply (created if missing)")
+    parser.add_argument("--report", help="Write the full report with every diff as JSON")
+    parser.add_argument("--show", type=int, default=20, help="Diffs to print")
+    args = parser.parse_args(argv)
+
+    if not (args.vehicle_type or args.start or args.end or args.trip_ids):
+        parser.error("select trips with --vehicle-type, --start/--end or --trip-id")
+    if args.start and args.end and args.start > args.end:
+        parser.error("--start must not be after --end")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    from app.database import session_scope
+    from app.services.fare_recalculation import FareRecalculationJob
+
+    job = FareRecalculationJob(
+        vehicle_type=args.vehicle_type,
+        start_date=args.start,
+        end_date=args.end,
+        trip_ids=args.trip_ids,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        progress=_print_progress
+    )
+    with session_scope() as db:
+        report = job.run(db, apply=args.apply)
+
+    for diff in report.diffs[:args.show]:
+        print(
+            f"{diff.trip_id}  {diff.vehicle_type or '-'}  fare {diff.old_fare} -> {diff.new_fare}  "
+            f"km {diff.old_distance_km} -> {diff.new_distance_km}  "
+            f"allowance {diff.old_driver_allowance} -> {diff.new_driver_allowance}  commission {diff.commission_delta:+}"
+        )
+    if report.changed > args.show:
+        print(f"... {report.changed - args.show} more (see --report)")
+
+    print(f"{'Applied' if report.applied else 'Dry run'}: {report.scanned} trips scanned, {report.changed} changed, {report.unchanged} unchanged")
+    for reason, count in sorted(report.skipped.items()):
+        print(f"  skipped ({reason}): {count}")
+    print(f"Fare delta {report.fare_delta}, commission delta {report.commission_delta}, {report.wallet_adjustments} wallet adjustments")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report.to_json())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())